@@ -0,0 +1,292 @@
+"""
+Offline end-to-end latency benchmark for handle_command.
+
+Runs a corpus of user commands (benchmarks/e2eCommands.jsonl) through handle_command with the
+LLM endpoint replaced by the local stub server (stubLLMServer.py) and Firestore by the in-memory
+stand-in (memoryFirestore.py), both with simulated latency. No API key or Firebase project needed.
+
+Each command's wall time is split into stages:
+
+    intent     until the first tool runs: fast-path router, local classifier, intent LLM(s)
+    tool       inside tool functions, excluding the Firestore and render time below
+               (includes the LLM calls tools make: advice, severity, missing arguments)
+    firestore  Firestore RPCs (summed, so concurrent reads can add up to more than their wall time)
+    render     markdown rendering helpers plus assembling the reply after the last tool
+
+and reported as p50/p95/p99 over all passes, with throughput in commands per second.
+Commands run one at a time (so stage times don't overlap), each role with its own TechSession.
+Run from the repository root:
+
+    python benchmarks/e2eLatency.py
+    python benchmarks/e2eLatency.py --llm-latency 0.8 --tokens-per-second 60 --repeat 5 --json e2e.json
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from firebaseTests import firebaseFullV10 as backend  # noqa: E402
+from firebaseTests.llmCache import LLMResponseCache  # noqa: E402
+from firebaseTests.techSession import TechSession  # noqa: E402
+from memoryFirestore import MemoryFirestore  # noqa: E402
+from stubLLMServer import StubLLMServer, load_intents, load_responses  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'e2eCommands.jsonl')
+STAGES = ('intent', 'tool', 'firestore', 'render', 'total')
+# Functions handle_command reaches tools through (it looks tools up in the module globals)
+TOOL_ENTRY_POINTS = ('execute_tool_calls', 'llm_missing_arg_handler', 'create_ticket', 'provide_tech_support_advice')
+RENDER_HELPERS = ('_render_ticket_page', '_format_multi_field_update')
+SESSIONS = {
+    'user': 'JS817_669_677',
+    'admin': 'AD100_200_300',
+}
+SEED_EMPLOYEES = 500
+SEED_TICKETS = 14
+
+
+class _NoCache:
+    """Response cache stand-in so every call reaches the stub."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class StageClock:
+    """
+    Stage times for the command currently running. Tool functions may nest (execute_tool_calls ->
+    call_tool -> show_tickets) and run on the read pool, so only the outermost span is counted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start()
+
+    def start(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.first_tool = None
+            self.last_tool_exit = None
+            self._depth = 0
+            self._tool_entered = None
+            self.tool = 0.0
+            self.firestore = 0.0
+            self.render = 0.0
+
+    def enter_tool(self):
+        with self._lock:
+            if self._depth == 0:
+                self._tool_entered = time.perf_counter()
+                if self.first_tool is None:
+                    self.first_tool = self._tool_entered
+            self._depth += 1
+
+    def exit_tool(self):
+        with self._lock:
+            self._depth -= 1
+            if self._depth == 0:
+                self.last_tool_exit = time.perf_counter()
+                self.tool += self.last_tool_exit - self._tool_entered
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            setattr(self, stage, getattr(self, stage) + seconds)
+
+    def finish(self) -> dict:
+        ended = time.perf_counter()
+        with self._lock:
+            first_tool = self.first_tool or ended
+            tail = ended - self.last_tool_exit if self.last_tool_exit else 0.0
+            return {
+                'intent': first_tool - self.started,
+                'tool': max(0.0, self.tool - self.firestore - self.render),
+                'firestore': self.firestore,
+                'render': self.render + tail,
+                'total': ended - self.started,
+            }
+
+
+def instrument(clock: StageClock) -> None:
+    """
+    Wrap the tool entry points and render helpers in the backend module with stage timers.
+    """
+    def tool_span(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            clock.enter_tool()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                clock.exit_tool()
+        return wrapper
+
+    def render_span(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                clock.add('render', time.perf_counter() - started)
+        return wrapper
+
+    tools = set(TOOL_ENTRY_POINTS) | backend.PLANNED_TOOLS | {'notAdmin'}
+    for name in sorted(tools):
+        if callable(getattr(backend, name, None)):
+            setattr(backend, name, tool_span(getattr(backend, name)))
+    for name in RENDER_HELPERS:
+        setattr(backend, name, render_span(getattr(backend, name)))
+
+
+def seed(db: MemoryFirestore) -> None:
+    """
+    Two session employees, SEED_EMPLOYEES generated ones for search, and SEED_TICKETS tickets
+    (two pages) for the user session.
+    """
+    rng = random.Random(7)
+    first = ['Priya', 'John', 'Mei', 'Liam', 'Ava', 'Noah', 'Olivia', 'Lucas', 'Zara', 'Omar', 'Sofia', 'Ethan']
+    last = ['Smith', 'Patel', 'Nguyen', 'Brown', 'Wilson', 'Taylor', 'Khan', 'Garcia', 'Martin', 'Lee', 'Walker']
+    employees = {
+        'JS817_669_677': {'employeeID': 'JS817_669_677', 'name': 'John Smith', 'email': 'john.smith@company.com',
+                          'phone': '0400 123 456', 'dateOfBirth': '1990-04-12', 'password': 'JS4821',
+                          'taxFileNumber': '123-456-789', 'role': 'Entry Level'},
+        'AD100_200_300': {'employeeID': 'AD100_200_300', 'name': 'Alice Doyle', 'email': 'alice.doyle@company.com',
+                          'phone': '0400 987 654', 'dateOfBirth': '1985-11-02', 'password': 'AD7310',
+                          'taxFileNumber': '987-654-321', 'role': 'Admin'},
+    }
+    for _ in range(SEED_EMPLOYEES):
+        name = f"{rng.choice(first)} {rng.choice(last)}"
+        employee_id = f"{name[0]}{name.split()[1][0]}{rng.randint(100, 999)}_{rng.randint(100, 999)}_{rng.randint(100, 999)}"
+        employees[employee_id] = {
+            'employeeID': employee_id, 'name': name, 'email': f"{name.lower().replace(' ', '.')}{rng.randint(1, 99)}@company.com",
+            'phone': f"04{rng.randint(10, 99)} {rng.randint(100, 999)} {rng.randint(100, 999)}", 'dateOfBirth': '1990-01-01',
+            'password': 'x', 'taxFileNumber': '000-000-000', 'role': rng.choice(['Entry Level', 'Senior Level', 'Admin']),
+        }
+    db.load('Employees', employees)
+    tickets = {}
+    for day in range(1, SEED_TICKETS + 1):
+        ref_code = f"JS817_669_677-2025_09_{day:02d}-0900"
+        tickets[ref_code] = {
+            'name': 'John Smith', 'employeeID': 'JS817_669_677', 'problemDescription': f"Seeded issue number {day}",
+            'issueLevel': 'L3', 'progressReport': 'Unassigned', 'priority': 'low',
+            'createdAt': datetime(2025, 9, day, 9, 0, tzinfo=timezone.utc), 'updatedAt': 'N/A',
+            'contact_info': {'email': 'john.smith@company.com', 'phone': '0400 123 456'}, 'referenceCode': ref_code,
+        }
+    db.load('Tickets', tickets)
+
+
+def load_commands(path: str) -> list:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def new_session(role: str) -> TechSession:
+    return TechSession(employee_id=SESSIONS[role], role=role, authenticated=True, in_session=True)
+
+
+def run_pass(commands: list, clock: StageClock, sessions: dict) -> list:
+    """
+    Run every command once. Returns [{stage: seconds}] in command order.
+    """
+    timings = []
+    for row in commands:
+        clock.start()
+        backend.handle_command(row['command'], session=sessions[row.get('role', 'user')])
+        timings.append(clock.finish())
+    return timings
+
+
+def percentiles(values: list) -> dict:
+    values = sorted(values)
+    cuts = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98], 'mean': statistics.mean(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="JSON lines of {role, command, intent}")
+    parser.add_argument('--repeat', type=int, default=3, help="measured passes over the corpus")
+    parser.add_argument('--warmup', type=int, default=1, help="unmeasured passes first (classifier training, caches)")
+    parser.add_argument('--llm-latency', type=float, default=0.3, help="stub seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=150.0, help="stub completion token rate")
+    parser.add_argument('--firestore-latency', type=float, default=0.02, help="seconds per Firestore RPC")
+    parser.add_argument('--responses', help="recorded stub responses, JSON lines of {\"match\", \"response\"}")
+    parser.add_argument('--cache', action='store_true', help="use an in-memory LLM response cache")
+    parser.add_argument('--json', help="also write the full report to this file")
+    parser.add_argument('--verbose', action='store_true', help="keep the backend's own debug prints")
+    args = parser.parse_args()
+
+    commands = load_commands(args.corpus)
+    stub = StubLLMServer(latency=args.llm_latency, tokens_per_second=args.tokens_per_second,
+                         responses=load_responses(args.responses) if args.responses else None,
+                         intents=load_intents(args.corpus)).start()
+    clock = StageClock()
+    db = MemoryFirestore(latency=args.firestore_latency, on_op=lambda op, collection, seconds: clock.add('firestore', seconds))
+    seed(db)
+    backend._db = db
+    backend.TICKET_SEARCH_INDEX_PATH = None  # index the seeded tickets, never a saved index
+    backend.NVIDIA_BASE_URL = stub.url
+    backend.NVIDIA_API_KEY = 'stub'
+    backend.set_llm_cache(LLMResponseCache(path=None) if args.cache else _NoCache())
+    instrument(clock)
+
+    sessions = {role: new_session(role) for role in SESSIONS}
+    quiet = contextlib.nullcontext if args.verbose else lambda: contextlib.redirect_stdout(io.StringIO())
+    print(f"Warming up ({args.warmup} pass(es) of {len(commands)} commands) ...", file=sys.stderr)
+    for _ in range(args.warmup):
+        with quiet():
+            run_pass(commands, clock, sessions)
+    backend.llm_metrics.reset()
+    db.ops.clear()
+
+    print(f"Measuring {args.repeat} pass(es) ...", file=sys.stderr)
+    timings = []
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        with quiet():
+            timings += run_pass(commands, clock, sessions)
+    elapsed = time.perf_counter() - started
+    stub.stop()
+
+    report = {
+        'commands': len(timings),
+        'throughput': len(timings) / elapsed,
+        'settings': {'llm_latency': args.llm_latency, 'tokens_per_second': args.tokens_per_second,
+                     'firestore_latency': args.firestore_latency, 'cache': args.cache},
+        'stages': {stage: percentiles([t[stage] for t in timings]) for stage in STAGES},
+        'llm': backend.llm_metrics.summary(),
+        'firestore_ops': {f"{op} {collection}": n for (op, collection), n in sorted(db.ops.items())},
+        'stub_replies': dict(stub.calls),
+    }
+
+    print(f"\n{report['commands']} commands in {elapsed:.2f}s: {report['throughput']:.2f} commands/s "
+          f"(LLM {args.llm_latency}s + {args.tokens_per_second:g} tok/s, Firestore {args.firestore_latency}s/RPC)\n")
+    print(f"{'stage (ms)':<12}" + ''.join(f"{c:>10}" for c in ('p50', 'p95', 'p99', 'mean')))
+    for stage, row in report['stages'].items():
+        print(f"{stage:<12}" + ''.join(f"{row[c] * 1000:>10.1f}" for c in ('p50', 'p95', 'p99', 'mean')))
+    print(f"\n{'LLM call site':<14}{'calls':>7}{'p50 (s)':>10}{'p95 (s)':>10}")
+    for site, row in report['llm'].items():
+        print(f"{site:<14}{row['calls']:>7}{row['p50'] or 0:>10.2f}{row['p95'] or 0:>10.2f}")
+    print("\nFirestore RPCs: " + ', '.join(f"{key}={n}" for key, n in report['firestore_ops'].items()))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Import-time report for the chatbot modules (python -X importtime, aggregated).
+
+Run from the repository root:
+    python benchmarks/importTime.py                       # firebaseTests.firebaseFullV10
+    python benchmarks/importTime.py firebaseTests.firebaseFullV10UI --runs 5 --top 25
+
+Each run imports the module in a fresh interpreter, so the numbers are cold-start costs.
+The report lists the slowest top-level packages (median over runs) and flags
+the heavy client libraries that should only be imported on first use.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+HEAVY_PACKAGES = ('openai', 'httpx', 'firebase_admin', 'google', 'grpc', 'langchain_core', 'numpy', 'streamlit')
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)$")
+
+
+def measure(module: str) -> dict:
+    """
+    Import module in a fresh interpreter with -X importtime.
+    Returns {top-level package: microseconds} plus '__total__'. Each module's self time is
+    charged to its own top-level package, so e.g. openai's cost shows up as openai even when
+    it is pulled in by firebaseTests.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"importing {module} failed:\n" + "\n".join(tail[-10:]))
+    packages = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            packages[match.group(3).split('.')[0]] += int(match.group(1))
+    packages['__total__'] = sum(packages.values())
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('module', nargs='?', default='firebaseTests.firebaseFullV10')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    names = set().union(*runs)
+    medians = {name: statistics.median(run.get(name, 0) for run in runs) for name in names}
+    total = medians.pop('__total__')
+
+    print(f"Import time for {args.module} (median of {args.runs} cold runs): {total / 1000:.1f} ms")
+    print(f"{'package':<28}{'ms':>14}{'share':>8}")
+    for name, micros in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<28}{micros / 1000:>14.1f}{micros / total:>8.1%}")
+    eager = [name for name in HEAVY_PACKAGES if medians.get(name)]
+    print("Heavy packages imported eagerly: " + (", ".join(eager) if eager else "none"))
+
+
+if __name__ == '__main__':
+    main()
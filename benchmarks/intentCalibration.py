@@ -0,0 +1,80 @@
+"""
+Calibrate the local intent classifier's softmax temperature and confidence threshold.
+
+Trains the classifier the way the backend does (intent prompt few-shot examples plus the intent
+corpus) at each candidate temperature, then runs the held-out phrasings (phrasings that are in
+neither training set) through classify_intent_locally, the same gate production uses, and reports
+for each threshold:
+
+    answered   share of held-out requests answered locally (no LLM call)
+    wrong      requests answered locally with a different tool than their label
+    precision  share of the local answers that are correct
+
+Pick the most coverage with no wrong answers. Run from the repository root (no services needed):
+
+    python benchmarks/intentCalibration.py
+    python benchmarks/intentCalibration.py --temperatures 0.05 0.1 0.2 --thresholds 0.5 0.75 0.9
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from firebaseTests import firebaseFullV10 as backend  # noqa: E402
+from firebaseTests.intentClassifier import load_corpus  # noqa: E402
+from firebaseTests.techSession import TechSession  # noqa: E402
+
+
+def evaluate(temperature: float, threshold: float, texts: list, labels: list, session: dict) -> dict:
+    """
+    Local answers for the held-out texts at one temperature/threshold, as counts and rates.
+    """
+    saved = backend._intent_classifier, backend.INTENT_CLASSIFIER_TEMPERATURE, backend.INTENT_CLASSIFIER_THRESHOLD
+    backend._intent_classifier = None
+    backend.INTENT_CLASSIFIER_TEMPERATURE, backend.INTENT_CLASSIFIER_THRESHOLD = temperature, threshold
+    try:
+        answered = wrong = 0
+        errors = []
+        for text, label in zip(texts, labels):
+            result = backend.classify_intent_locally(text, session=session)
+            if result is None:
+                continue
+            answered += 1
+            if result[0]['tool'] != label:
+                wrong += 1
+                errors.append((text, label, result[0]['tool']))
+    finally:
+        backend._intent_classifier, backend.INTENT_CLASSIFIER_TEMPERATURE, backend.INTENT_CLASSIFIER_THRESHOLD = saved
+    return {
+        'answered': answered / len(texts) if texts else 0.0,
+        'wrong': wrong,
+        'precision': (answered - wrong) / answered if answered else 1.0,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--heldout', default=backend.INTENT_HELDOUT_PATH)
+    parser.add_argument('--temperatures', type=float, nargs='+', default=[0.02, 0.05, 0.1, 0.2, 0.3])
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.3, 0.4, 0.5, 0.6, 0.75, 0.9])
+    parser.add_argument('--errors', action='store_true', help="list the wrong local answers")
+    args = parser.parse_args()
+
+    texts, labels = load_corpus(args.heldout)
+    session = TechSession(employee_id='JS817_669_677', role='user')
+    print(f"{len(texts)} held-out requests; current setting: temperature {backend.INTENT_CLASSIFIER_TEMPERATURE}, "
+          f"threshold {backend.INTENT_CLASSIFIER_THRESHOLD}\n")
+    print(f"{'temperature':>12}{'threshold':>12}{'answered':>12}{'wrong':>8}{'precision':>12}")
+    for temperature in args.temperatures:
+        for threshold in args.thresholds:
+            row = evaluate(temperature, threshold, texts, labels, session)
+            print(f"{temperature:>12}{threshold:>12}{row['answered']:>12.2f}{row['wrong']:>8}{row['precision']:>12.2f}")
+            if args.errors:
+                for text, label, tool in row['errors']:
+                    print(f"{'':>12}  {text!r}: {tool} (expected {label})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""
+In-memory stand-in for the Firestore client, for offline benchmarks.
+
+Implements the part of the google.cloud.firestore client API this project uses:
+
+    client.collection(name) / .batch() / .write_option(exists=True | last_update_time=...)
+    collection.document(id) / .where(field, op, value) or .where(filter=FieldFilter | Or | And)
+    query.order_by (a field or '__name__') / .select / .limit / .offset / .start_after / .stream / .get / .on_snapshot
+    document.get (snapshots carry update_time) / .set(merge=) / .update(option=) / .delete(option=)
+    batch.set / .update / .delete / .commit (atomic)
+
+Every RPC sleeps `latency` seconds to model the network round trip and reports
+(op, collection, seconds) to `on_op`, so a benchmark can attribute time to Firestore.
+Missing documents raise google.api_core's NotFound and a stale last_update_time precondition
+raises FailedPrecondition, like the real client.
+Inject it with firebaseFullV10._db = MemoryFirestore().
+"""
+import copy
+import enum
+import threading
+import time
+from collections import Counter
+
+from google.api_core.exceptions import FailedPrecondition, NotFound
+
+
+class ChangeType(enum.Enum):
+    ADDED = 1
+    MODIFIED = 2
+    REMOVED = 3
+
+
+class DocumentChange:
+    def __init__(self, type, document):
+        self.type = type
+        self.document = document
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path):
+        value = self._data
+        for part in field_path.split('.'):
+            value = value[part]
+        return value
+
+
+class DocumentReference:
+    def __init__(self, client, collection, doc_id):
+        self._client = client
+        self.collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection}/{self.id}"
+
+    def get(self, field_paths=None):
+        with self._client._rpc('get', self.collection):
+            data, update_time = self._client._read(self.collection, self.id, with_update_time=True)
+        if data is not None and field_paths is not None:
+            data = {f: data[f] for f in field_paths if f in data}
+        return DocumentSnapshot(self, data, update_time)
+
+    def set(self, document_data, merge=False):
+        with self._client._rpc('set', self.collection):
+            self._client._apply([('set', self, document_data, merge)])
+
+    def update(self, field_updates, option=None):
+        with self._client._rpc('update', self.collection):
+            self._client._apply([('update', self, field_updates, option)])
+
+    def delete(self, option=None):
+        with self._client._rpc('delete', self.collection):
+            self._client._apply([('delete', self, None, option)])
+
+
+def _field(data, field_path):
+    value = data
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+_MISSING = object()
+
+
+def _row_field(row, field_path):
+    # '__name__' orders by document ID, like FieldPath.document_id()
+    doc_id, data = row
+    return doc_id if field_path == '__name__' else _field(data, field_path)
+
+_OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'in': lambda a, b: a in b,
+    'not-in': lambda a, b: a not in b,
+    'array_contains': lambda a, b: isinstance(a, list) and b in a,
+    'array_contains_any': lambda a, b: isinstance(a, list) and any(v in a for v in b),
+}
+_OPERATORS['array-contains'] = _OPERATORS['array_contains']
+_OPERATORS['array-contains-any'] = _OPERATORS['array_contains_any']
+
+
+def _matches(data, condition) -> bool:
+    """
+    condition is (field, op, value) or a composite filter object (Or / And with .filters).
+    """
+    if isinstance(condition, tuple):
+        field_path, op, value = condition
+        actual = _field(data, field_path)
+        if actual is _MISSING:
+            return False
+        try:
+            return _OPERATORS[op](actual, value)
+        except TypeError:
+            return False
+    if hasattr(condition, 'filters'):
+        results = (_matches(data, f) for f in condition.filters)
+        is_or = type(condition).__name__ == 'Or' or str(getattr(condition, 'operator', '')).upper().endswith('OR')
+        return any(results) if is_or else all(results)
+    return _matches(data, (condition.field_path, condition.op_string, condition.value))
+
+
+def _sort_key(value):
+    # Firestore orders values by type first; enough of that ordering for mixed fields
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if hasattr(value, 'timestamp'):
+        return (3, value.timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    return (5, str(value))
+
+
+class Query:
+    ASCENDING = 'ASCENDING'
+    DESCENDING = 'DESCENDING'
+
+    def __init__(self, client, collection, filters=(), orders=(), limit=None, offset=0, start_after=None, fields=None):
+        self._client = client
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._offset = offset
+        self._start_after = start_after
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit, offset=self._offset,
+                     start_after=self._start_after, fields=self._fields)
+        state.update(changes)
+        return Query(self._client, self._collection, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        condition = filter if filter is not None else (field_path, op_string, value)
+        return self._copy(filters=self._filters + (condition,))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip):
+        return self._copy(offset=num_to_skip)
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start_after=document_fields_or_snapshot)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def _run(self):
+        rows = [(doc_id, data) for doc_id, data in self._client._scan(self._collection)
+                if all(_matches(data, c) for c in self._filters)]
+        rows.sort(key=lambda row: row[0])
+        for field_path, direction in reversed(self._orders):
+            rows = [row for row in rows if _row_field(row, field_path) is not _MISSING]
+            rows.sort(key=lambda row: _sort_key(_row_field(row, field_path)), reverse=direction == self.DESCENDING)
+        if self._start_after is not None:
+            cursor_id = getattr(self._start_after, 'id', None)
+            ids = [doc_id for doc_id, _ in rows]
+            if cursor_id in ids:
+                rows = rows[ids.index(cursor_id) + 1:]
+            elif self._orders:
+                values = self._start_after if isinstance(self._start_after, dict) else self._start_after.to_dict()
+                field_path, direction = self._orders[0]
+                bound = _sort_key(_row_field((cursor_id, values), field_path))
+                after = (lambda v: v < bound) if direction == self.DESCENDING else (lambda v: v > bound)
+                rows = [row for row in rows if after(_sort_key(_row_field(row, field_path)))]
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        snapshots = []
+        for doc_id, data in rows:
+            if self._fields is not None:
+                data = {f: data[f] for f in self._fields if f in data}
+            snapshots.append(DocumentSnapshot(DocumentReference(self._client, self._collection, doc_id), data))
+        return snapshots
+
+    def stream(self, transaction=None):
+        with self._client._rpc('query', self._collection):
+            snapshots = self._run()
+        yield from snapshots
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+    def on_snapshot(self, callback):
+        """
+        Call callback(docs, changes, read_time) now with the full result, then after every
+        write to the collection. Returns a watch with unsubscribe().
+        """
+        return self._client._watch(self, callback)
+
+
+class CollectionReference(Query):
+    def __init__(self, client, collection):
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, self._collection, document_id or f"auto{next(self._client._auto_ids)}")
+
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference, document_data, merge))
+
+    def update(self, reference, field_updates, option=None):
+        self._writes.append(('update', reference, field_updates, option))
+
+    def delete(self, reference, option=None):
+        self._writes.append(('delete', reference, None, option))
+
+    def commit(self):
+        collection = self._writes[0][1].collection if self._writes else ''
+        with self._client._rpc('commit', collection):
+            self._client._apply(self._writes)
+        self._writes = []
+
+
+class _Watch:
+    def __init__(self, client, query, callback):
+        self._client = client
+        self.query = query
+        self.callback = callback
+        self.docs = {}  # doc ID -> data in the last snapshot sent
+
+    def unsubscribe(self):
+        with self._client._lock:
+            if self in self._client._watches:
+                self._client._watches.remove(self)
+
+
+class MemoryFirestore:
+    """
+    Firestore client stand-in. `ops` counts RPCs by (op, collection).
+    """
+
+    def __init__(self, latency: float = 0.0, on_op=None):
+        self.latency = latency
+        self.on_op = on_op
+        self.ops = Counter()
+        self._collections = {}
+        self._watches = []
+        self._update_times = {}  # (collection, doc_id) -> write counter of the last change
+        self._write_clock = 0
+        self._lock = threading.RLock()
+        self._auto_ids = iter(range(1, 10 ** 12))
+
+    def collection(self, collection_id):
+        return CollectionReference(self, collection_id)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def write_option(self, exists=None, last_update_time=None, **kwargs):
+        return {'exists': exists, 'last_update_time': last_update_time}
+
+    def load(self, collection_id: str, documents: dict) -> None:
+        """
+        Seed a collection with {doc_id: data} without counting RPCs.
+        """
+        with self._lock:
+            self._collections.setdefault(collection_id, {}).update(copy.deepcopy(documents))
+            for doc_id in documents:
+                self._write_clock += 1
+                self._update_times[(collection_id, doc_id)] = self._write_clock
+
+    # --- internals ---
+    def _rpc(self, op, collection):
+        client = self
+
+        class _Timer:
+            def __enter__(self):
+                self.started = time.perf_counter()
+                if client.latency:
+                    time.sleep(client.latency)
+
+            def __exit__(self, *exc):
+                seconds = time.perf_counter() - self.started
+                with client._lock:
+                    client.ops[(op, collection)] += 1
+                if client.on_op is not None:
+                    client.on_op(op, collection, seconds)
+                return False
+
+        return _Timer()
+
+    def _read(self, collection, doc_id, with_update_time=False):
+        with self._lock:
+            data = copy.deepcopy(self._collections.get(collection, {}).get(doc_id))
+            if with_update_time:
+                return data, self._update_times.get((collection, doc_id))
+            return data
+
+    def _scan(self, collection):
+        with self._lock:
+            return [(doc_id, copy.deepcopy(data)) for doc_id, data in self._collections.get(collection, {}).items()]
+
+    def _apply(self, writes):
+        """
+        Apply writes atomically: every precondition is checked before anything changes.
+        """
+        with self._lock:
+            for op, ref, _, option in writes:
+                exists = ref.id in self._collections.get(ref.collection, {})
+                must_exist = op == 'update' or (op == 'delete' and (option or {}).get('exists'))
+                if must_exist and not exists:
+                    raise NotFound(f"No document to {op}: {ref.path}")
+                last_update_time = (option or {}).get('last_update_time') if op != 'set' else None
+                if last_update_time is not None and self._update_times.get((ref.collection, ref.id)) != last_update_time:
+                    raise FailedPrecondition(f"{ref.path} changed since {last_update_time}")
+            touched = set()
+            for op, ref, data, merge in writes:
+                docs = self._collections.setdefault(ref.collection, {})
+                self._write_clock += 1
+                self._update_times[(ref.collection, ref.id)] = self._write_clock
+                if op == 'delete':
+                    docs.pop(ref.id, None)
+                elif op == 'update' or merge:
+                    docs.setdefault(ref.id, {}).update(copy.deepcopy(data))
+                else:
+                    docs[ref.id] = copy.deepcopy(data)
+                touched.add(ref.collection)
+            watches = [w for w in self._watches if w.query._collection in touched]
+        for watch in watches:
+            self._notify(watch)
+
+    def _watch(self, query, callback):
+        watch = _Watch(self, query, callback)
+        with self._lock:
+            self._watches.append(watch)
+        self._notify(watch)
+        return watch
+
+    def _notify(self, watch):
+        with self._lock:
+            docs = watch.query._run()
+            current = {doc.id: doc.to_dict() for doc in docs}
+            # Like Firestore, only documents that were added, changed or removed are reported
+            changes = [DocumentChange(ChangeType.ADDED if doc.id not in watch.docs else ChangeType.MODIFIED, doc)
+                       for doc in docs if watch.docs.get(doc.id) != current[doc.id]]
+            changes += [DocumentChange(ChangeType.REMOVED, DocumentSnapshot(DocumentReference(self, watch.query._collection, doc_id), None))
+                        for doc_id in watch.docs.keys() - current.keys()]
+            watch.docs = current
+        watch.callback(docs, changes, time.time())
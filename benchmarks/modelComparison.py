@@ -0,0 +1,173 @@
+"""
+Latency/quality comparison of candidate models for one LLM call site.
+
+Runs the call site's real prompt through each model (by overriding its MODEL_ROUTES entry, the
+same switch production uses) and reports latency percentiles, failures and a quality score:
+
+    severity  agreement of (issue level, priority) with the reference model, and level within one step
+    intent    accuracy of the first selected tool against the labelled intent corpus
+    advice    latency and answer length only (no automatic quality score)
+
+The reference model is the call site's current route. Run from the repository root with
+NVIDIA_API_KEY configured:
+
+    python benchmarks/modelComparison.py severity meta/llama-3.1-8b-instruct --limit 40
+    python benchmarks/modelComparison.py intent qwen/qwen3-next-80b-a3b-thinking --json intent.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from itertools import zip_longest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from firebaseTests import firebaseFullV10 as backend  # noqa: E402
+from firebaseTests.intentClassifier import load_corpus  # noqa: E402
+from firebaseTests.llmResilience import LLMError  # noqa: E402
+
+
+class _NoCache:
+    """Response cache stand-in so every call reaches the model."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def _issue_descriptions(limit):
+    texts, labels = load_corpus(backend.INTENT_CORPUS_PATH)
+    return [t for t, label in zip(texts, labels) if label == 'provide_tech_support_advice'][:limit]
+
+
+def _intent_examples(limit):
+    # Interleave the labels so a small --limit still covers every tool
+    texts, labels = load_corpus(backend.INTENT_CORPUS_PATH)
+    by_label = {}
+    for text, label in zip(texts, labels):
+        by_label.setdefault(label, []).append((text, label))
+    interleaved = [row for group in zip_longest(*by_label.values()) for row in group if row is not None]
+    return interleaved[:limit]
+
+
+def _run_severity(text):
+    return backend.analyze_issue_severity(text, strict=True)
+
+
+def _run_intent(text):
+    session = {'employee_id': 'JS817_669_677', 'role': 'user'}
+    raw = backend.process_prompt_for_tool_call(text, 'user', tech_session=session)
+    parsed = json.loads(raw.strip())
+    parsed = parsed if isinstance(parsed, list) else [parsed]
+    return parsed[0].get('tool') if parsed else None
+
+
+def _run_advice(text):
+    return backend.provide_tech_support_advice(text)
+
+
+TASKS = {
+    # call site -> (runner, inputs(limit) -> [(text, expected or None)])
+    'severity': (_run_severity, lambda limit: [(t, None) for t in _issue_descriptions(limit)]),
+    'intent': (_run_intent, _intent_examples),
+    'advice': (_run_advice, lambda limit: [(t, None) for t in _issue_descriptions(min(limit, 5))]),
+}
+
+
+def run_model(call_site, model, inputs):
+    """
+    Run every input through call_site routed to model. Returns [(output or None, seconds, error)].
+    """
+    runner = TASKS[call_site][0]
+    original = backend.MODEL_ROUTES.get(call_site)
+    backend.MODEL_ROUTES[call_site] = {**(original or {}), 'model': model}
+    results = []
+    try:
+        for text, _ in inputs:
+            start = time.perf_counter()
+            try:
+                output, error = runner(text), None
+            except (LLMError, ValueError) as e:
+                output, error = None, f"{type(e).__name__}: {e}"
+            results.append((output, time.perf_counter() - start, error))
+    finally:
+        if original is None:
+            backend.MODEL_ROUTES.pop(call_site, None)
+        else:
+            backend.MODEL_ROUTES[call_site] = original
+    return results
+
+
+def score(call_site, inputs, results, reference):
+    """
+    Quality columns for one model's results (reference: the reference model's results).
+    """
+    if call_site == 'intent':
+        correct = sum(1 for (_, expected), (tool, _, _) in zip(inputs, results) if tool == expected)
+        return {'accuracy': correct / len(inputs)}
+    if call_site == 'severity':
+        pairs = [(out, ref) for (out, _, _), (ref, _, _) in zip(results, reference) if out and ref]
+        if not pairs:
+            return {'agreement': None, 'level_within_one': None}
+        agree = sum(1 for out, ref in pairs if out == ref)
+        near = sum(1 for out, ref in pairs if abs(int(out[0][1]) - int(ref[0][1])) <= 1)
+        return {'agreement': agree / len(pairs), 'level_within_one': near / len(pairs)}
+    lengths = [len(out) for out, _, _ in results if out]
+    return {'avg_chars': statistics.mean(lengths) if lengths else None}
+
+
+def summarize(results):
+    latencies = sorted(seconds for _, seconds, error in results if error is None)
+    row = {'calls': len(results), 'errors': sum(1 for _, _, error in results if error)}
+    if latencies:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+        row.update(p50=cuts[49], p95=cuts[94], mean=statistics.mean(latencies))
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('call_site', choices=sorted(TASKS))
+    parser.add_argument('models', nargs='+', help="candidate models to compare with the current route")
+    parser.add_argument('--limit', type=int, default=30, help="maximum number of inputs")
+    parser.add_argument('--json', help="also write the full report to this file")
+    args = parser.parse_args()
+
+    backend.set_llm_cache(_NoCache())
+    reference_model = backend.resolve_model_route(args.call_site)['model']
+    inputs = TASKS[args.call_site][1](args.limit)
+    models = [reference_model] + [m for m in args.models if m != reference_model]
+
+    runs = {}
+    for model in models:
+        print(f"Running {len(inputs)} {args.call_site} calls on {model} ...", file=sys.stderr)
+        runs[model] = run_model(args.call_site, model, inputs)
+
+    report = {}
+    for model in models:
+        row = summarize(runs[model])
+        row.update(score(args.call_site, inputs, runs[model], runs[reference_model]))
+        report[model] = row
+
+    print(f"\n{args.call_site}: {len(inputs)} inputs, reference model {reference_model}\n")
+    columns = sorted({key for row in report.values() for key in row} - {'calls'})
+    print(f"{'model':<45}" + ''.join(f"{c:>18}" for c in columns))
+    for model, row in report.items():
+        cells = ''.join(
+            f"{row[c]:>18.3f}" if isinstance(row.get(c), float) else f"{str(row.get(c, '-')):>18}" for c in columns
+        )
+        print(f"{model:<45}{cells}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'call_site': args.call_site, 'reference': reference_model, 'models': report}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
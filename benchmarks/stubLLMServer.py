@@ -0,0 +1,251 @@
+"""
+Local OpenAI-compatible chat completions server for offline benchmarks.
+
+Answers POST /v1/chat/completions (plain and stream=True, with the usage chunk when
+stream_options.include_usage is set) after a simulated delay: `latency` seconds before the first
+token, then `tokens_per_second` for the completion. Replies come from, in order:
+
+    responses   recorded or hand-written rules, JSON lines {"match": regex, "response": text},
+                searched against the last user message (first match wins)
+    intents     the corpus' labelled intents, keyed by the command in the intent prompt's
+                'User request: "..."' line
+    canned      built-in answers per call site (severity, bulk triage, advice, missing argument, chat)
+
+Use it from a benchmark (StubLLMServer(...).start() and point NVIDIA_BASE_URL at .url) or
+standalone from the repository root:
+
+    python benchmarks/stubLLMServer.py --port 8001 --latency 0.4 --tokens-per-second 80
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from firebaseTests.promptTokens import count_tokens  # noqa: E402
+
+STREAM_CHUNK_TOKENS = 4
+USER_REQUEST = re.compile(r'^User request: "(.*)"\s*$', re.M | re.S)
+
+CANNED_ADVICE = """### Troubleshooting steps
+
+1. **Restart the device.** A full restart clears most stuck processes and driver states.
+2. **Check for updates.** Install pending operating system and application updates, then restart again.
+3. **Check the connection.** Confirm cables, Wi-Fi and VPN are connected and other sites or apps respond.
+4. **Clear cached data.** Sign out, clear the application's cache and sign back in.
+5. **Try another account or device.** This tells you whether the problem follows the user or the machine.
+
+If none of these help, create a support ticket with the exact error message and when it started."""
+
+
+
+def _bulk_triage_reply(prompt: str) -> str:
+    # One entry per packed ticket line ("T3: description"); the level varies with the description
+    tickets = re.findall(r'^T(\d+): (.*)$', prompt, re.M)
+    return json.dumps([{"id": f"T{n}", "level": f"L{1 + sum(map(ord, text)) % 4}", "priority": ("low", "medium", "high")[len(text) % 3]}
+                       for n, text in tickets])
+
+
+# (pattern searched in the whole prompt, reply or function of the prompt) - checked after recorded responses and intents
+CANNED_REPLIES = [
+    (re.compile(r'LEVEL:Lx,PRIORITY:xxx'), "LEVEL:L2,PRIORITY:medium"),
+    (re.compile(r'Tickets, one per line as'), _bulk_triage_reply),
+    (re.compile(r'REPORTED ISSUE:'), CANNED_ADVICE),
+    (re.compile(r'required arguments are missing'),
+     '{"status": "ask_again", "args": {}, "message": "Could you give me the details that are missing?"}'),
+    (re.compile(r'User request: "'), '[{"tool": "none", "args": {}, "missing_args": []}]'),
+]
+DEFAULT_REPLY = "I can help with tickets, employee lookups and troubleshooting questions."
+
+
+def load_responses(path: str) -> list:
+    """
+    Read {"match": regex, "response": text} rules from a JSON lines file.
+    """
+    rules = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                rules.append((re.compile(row['match'], re.S), row['response']))
+    return rules
+
+
+def load_intents(path: str) -> dict:
+    """
+    {command: intent JSON text} from a command corpus whose rows carry an "intent" list.
+    """
+    intents = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                if row.get('intent') is not None:
+                    intents[row['command']] = json.dumps(row['intent'])
+    return intents
+
+
+class StubLLMServer:
+    """
+    Threaded stub of the chat completions endpoint. `calls` counts requests per reply source.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, tokens_per_second: float = 0.0,
+                 responses: list = None, intents: dict = None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.responses = responses or []
+        self.intents = intents or {}
+        self.calls = {'responses': 0, 'intents': 0, 'canned': 0, 'default': 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reply(self, messages: list) -> str:
+        """
+        The completion text for a request's messages.
+        """
+        user = next((m.get('content') or '' for m in reversed(messages) if m.get('role') == 'user'), '')
+        prompt = '\n'.join(m.get('content') or '' for m in messages)
+        for pattern, response in self.responses:
+            if pattern.search(user):
+                return self._count('responses', response)
+        request = USER_REQUEST.search(user)
+        if request and request.group(1) in self.intents:
+            return self._count('intents', self.intents[request.group(1)])
+        for pattern, response in CANNED_REPLIES:
+            if pattern.search(prompt):
+                return self._count('canned', response(prompt) if callable(response) else response)
+        return self._count('default', DEFAULT_REPLY)
+
+    def _count(self, source: str, text: str) -> str:
+        with self._lock:
+            self.calls[source] += 1
+        return text
+
+    def generation_time(self, completion_tokens: int) -> float:
+        return completion_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                messages = body.get('messages') or []
+                text = stub.reply(messages)
+                usage = {
+                    'prompt_tokens': sum(count_tokens(m.get('content') or '') for m in messages),
+                    'completion_tokens': count_tokens(text),
+                }
+                usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+                model = body.get('model', 'stub')
+                time.sleep(stub.latency)
+                if body.get('stream'):
+                    include_usage = bool((body.get('stream_options') or {}).get('include_usage'))
+                    self._stream(model, text, usage if include_usage else None)
+                else:
+                    time.sleep(stub.generation_time(usage['completion_tokens']))
+                    self._json({
+                        'id': f"chatcmpl-{uuid.uuid4().hex}",
+                        'object': 'chat.completion',
+                        'created': int(time.time()),
+                        'model': model,
+                        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                        'usage': usage,
+                    })
+
+            def _json(self, payload):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, model, text, usage):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+                # Split into ~STREAM_CHUNK_TOKENS-token pieces (whitespace kept) paced at the token rate
+                words = re.findall(r'\S+\s*|\s+', text)
+                step = max(1, round(STREAM_CHUNK_TOKENS * 0.75))
+                pieces = [''.join(words[i:i + step]) for i in range(0, len(words), step)]
+                for piece in pieces:
+                    time.sleep(stub.generation_time(count_tokens(piece)))
+                    self._event({'id': chunk_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                                 'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]})
+                self._event({'id': chunk_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                             'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+                if usage is not None:
+                    self._event({'id': chunk_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                                 'choices': [], 'usage': usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help="completion token rate (0 = instant)")
+    parser.add_argument('--responses', help="JSON lines of {\"match\": regex, \"response\": text}")
+    parser.add_argument('--corpus', default=os.path.join(os.path.dirname(__file__), 'e2eCommands.jsonl'),
+                        help="command corpus whose labelled intents are replayed")
+    args = parser.parse_args()
+    server = StubLLMServer(args.host, args.port, args.latency, args.tokens_per_second,
+                           responses=load_responses(args.responses) if args.responses else None,
+                           intents=load_intents(args.corpus) if args.corpus and os.path.exists(args.corpus) else None)
+    print(f"Stub LLM endpoint on {server.url} (Ctrl+C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
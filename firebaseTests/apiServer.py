@@ -0,0 +1,468 @@
+"""
+Headless asyncio HTTP/WebSocket API for the tech support assistant (aiohttp, no Streamlit).
+
+    POST   /sessions                        {"employee_id"} -> {"session_id", "employee_id", "role"}
+    DELETE /sessions/{id}
+    POST   /sessions/{id}/chat              {"message", "stream": false} -> {"reply"}
+                                            with "stream": true, NDJSON events (see handle_command_events)
+    GET    /sessions/{id}/ws                WebSocket: send {"message"} (or plain text), receive the
+                                            events as JSON frames, then {"type": "done"}
+    GET    /sessions/{id}/tickets           {"markdown", "ticket_map", "has_more"}; ?page=next for the
+                                            next page, ?employee_id= (admin) for someone else's tickets
+    POST   /sessions/{id}/tools/{tool}      {"args": {...}} -> {"result"}
+    GET    /healthz, GET /metrics           liveness; Prometheus text (LLM metrics, fast-path routing, server gauges)
+
+Each API session owns a TechSession, so concurrent users never share state. Chat turns and tool
+calls run the synchronous backend in a bounded thread pool:
+
+- at most API_MAX_CONCURRENT_TURNS run at once, one at a time per session;
+- up to API_MAX_QUEUED more wait, for a slot or for their session's previous turn; beyond that
+  requests get 503 with Retry-After;
+- streamed events pass through a queue of API_STREAM_BUFFER events, so a slow client slows its
+  own turn down instead of buffering the whole reply in memory.
+
+Sessions are authenticated by employee ID only, like the Streamlit UI: the server binds to
+127.0.0.1 by default and should not be exposed beyond a trusted network as is.
+
+Run from the repository root:
+
+    python -m firebaseTests.apiServer --port 8080
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from aiohttp import WSMsgType, web
+
+import firebaseTests.firebaseFullV10 as backend
+from firebaseTests.llmResilience import LLMError
+from firebaseTests.techSession import TechSession, use_session
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8080"))
+API_MAX_CONCURRENT_TURNS = int(os.getenv("API_MAX_CONCURRENT_TURNS", "8"))
+API_MAX_QUEUED = int(os.getenv("API_MAX_QUEUED", "32"))
+API_STREAM_BUFFER = 16  # events buffered per streamed turn before the backend waits for the client
+API_SESSION_TTL = int(os.getenv("API_SESSION_TTL", "1800"))  # seconds without a request before a session is dropped
+API_RETRY_AFTER = 1  # seconds, suggested to clients turned away with 503
+API_MAX_MESSAGE_LENGTH = 4000  # characters per chat message
+
+# Tools exposed by POST /sessions/{id}/tools/{tool}. Regular users get USER_TOOLS, limited to their
+# own employee ID and tickets and to the arguments listed here (the rules the intent prompt gives the
+# LLM: no priority, level or status of their own choosing); admins get ADMIN_TOOLS with any arguments.
+USER_TOOL_ARGS = {
+    'show_tickets': {'employee_id'},
+    'show_more_tickets': set(),
+    'show_tickets_for_update': set(),
+    'show_employee_info': {'employee_id'},
+    'create_ticket': {'employee_id', 'description'},
+    'provide_tech_support_advice': {'issue_description'},
+    'update_ticket_description': {'ticket_id', 'new_description'},
+    'update_ticket_fields': {'ticket_id', 'new_description'},
+    'delete_ticket': {'ticket_id'},
+    'search_tickets': {'query', 'limit', 'status'},  # limits regular users to their own tickets itself
+}
+USER_TOOLS = set(USER_TOOL_ARGS)
+ADMIN_TOOLS = USER_TOOLS | set(backend.FIELD_UPDATES) | {
+    'update_employee_fields', 'delete_employee', 'show_employee', 'search_employees',
+}
+
+
+def _is_admin(session) -> bool:
+    return str(session.get('role') or '').lower() == 'admin'
+
+
+class SessionEntry:
+    def __init__(self, session_id: str, session: TechSession):
+        self.session_id = session_id
+        self.session = session
+        self.lock = asyncio.Lock()  # one turn at a time per session
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """
+    API session ID -> SessionEntry, dropping sessions idle for longer than ttl seconds.
+    """
+
+    def __init__(self, ttl: float = API_SESSION_TTL):
+        self.ttl = ttl
+        self._entries = {}
+
+    def create(self, session: TechSession) -> SessionEntry:
+        self.expire()
+        entry = SessionEntry(uuid.uuid4().hex, session)
+        self._entries[entry.session_id] = entry
+        return entry
+
+    def get(self, session_id: str) -> SessionEntry:
+        self.expire()
+        entry = self._entries.get(session_id)
+        if entry is None:
+            raise _error(web.HTTPNotFound, f"Unknown or expired session {session_id!r}.")
+        entry.last_used = time.monotonic()
+        return entry
+
+    def delete(self, session_id: str) -> bool:
+        return self._entries.pop(session_id, None) is not None
+
+    def expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        for session_id in [s for s, e in self._entries.items() if e.last_used < cutoff and not e.lock.locked()]:
+            del self._entries[session_id]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TurnLimiter:
+    """
+    Admission control for backend work: max_concurrent turns run, max_queued wait, the rest are
+    rejected with 503 straight away rather than piling up behind the thread pool.
+    """
+
+    def __init__(self, max_concurrent: int = API_MAX_CONCURRENT_TURNS, max_queued: int = API_MAX_QUEUED):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.counters = {'completed': 0, 'failed': 0, 'rejected': 0}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, lock: asyncio.Lock = None):
+        """
+        Hold a backend slot for the block, and lock too if given (a session's turn lock, taken
+        first so a session waiting on its own previous turn doesn't occupy a slot). Waiting for
+        either counts against max_queued.
+        """
+        if (self._semaphore.locked() or (lock is not None and lock.locked())) and self.waiting >= self.max_queued:
+            self.counters['rejected'] += 1
+            raise _error(web.HTTPServiceUnavailable, "Server busy, try again shortly.",
+                         headers={'Retry-After': str(API_RETRY_AFTER)})
+        self.waiting += 1
+        locked = False
+        try:
+            if lock is not None:
+                await lock.acquire()
+                locked = True
+            await self._semaphore.acquire()
+        except BaseException:
+            if locked:
+                lock.release()
+            raise
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+            self.counters['completed'] += 1
+        except BaseException:
+            self.counters['failed'] += 1
+            raise
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            if lock is not None:
+                lock.release()
+
+
+# Application state keys
+SESSIONS = web.AppKey('sessions', SessionStore)
+LIMITER = web.AppKey('limiter', TurnLimiter)
+EXECUTOR = web.AppKey('executor', concurrent.futures.ThreadPoolExecutor)
+
+
+def _error(error_class, message: str, headers: dict = None):
+    return error_class(text=json.dumps({'error': message}), content_type='application/json', headers=headers)
+
+
+def _in_session(session, func, *args, **kwargs):
+    """
+    Call func with session bound as the current session (runs in a worker thread).
+    """
+    with use_session(session):
+        return func(*args, **kwargs)
+
+
+async def _run_backend(request, entry: SessionEntry, func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(
+        request.app[EXECUTOR], lambda: _in_session(entry.session, func, *args, **kwargs))
+
+
+async def _turn_events(request, entry: SessionEntry, message: str, stream: bool):
+    """
+    Run one chat turn in the thread pool and yield its events as they are produced. The worker
+    blocks once API_STREAM_BUFFER events are waiting, and stops at the next event if the
+    consumer goes away.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=API_STREAM_BUFFER)
+    done = object()
+    abandoned = threading.Event()
+
+    def put(event) -> None:
+        if not abandoned.is_set():
+            asyncio.run_coroutine_threadsafe(queue.put(event), loop).result()
+
+    def produce() -> None:
+        events = backend.handle_command_events(message, entry.session, stream=stream)
+        try:
+            for event in events:
+                put(event)
+                if abandoned.is_set():
+                    break
+        except LLMError as e:
+            put({'type': 'error', 'text': backend.llm_error_message(e)})
+        except Exception as e:
+            logging.exception(f"Chat turn failed for session {entry.session_id}")
+            put({'type': 'error', 'text': f"Error handling your request: {e}"})
+        finally:
+            events.close()
+            put(done)
+
+    worker = loop.run_in_executor(request.app[EXECUTOR], produce)
+    try:
+        while True:
+            event = await queue.get()
+            if event is done:
+                break
+            yield event
+        await worker
+    finally:
+        if not worker.done():
+            # Consumer gone: unblock the worker and let it finish its current step
+            abandoned.set()
+            while not worker.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.wait({worker}, timeout=0.05)
+
+
+async def _json_body(request) -> dict:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise _error(web.HTTPBadRequest, "Request body must be JSON.")
+    if not isinstance(body, dict):
+        raise _error(web.HTTPBadRequest, "Request body must be a JSON object.")
+    return body
+
+
+def _chat_message(value) -> str:
+    message = value.strip() if isinstance(value, str) else ''
+    if not message:
+        raise _error(web.HTTPBadRequest, "'message' is required.")
+    if len(message) > API_MAX_MESSAGE_LENGTH:
+        raise _error(web.HTTPBadRequest, f"'message' is limited to {API_MAX_MESSAGE_LENGTH} characters.")
+    return message
+
+
+# --- Handlers ---
+async def create_session(request):
+    body = await _json_body(request)
+    employee_id = body.get('employee_id')
+    if not isinstance(employee_id, str) or not employee_id.strip():
+        raise _error(web.HTTPBadRequest, "'employee_id' is required.")
+    employee_id = employee_id.strip()
+    loop = asyncio.get_running_loop()
+    doc = await loop.run_in_executor(
+        request.app[EXECUTOR], lambda: backend.get_db().collection('Employees').document(employee_id).get())
+    if not doc.exists:
+        raise _error(web.HTTPNotFound, "Employee ID not found.")
+    role = (doc.to_dict() or {}).get('role', 'user')
+    entry = request.app[SESSIONS].create(
+        TechSession(employee_id=employee_id, role=role, authenticated=True, in_session=True))
+    return web.json_response({'session_id': entry.session_id, 'employee_id': employee_id, 'role': role}, status=201)
+
+
+async def delete_session(request):
+    if not request.app[SESSIONS].delete(request.match_info['session_id']):
+        raise _error(web.HTTPNotFound, "Unknown or expired session.")
+    return web.json_response({'deleted': True})
+
+
+async def chat(request):
+    entry = request.app[SESSIONS].get(request.match_info['session_id'])
+    body = await _json_body(request)
+    message = _chat_message(body.get('message'))
+    limiter = request.app[LIMITER]
+    async with limiter.slot(entry.lock):
+        if not body.get('stream'):
+            reply = await _run_backend(request, entry, backend.handle_command, message, entry.session)
+            return web.json_response({'reply': reply})
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+        async for event in _turn_events(request, entry, message, stream=True):
+            # write() waits for the socket to drain: this is where a slow client pushes back
+            await response.write((json.dumps(event, default=str) + '\n').encode('utf-8'))
+        await response.write_eof()
+        return response
+
+
+async def chat_websocket(request):
+    entry = request.app[SESSIONS].get(request.match_info['session_id'])
+    limiter = request.app[LIMITER]
+    ws = web.WebSocketResponse(heartbeat=30, max_msg_size=64 * 1024)
+    await ws.prepare(request)
+    async for frame in ws:
+        if frame.type != WSMsgType.TEXT:
+            continue
+        try:
+            data = json.loads(frame.data)
+            text = data.get('message') if isinstance(data, dict) else None
+        except json.JSONDecodeError:
+            text = frame.data
+        try:
+            message = _chat_message(text)
+            async with limiter.slot(entry.lock):
+                async for event in _turn_events(request, entry, message, stream=True):
+                    await ws.send_json(event, dumps=lambda o: json.dumps(o, default=str))
+        except web.HTTPException as e:
+            await ws.send_json({'type': 'error', 'text': json.loads(e.text)['error'], 'status': e.status})
+        if ws.closed:
+            break
+        await ws.send_json({'type': 'done'})
+    return ws
+
+
+async def list_tickets(request):
+    entry = request.app[SESSIONS].get(request.match_info['session_id'])
+    session = entry.session
+    employee_id = request.query.get('employee_id') or session['employee_id']
+    if employee_id != session['employee_id'] and not _is_admin(session):
+        raise _error(web.HTTPForbidden, "You do not have admin privileges for this action.")
+
+    def page() -> dict:
+        if request.query.get('page') == 'next':
+            markdown = backend.show_more_tickets()
+        else:
+            markdown = backend.show_tickets(employee_id)
+        return {'markdown': markdown, 'ticket_map': dict(session.get('last_ticket_map') or {}),
+                'has_more': backend.has_more_tickets()}
+
+    async with request.app[LIMITER].slot(entry.lock):
+        return web.json_response(await _run_backend(request, entry, page))
+
+
+def _check_tool_call(session, tool: str, args: dict) -> dict:
+    """
+    Validate a direct tool call against the session's role. Returns the arguments to call with
+    (employee_id defaults to the session's own); raises an HTTP error if the call is not allowed.
+    """
+    admin = _is_admin(session)
+    if tool not in (ADMIN_TOOLS if admin else USER_TOOLS):
+        if tool in ADMIN_TOOLS:
+            raise _error(web.HTTPForbidden, "You do not have admin privileges for this action.")
+        raise _error(web.HTTPNotFound, f"Unknown tool {tool!r}.")
+    if 'stream' in args:
+        raise _error(web.HTTPBadRequest, "Streaming is only available from the chat endpoints "
+                                         "(POST /sessions/{id}/chat with \"stream\": true, or the WebSocket).")
+    func = getattr(backend, tool)
+    parameters = inspect.signature(func).parameters
+    args = dict(args)
+    if 'employee_id' in parameters and 'employee_id' not in args and tool != 'update_employee_fields':
+        args['employee_id'] = session['employee_id']
+    try:
+        inspect.signature(func).bind(**args)
+    except TypeError as e:
+        raise _error(web.HTTPBadRequest, f"Invalid arguments for {tool}: {e}")
+    if not admin:
+        own_id = session['employee_id']
+        ticket_id = args.get('ticket_id')
+        if args.get('employee_id', own_id) != own_id or (ticket_id and not str(ticket_id).startswith(f"{own_id}-")):
+            raise _error(web.HTTPForbidden, "You do not have admin privileges for this action.")
+        not_allowed = set(args) - USER_TOOL_ARGS[tool]
+        if not_allowed:
+            raise _error(web.HTTPForbidden, f"{', '.join(sorted(not_allowed))} can only be set with admin privileges.")
+    return args
+
+
+async def call_tool(request):
+    entry = request.app[SESSIONS].get(request.match_info['session_id'])
+    tool = request.match_info['tool']
+    body = await _json_body(request) if request.can_read_body else {}
+    args = body.get('args') or {}
+    if not isinstance(args, dict):
+        raise _error(web.HTTPBadRequest, "'args' must be a JSON object.")
+    args = _check_tool_call(entry.session, tool, args)
+    async with request.app[LIMITER].slot(entry.lock):
+        result = await _run_backend(request, entry, backend.call_tool, tool, args)
+    return web.json_response({'tool': tool, 'result': result}, dumps=lambda o: json.dumps(o, default=str))
+
+
+async def healthz(request):
+    return web.json_response({'status': 'ok'})
+
+
+async def metrics(request):
+    limiter = request.app[LIMITER]
+    lines = [
+        "# HELP api_turns_active Chat turns and tool calls running in the backend.", "# TYPE api_turns_active gauge",
+        f"api_turns_active {limiter.active}",
+        "# HELP api_turns_waiting Requests waiting for a backend slot.", "# TYPE api_turns_waiting gauge",
+        f"api_turns_waiting {limiter.waiting}",
+        "# HELP api_turns_total Backend requests by outcome (rejected = turned away with 503).", "# TYPE api_turns_total counter",
+    ]
+    lines += [f'api_turns_total{{outcome="{outcome}"}} {n}' for outcome, n in sorted(limiter.counters.items())]
+    lines += ["# HELP api_sessions Open API sessions.", "# TYPE api_sessions gauge", f"api_sessions {len(request.app[SESSIONS])}"]
+    routes = backend.fast_path_stats()
+    hit_rate = routes.pop('hit_rate')
+    lines += ["# HELP intent_fast_path_total Requests matched by the fast-path intent router by route "
+              "(route:unresolved = matched but handed to the LLM, llm_fallback = not resolved locally).",
+              "# TYPE intent_fast_path_total counter"]
+    lines += [f'intent_fast_path_total{{route="{route}"}} {n}' for route, n in sorted(routes.items())]
+    lines += ["# HELP intent_fast_path_hit_rate Share of requests resolved by the fast-path router.",
+              "# TYPE intent_fast_path_hit_rate gauge", f"intent_fast_path_hit_rate {hit_rate}"]
+    text = backend.llm_metrics.export_prometheus() + '\n'.join(lines) + '\n'
+    return web.Response(text=text, content_type='text/plain', charset='utf-8')
+
+
+def create_app(max_concurrent: int = API_MAX_CONCURRENT_TURNS, max_queued: int = API_MAX_QUEUED,
+               session_ttl: float = API_SESSION_TTL) -> web.Application:
+    """
+    Build the aiohttp application. The thread pool has one worker per concurrent turn.
+    """
+    app = web.Application(client_max_size=256 * 1024)
+    app[SESSIONS] = SessionStore(session_ttl)
+    app[LIMITER] = TurnLimiter(max_concurrent, max_queued)
+    app[EXECUTOR] = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="api-turn")
+
+    async def shutdown_executor(app):
+        app[EXECUTOR].shutdown(wait=False, cancel_futures=True)
+
+    app.on_cleanup.append(shutdown_executor)
+    app.add_routes([
+        web.post('/sessions', create_session),
+        web.delete('/sessions/{session_id}', delete_session),
+        web.post('/sessions/{session_id}/chat', chat),
+        web.get('/sessions/{session_id}/ws', chat_websocket),
+        web.get('/sessions/{session_id}/tickets', list_tickets),
+        web.post('/sessions/{session_id}/tools/{tool}', call_tool),
+        web.get('/healthz', healthz),
+        web.get('/metrics', metrics),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--max-concurrent', type=int, default=API_MAX_CONCURRENT_TURNS, help="backend turns running at once")
+    parser.add_argument('--max-queued', type=int, default=API_MAX_QUEUED, help="requests waiting for a slot before 503")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(create_app(args.max_concurrent, args.max_queued), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
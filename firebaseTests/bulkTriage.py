@@ -0,0 +1,314 @@
+"""
+Bulk severity triage: classify and reprioritize many tickets in one pass.
+
+Streams the tickets whose progressReport matches (default "Unassigned") one projected query page
+at a time, packs TRIAGE_PACK_SIZE descriptions into each LLM request (the answer is a JSON array
+with one level/priority object per ticket), keeps up to TRIAGE_PARALLEL requests in flight and
+writes the new issueLevel / priority back in WriteBatches of TRIAGE_WRITE_BATCH tickets. Tickets
+a packed answer leaves out or gets wrong are classified one by one with analyze_issue_severity.
+
+Progress is checkpointed to a JSON file after every committed batch, so an interrupted run
+started again skips the tickets it already wrote. The checkpoint is removed when a run
+completes; --restart ignores an existing one.
+
+Run from the repository root:
+
+    python -m firebaseTests.bulkTriage --status Unassigned --pack-size 10 --parallel 4
+"""
+import argparse
+import concurrent.futures
+import json
+import logging
+import os
+import re
+import textwrap
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import firebaseTests.firebaseFullV10 as backend
+from firebaseTests.llmResilience import LLMError
+
+TRIAGE_STATUS = "Unassigned"
+TRIAGE_PACK_SIZE = int(os.getenv("TRIAGE_PACK_SIZE", "10"))  # tickets per LLM request
+TRIAGE_PARALLEL = int(os.getenv("TRIAGE_PARALLEL", "4"))  # LLM requests in flight
+TRIAGE_WRITE_BATCH = 100  # tickets per WriteBatch commit, and per checkpoint
+TRIAGE_SCAN_PAGE = 200  # tickets per Firestore query page
+TRIAGE_DESCRIPTION_CHARS = 500  # longer descriptions are cut short in the packed prompt
+TRIAGE_CHECKPOINT_PATH = os.getenv("TRIAGE_CHECKPOINT_PATH", "firebaseTests/bulk_triage_checkpoint.json")
+TRIAGE_FIELDS = ['problemDescription', 'issueLevel', 'priority', 'triageStatus']
+
+_PACK_ID = re.compile(r'^T(\d+)$')
+
+
+def stream_tickets(status: str = TRIAGE_STATUS, page_size: int = TRIAGE_SCAN_PAGE):
+    """
+    Yield (ticket_id, ticket) for every ticket whose progressReport is status, paging through
+    the collection in document ID order with a cursor instead of loading it in one go.
+    """
+    query = backend.get_db().collection('Tickets').where('progressReport', '==', status).select(TRIAGE_FIELDS).limit(page_size)
+    cursor = None
+    while True:
+        docs = list((query.start_after(cursor) if cursor is not None else query).stream())
+        for doc in docs:
+            yield doc.id, doc.to_dict()
+        if len(docs) < page_size:
+            return
+        cursor = docs[-1]
+
+
+def build_pack_prompt(descriptions: list) -> str:
+    """
+    One severity prompt for several tickets, numbered T1..Tn.
+    """
+    lines = []
+    for i, description in enumerate(descriptions, 1):
+        description = re.sub(r'\s+', ' ', description or '').strip()
+        if len(description) > TRIAGE_DESCRIPTION_CHARS:
+            description = description[:TRIAGE_DESCRIPTION_CHARS] + '...'
+        lines.append(f"T{i}: {description}")
+    tickets = '\n'.join(lines)
+    return f"""
+Analyze each IT support ticket below and determine:
+{textwrap.dedent(backend.SEVERITY_GUIDE)}
+
+Tickets, one per line as "<id>: <description>":
+{tickets}
+
+Respond ONLY with a JSON array holding one object per ticket, in the same order, e.g.
+[{{"id": "T1", "level": "L2", "priority": "medium"}}, {{"id": "T2", "level": "L4", "priority": "low"}}]
+"""
+
+
+def parse_pack_response(response: str) -> dict:
+    """
+    {ticket number: (issue_level, priority)} for every well-formed entry of a packed answer.
+    """
+    start, end = response.find('['), response.rfind(']')
+    if start < 0 or end < start:
+        return {}
+    try:
+        items = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        match = _PACK_ID.match(str(item.get('id', '')).strip())
+        level = str(item.get('level') or '').strip().upper()
+        priority = str(item.get('priority') or '').strip().lower()
+        if match and level in backend.ISSUE_LEVELS and priority in backend.PRIORITIES:
+            parsed[int(match.group(1))] = (level, priority)
+    return parsed
+
+
+def classify_pack(pack: list):
+    """
+    Classify [(ticket_id, ticket), ...] with one LLM request, falling back to one request per
+    ticket for entries the answer leaves out or gets wrong.
+    Returns ({ticket_id: (issue_level, priority)}, [failed ticket_id, ...], fallback count).
+    """
+    parsed = {}
+    try:
+        response = backend.invoke_llm(build_pack_prompt([t.get('problemDescription') for _, t in pack]), call_site="bulk_triage")
+        parsed = parse_pack_response(response)
+    except LLMError as e:
+        logging.warning(f"Packed triage request for {len(pack)} tickets failed: {e}")
+    results, failed, fallbacks = {}, [], 0
+    for number, (ticket_id, ticket) in enumerate(pack, 1):
+        if number in parsed:
+            results[ticket_id] = parsed[number]
+            continue
+        fallbacks += 1
+        try:
+            results[ticket_id] = backend.analyze_issue_severity(ticket.get('problemDescription') or '', strict=True)
+        except Exception as e:
+            logging.warning(f"Triage of ticket {ticket_id} failed: {e}")
+            failed.append(ticket_id)
+    return results, failed, fallbacks
+
+
+def apply_triage(results: dict) -> list:
+    """
+    Write {ticket_id: (issue_level, priority)} in one WriteBatch. If the commit fails (e.g. a
+    ticket was deleted meanwhile) nothing was applied, so the tickets are written one by one.
+    Returns the IDs written.
+    """
+    db = backend.get_db()
+    now = datetime.now(timezone.utc)
+    updates = {ticket_id: {'issueLevel': level, 'priority': priority, 'triageStatus': 'done', 'updatedAt': now}
+               for ticket_id, (level, priority) in results.items()}
+    batch = db.batch()
+    for ticket_id, fields in updates.items():
+        batch.update(db.collection('Tickets').document(ticket_id), fields)
+    try:
+        batch.commit()
+        written = list(updates)
+    except Exception as e:
+        logging.info(f"Batched triage write of {len(updates)} tickets failed ({e}), writing individually.")
+        written = []
+        for ticket_id, fields in updates.items():
+            try:
+                db.collection('Tickets').document(ticket_id).update(fields)
+                written.append(ticket_id)
+            except Exception as e:
+                logging.warning(f"Could not write triage result for ticket {ticket_id}: {e}")
+    for ticket_id in written:
+        backend.notify_ticket_write(ticket_id, 'update', updates[ticket_id])
+    return written
+
+
+class TriageCheckpoint:
+    """
+    IDs of the tickets an unfinished run has already written, persisted as JSON.
+    """
+
+    def __init__(self, path: str = TRIAGE_CHECKPOINT_PATH, status: str = TRIAGE_STATUS):
+        self.path = path
+        self.status = status
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('status') == status:
+                self.done = set(state.get('done', []))
+
+    def add(self, ticket_ids) -> None:
+        self.done.update(ticket_ids)
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'status': self.status, 'done': sorted(self.done), 'updated_at': time.time()}, f)
+        os.replace(tmp_path, self.path)  # atomic: an interrupted save leaves the previous checkpoint
+
+    def clear(self) -> None:
+        self.done = set()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _packs(tickets, pack_size: int):
+    pack = []
+    for ticket in tickets:
+        pack.append(ticket)
+        if len(pack) == pack_size:
+            yield pack
+            pack = []
+    if pack:
+        yield pack
+
+
+def run_bulk_triage(status: str = TRIAGE_STATUS, pack_size: int = TRIAGE_PACK_SIZE, parallel: int = TRIAGE_PARALLEL,
+                    checkpoint_path: str = TRIAGE_CHECKPOINT_PATH, restart: bool = False, skip_triaged: bool = False,
+                    dry_run: bool = False) -> dict:
+    """
+    Triage every ticket with progressReport == status. skip_triaged also skips tickets whose
+    triageStatus is already "done"; dry_run classifies without writing or checkpointing.
+    Returns the run's counters, including tickets_per_second.
+    """
+    checkpoint = TriageCheckpoint(None if dry_run else checkpoint_path, status)
+    if restart:
+        checkpoint.clear()
+    stats = Counter()
+    levels, priorities = Counter(), Counter()
+    to_write = {}
+    started = time.perf_counter()
+
+    def tickets():
+        for ticket_id, ticket in stream_tickets(status):
+            stats['seen'] += 1
+            if ticket_id in checkpoint.done or (skip_triaged and ticket.get('triageStatus') == 'done'):
+                stats['skipped'] += 1
+                continue
+            yield ticket_id, ticket
+
+    def flush() -> None:
+        if not to_write:
+            return
+        written = list(to_write) if dry_run else apply_triage(to_write)
+        stats['triaged'] += len(written)
+        stats['failed'] += len(to_write) - len(written)
+        for ticket_id in written:
+            levels[to_write[ticket_id][0]] += 1
+            priorities[to_write[ticket_id][1]] += 1
+        if not dry_run:
+            checkpoint.add(written)
+        to_write.clear()
+        elapsed = time.perf_counter() - started
+        logging.info(f"Bulk triage: {stats['triaged']} tickets triaged in {elapsed:.1f}s ({stats['triaged'] / elapsed:.1f} tickets/s)")
+
+    def collect(future) -> None:
+        results, failed, fallbacks = future.result()
+        stats['llm_requests'] += 1 + fallbacks
+        stats['fallbacks'] += fallbacks
+        stats['failed'] += len(failed)
+        to_write.update(results)
+        if len(to_write) >= TRIAGE_WRITE_BATCH:
+            flush()
+
+    def collect_next(in_flight: set) -> None:
+        done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            in_flight.discard(future)
+            collect(future)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="bulk-triage") as executor:
+        in_flight = set()
+        try:
+            for pack in _packs(tickets(), pack_size):
+                # Bounded: at most `parallel` requests running and as many packs queued behind them
+                while len(in_flight) >= 2 * parallel:
+                    collect_next(in_flight)
+                in_flight.add(executor.submit(classify_pack, pack))
+            while in_flight:
+                collect_next(in_flight)
+        finally:
+            # Interrupted: drop queued packs, but keep every pack already classified, including those
+            # finished but not collected yet and those still running (the executor waits for them anyway)
+            for future in in_flight:
+                future.cancel()
+            concurrent.futures.wait(in_flight)
+            for future in in_flight:
+                if not future.cancelled() and future.exception() is None:
+                    collect(future)
+            flush()
+    if not dry_run:
+        checkpoint.clear()
+    elapsed = time.perf_counter() - started
+    return {
+        'status': status, 'dry_run': dry_run, 'seen': stats['seen'], 'skipped': stats['skipped'],
+        'triaged': stats['triaged'], 'failed': stats['failed'], 'llm_requests': stats['llm_requests'],
+        'fallbacks': stats['fallbacks'], 'elapsed': round(elapsed, 3),
+        'tickets_per_second': round(stats['triaged'] / elapsed, 2) if elapsed else 0.0,
+        'levels': dict(sorted(levels.items())), 'priorities': dict(sorted(priorities.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--status', default=TRIAGE_STATUS, help="progressReport of the tickets to triage")
+    parser.add_argument('--pack-size', type=int, default=TRIAGE_PACK_SIZE, help="tickets per LLM request")
+    parser.add_argument('--parallel', type=int, default=TRIAGE_PARALLEL, help="LLM requests in flight")
+    parser.add_argument('--checkpoint', default=TRIAGE_CHECKPOINT_PATH, help="progress file for resuming an interrupted run")
+    parser.add_argument('--restart', action='store_true', help="ignore an existing checkpoint")
+    parser.add_argument('--skip-triaged', action='store_true', help="skip tickets whose triageStatus is already done")
+    parser.add_argument('--dry-run', action='store_true', help="classify without writing anything")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    report = run_bulk_triage(args.status, args.pack_size, args.parallel, args.checkpoint, args.restart,
+                             args.skip_triaged, args.dry_run)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"\nTickets with status {report['status']!r}: {report['seen']} seen, {report['skipped']} skipped, "
+          f"{report['triaged']} {'classified (dry run)' if report['dry_run'] else 'triaged'}, {report['failed']} failed")
+    print(f"LLM requests: {report['llm_requests']} ({report['fallbacks']} single-ticket fallbacks)")
+    print(f"Throughput: {report['tickets_per_second']} tickets/s over {report['elapsed']}s")
+    print(f"Levels: {report['levels']}  Priorities: {report['priorities']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+In-memory employee directory with prefix, trigram-fuzzy and normalized-phone lookups.
+
+Loaded once from the Employees collection and then kept current incrementally, either by a
+Firestore on_snapshot listener (watch) or by write-through calls (upsert / patch / remove).
+All lookups are answered from in-memory indexes.
+"""
+import bisect
+import logging
+import re
+import threading
+from collections import defaultdict
+
+# Fields never returned from the directory
+PRIVATE_FIELDS = ('password', 'taxFileNumber')
+
+
+def normalize_phone(phone) -> str:
+    """
+    Digits only, with the Australian +61 prefix folded to a leading 0 (+61 234 567 890 -> 0234567890).
+    """
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if digits.startswith("61") and len(digits) == 11:
+        digits = "0" + digits[2:]
+    return digits
+
+
+def _normalize_text(text) -> str:
+    return re.sub(r"\s+", " ", str(text or "")).strip().casefold()
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {_normalize_text(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EmployeeDirectory:
+    PHONE_SUFFIX_DIGITS = 6
+    COMMON_TRIGRAM_MIN = 50
+
+    def __init__(self):
+        self._employees = {}                  # employee ID -> public fields
+        self._prefix_keys = []                # sorted (key, employee ID); keys are names, name words, emails, IDs
+        self._keys_by_id = defaultdict(list)
+        self._trigrams = defaultdict(set)     # trigram -> employee IDs
+        self._trigram_count = {}              # employee ID -> number of name trigrams
+        self._phones = defaultdict(set)       # normalized phone -> employee IDs
+        self._phone_suffixes = defaultdict(set)
+        self._lock = threading.RLock()
+        self._watch = None
+        self.ready = threading.Event()
+
+    # --- maintenance ---
+    def load(self, employees) -> None:
+        """
+        Replace the directory contents with an iterable of (employee ID, data) pairs.
+        """
+        with self._lock:
+            self._reset_indexes()
+            for employee_id, data in employees:
+                self._add(employee_id, data, keep_sorted=False)
+            self._prefix_keys.sort()
+        self.ready.set()
+
+    def upsert(self, employee_id: str, data: dict) -> None:
+        with self._lock:
+            self._remove(employee_id)
+            self._add(employee_id, data)
+
+    def patch(self, employee_id: str, fields: dict) -> None:
+        with self._lock:
+            if employee_id not in self._employees:
+                return
+            data = {**self._employees[employee_id], **fields}
+            self._remove(employee_id)
+            self._add(employee_id, data)
+
+    def remove(self, employee_id: str) -> None:
+        with self._lock:
+            self._remove(employee_id)
+
+    def watch(self, collection_ref, timeout: float = 10.0) -> bool:
+        """
+        Load and then follow the collection with an on_snapshot listener.
+        Returns True once the first snapshot has been applied within `timeout` seconds.
+        """
+        def on_snapshot(docs, changes, read_time):
+            try:
+                if not self.ready.is_set():
+                    self.load((doc.id, doc.to_dict()) for doc in docs)
+                    return
+                for change in changes:
+                    kind = getattr(change.type, 'name', str(change.type))
+                    if kind == 'REMOVED':
+                        self.remove(change.document.id)
+                    else:
+                        self.upsert(change.document.id, change.document.to_dict())
+            except Exception as e:
+                logging.error(f"Employee directory snapshot failed: {e}")
+
+        self._watch = collection_ref.on_snapshot(on_snapshot)
+        return self.ready.wait(timeout)
+
+    def close(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def __len__(self):
+        return len(self._employees)
+
+    # --- lookups ---
+    def get(self, employee_id: str):
+        with self._lock:
+            data = self._employees.get(employee_id)
+            return dict(data) if data is not None else None
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """
+        Find employees by ID, name, email or phone. Returns up to `limit` (score, employee) pairs,
+        best first. Exact and prefix matches score above fuzzy (trigram) matches.
+        """
+        query = str(query or "").strip()
+        if not query:
+            return []
+        scores = defaultdict(float)
+        with self._lock:
+            digits = normalize_phone(query)
+            if len(digits) >= self.PHONE_SUFFIX_DIGITS and re.fullmatch(r"[\d\s()+.-]+", query):
+                for employee_id in self._phones.get(digits, ()):
+                    scores[employee_id] = max(scores[employee_id], 3.0)
+                for employee_id in self._phone_suffixes.get(digits[-self.PHONE_SUFFIX_DIGITS:], ()):
+                    scores[employee_id] = max(scores[employee_id], 2.0)
+            else:
+                key = _normalize_text(query)
+                for employee_id in (query, query.upper()):
+                    if employee_id in self._employees:
+                        scores[employee_id] = 3.0
+                for employee_id in self._prefix_matches(key):
+                    scores[employee_id] = max(scores[employee_id], 2.0)
+                if '@' not in key:
+                    for employee_id, similarity in self._fuzzy_matches(key).items():
+                        scores[employee_id] = max(scores[employee_id], similarity)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], self._employees[item[0]].get('name', '')))
+            return [(score, dict(self._employees[employee_id])) for employee_id, score in ranked[:limit] if score >= 0.3]
+
+    # --- internals ---
+    def _reset_indexes(self):
+        self._employees.clear()
+        self._prefix_keys = []
+        self._keys_by_id.clear()
+        self._trigrams.clear()
+        self._trigram_count.clear()
+        self._phones.clear()
+        self._phone_suffixes.clear()
+
+    def _add(self, employee_id, data, keep_sorted=True):
+        data = {k: v for k, v in (data or {}).items() if k not in PRIVATE_FIELDS}
+        data.setdefault('employeeID', employee_id)
+        self._employees[employee_id] = data
+        name = _normalize_text(data.get('name'))
+        keys = {name, _normalize_text(employee_id), _normalize_text(data.get('email'))}
+        keys.update(name.split())
+        for key in keys - {""}:
+            if keep_sorted:
+                bisect.insort(self._prefix_keys, (key, employee_id))
+            else:
+                self._prefix_keys.append((key, employee_id))
+            self._keys_by_id[employee_id].append(key)
+        grams = trigrams(name) if name else set()
+        for gram in grams:
+            self._trigrams[gram].add(employee_id)
+        self._trigram_count[employee_id] = len(grams)
+        phone = normalize_phone(data.get('phone'))
+        if phone:
+            self._phones[phone].add(employee_id)
+            self._phone_suffixes[phone[-self.PHONE_SUFFIX_DIGITS:]].add(employee_id)
+
+    def _remove(self, employee_id):
+        data = self._employees.pop(employee_id, None)
+        if data is None:
+            return
+        for key in self._keys_by_id.pop(employee_id, []):
+            i = bisect.bisect_left(self._prefix_keys, (key, employee_id))
+            if i < len(self._prefix_keys) and self._prefix_keys[i] == (key, employee_id):
+                del self._prefix_keys[i]
+        for gram in trigrams(_normalize_text(data.get('name'))):
+            self._trigrams[gram].discard(employee_id)
+        self._trigram_count.pop(employee_id, None)
+        phone = normalize_phone(data.get('phone'))
+        if phone:
+            self._phones[phone].discard(employee_id)
+            self._phone_suffixes[phone[-self.PHONE_SUFFIX_DIGITS:]].discard(employee_id)
+
+    def _prefix_matches(self, key: str) -> set:
+        matches = set()
+        i = bisect.bisect_left(self._prefix_keys, (key, ""))
+        while i < len(self._prefix_keys) and self._prefix_keys[i][0].startswith(key):
+            matches.add(self._prefix_keys[i][1])
+            i += 1
+        return matches
+
+    def _fuzzy_matches(self, key: str) -> dict:
+        """
+        Dice similarity between the query's trigrams and each candidate name's trigrams.
+        Candidates come from the query's rarer trigrams only, so common fragments ("ers", " jo")
+        don't turn a lookup into a scan of the whole directory.
+        """
+        grams = trigrams(key)
+        postings = sorted((self._trigrams.get(gram, ()) for gram in grams), key=len)
+        common = max(self.COMMON_TRIGRAM_MIN, len(self._employees) // 10)
+        candidates = set()
+        for i, ids in enumerate(postings):
+            if i and len(ids) > common:
+                break
+            candidates.update(ids)
+        matches = {}
+        for employee_id in candidates:
+            shared = len(grams & trigrams(self._employees[employee_id].get('name')))
+            matches[employee_id] = 2 * shared / (len(grams) + self._trigram_count[employee_id])
+        return matches
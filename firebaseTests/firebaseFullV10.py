@@ -1,27 +1,350 @@
-import firebase_admin
 from datetime import datetime, timezone
-from openai import OpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from google.cloud.firestore_v1.base_query import FieldFilter, Or
-from firebase_admin import credentials
-from firebase_admin import firestore
 import re
 import os
 import json as _json
+import asyncio
+import atexit
+import collections
+import concurrent.futures
+import contextvars
+import logging
+import threading
+import time
+import weakref
+from firebaseTests.llmCache import LLMResponseCache, make_cache_key
+from firebaseTests.llmCassette import CassetteMissError, LLMCassette
+from firebaseTests.promptTokens import PromptSizeTracker
+from firebaseTests.llmMetrics import LLMMetrics
+from firebaseTests.llmResilience import (
+    CircuitBreaker, LLMError, LLMResponseError, LLMTimeoutError, LLMUnavailableError, backoff_delay
+)
+from firebaseTests.intentRouter import route_intent, route_stats
+from firebaseTests.slotFilling import fallback_context, fill_slots, is_cancel, missing_args_question, permission_error
+from firebaseTests.ticketCache import TicketCache
+from firebaseTests.employeeDirectory import EmployeeDirectory
+from firebaseTests.ticketSearch import TicketSearchIndex
+from firebaseTests.techSession import SessionProxy, TechSession, current_session, use_session
+
+# Heavy client libraries (firebase_admin / google.cloud.firestore, openai, httpx, numpy) are imported
+# on first use, so importing this module stays cheap. Run benchmarks/importTime.py for a breakdown.
+FIREBASE_KEY_PATH = r"firebaseTests/firestoreKey.json"
+_db = None
+_db_lock = threading.Lock()
+
+def get_db():
+    """
+    Return the process-wide Firestore client, initializing the Firebase app on first use.
+    """
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+                if not firebase_admin._apps:
+                    cred = credentials.Certificate(FIREBASE_KEY_PATH)
+                    firebase_admin.initialize_app(cred)
+                _db = firestore.client()
+    return _db
+
+def __getattr__(name):
+    # Keeps firebaseFullV10.db working for callers of the old module-level client
+    if name == 'db':
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _not_found():
+    """
+    google.api_core's NotFound. Only evaluated when an exception reaches the except clause,
+    by which point the Firestore client has already imported it.
+    """
+    from google.api_core.exceptions import NotFound
+    return NotFound
+
+def _failed_precondition():
+    """
+    google.api_core's FailedPrecondition (a write_option precondition did not hold), imported like _not_found.
+    """
+    from google.api_core.exceptions import FailedPrecondition
+    return FailedPrecondition
+
+def _write_rejected():
+    """
+    The errors with which Firestore definitely rejects a write without applying it (a missing
+    document, a failed precondition, a malformed request), imported like _not_found.
+    """
+    from google.api_core.exceptions import FailedPrecondition, InvalidArgument, NotFound
+    return NotFound, FailedPrecondition, InvalidArgument
+
+# --- Ticket write notifications ---
+# Every ticket write path calls notify_ticket_write(ticket_id, op, data) after the write succeeds:
+# op is 'set' (data = full ticket), 'update' (data = changed fields) or 'delete' (data = None).
+# Caches and indexes over the Tickets collection register themselves in ticket_write_listeners.
+ticket_write_listeners = []
+
+def notify_ticket_write(ticket_id: str, op: str, data: dict = None) -> None:
+    for listener in ticket_write_listeners:
+        try:
+            listener(ticket_id, op, data)
+        except Exception as e:
+            logging.error(f"Ticket write listener {listener} failed for {ticket_id}: {e}")
+
+# In-memory employee directory behind search_employees. Loaded on first use and kept current by
+# an on_snapshot listener (EMPLOYEE_DIRECTORY_LISTEN) plus write-through from this process's writes.
+EMPLOYEE_DIRECTORY_LISTEN = os.getenv("EMPLOYEE_DIRECTORY_LISTEN", "1") == "1"
+employee_directory = EmployeeDirectory()
+_employee_directory_lock = threading.Lock()
+
+def get_employee_directory() -> EmployeeDirectory:
+    """
+    Return the employee directory, loading the Employees collection on first use.
+    """
+    with _employee_directory_lock:
+        if not employee_directory.ready.is_set():
+            collection = get_db().collection('Employees')
+            if not (EMPLOYEE_DIRECTORY_LISTEN and employee_directory.watch(collection)):
+                employee_directory.load((doc.id, doc.to_dict()) for doc in collection.stream())
+    return employee_directory
+
+def notify_write(collection: str, doc_id: str, op: str, data: dict = None) -> None:
+    """
+    Report a successful write to the in-process caches/indexes for that collection.
+    """
+    if collection == 'Tickets':
+        notify_ticket_write(doc_id, op, data)
+    elif collection == 'Employees' and employee_directory.ready.is_set():
+        if op == 'delete':
+            employee_directory.remove(doc_id)
+        elif op == 'set':
+            employee_directory.upsert(doc_id, data)
+        else:
+            employee_directory.patch(doc_id, data)
+
+# Per-employee ticket cache used by show_tickets / show_tickets_for_update
+TICKET_CACHE_ENABLED = True
+TICKET_CACHE_TTL = 300  # seconds, bounds staleness from writes made by other processes
+TICKET_CACHE_LISTEN = os.getenv("TICKET_CACHE_LISTEN", "0") == "1"  # keep cached employees current via on_snapshot
+ticket_cache = TicketCache(ttl=TICKET_CACHE_TTL)
+ticket_write_listeners.append(ticket_cache.apply_write)
+
+# Full-text ticket search behind search_tickets (see ticketSearch). Restored from TICKET_SEARCH_INDEX_PATH
+# plus a catch-up query for the tickets created or updated since it was saved, or else built from the
+# whole collection; then kept current by this process's ticket writes and, with TICKET_SEARCH_LISTEN,
+# an on_snapshot listener. Deletions made elsewhere only arrive through the listener or a rebuild, so a
+# saved index older than TICKET_SEARCH_MAX_AGE is rebuilt instead of caught up.
+TICKET_SEARCH_INDEX_PATH = os.getenv("TICKET_SEARCH_INDEX_PATH", "firebaseTests/ticket_search_index.json.gz")
+TICKET_SEARCH_LISTEN = os.getenv("TICKET_SEARCH_LISTEN", "0") == "1"
+TICKET_SEARCH_MAX_AGE = 24 * 3600  # seconds
+TICKET_SEARCH_CATCH_UP_OVERLAP = 60  # seconds re-read before the saved sync time, for clock skew between writers
+TICKET_SEARCH_LIMIT = 10
+ticket_search_index = TicketSearchIndex()
+ticket_write_listeners.append(ticket_search_index.apply_write)
+_ticket_search_lock = threading.Lock()
+
+def get_ticket_search_index() -> TicketSearchIndex:
+    """
+    Return the ticket search index, restoring or building it on first use.
+    """
+    with _ticket_search_lock:
+        if not ticket_search_index.ready.is_set():
+            collection = get_db().collection('Tickets')
+            if not (TICKET_SEARCH_LISTEN and ticket_search_index.watch(collection)):
+                if (TICKET_SEARCH_INDEX_PATH and ticket_search_index.load_file(TICKET_SEARCH_INDEX_PATH)
+                        and time.time() - (ticket_search_index.synced_at or 0) < TICKET_SEARCH_MAX_AGE):
+                    _catch_up_ticket_search(collection)
+                else:
+                    started = time.time()
+                    ticket_search_index.load(((doc.id, doc.to_dict()) for doc in collection.stream()), synced_at=started)
+                save_ticket_search_index()
+    return ticket_search_index
+
+def _catch_up_ticket_search(collection) -> None:
+    """
+    Apply the tickets created or updated since the restored index was synced, then drop the ones
+    deleted since. Every ticket write must set updatedAt for this to see it.
+    (One OR query over two inequality fields; Firestore may ask for a composite index on first run.)
+    """
+    from google.cloud.firestore_v1.base_query import FieldFilter, Or
+    started = time.time()
+    since = datetime.fromtimestamp(ticket_search_index.synced_at - TICKET_SEARCH_CATCH_UP_OVERLAP, timezone.utc)
+    changed = collection.where(filter=Or(filters=[FieldFilter('createdAt', '>=', since), FieldFilter('updatedAt', '>=', since)]))
+    for doc in changed.stream():
+        ticket_search_index.upsert(doc.id, doc.to_dict())
+    _drop_deleted_from_ticket_search(collection)
+    ticket_search_index.synced_at = started
+
+def _drop_deleted_from_ticket_search(collection) -> None:
+    # A query can't return deleted documents, so compare against the IDs still in the collection
+    # (an ID-only scan: no fields are transferred)
+    live = {doc.id for doc in collection.select([]).stream()}
+    for ticket_id in ticket_search_index.ticket_ids() - live:
+        ticket_search_index.remove(ticket_id)
+
+def save_ticket_search_index() -> None:
+    """
+    Persist the ticket search index to TICKET_SEARCH_INDEX_PATH (also done at exit).
+    """
+    if TICKET_SEARCH_INDEX_PATH and ticket_search_index.ready.is_set():
+        try:
+            ticket_search_index.save(TICKET_SEARCH_INDEX_PATH)
+        except OSError as e:
+            logging.warning(f"Could not save the ticket search index: {e}")
 
-if not firebase_admin._apps:
-    cred = credentials.Certificate(r"firebaseTests/firestoreKey.json")
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
+atexit.register(save_ticket_search_index)
+
+# Ticket listings are paginated: TICKET_PAGE_SIZE per page, projected to the fields the renderer
+# shows, and ordered by ticket ID. Ticket IDs are "{employeeID}-{YYYY_MM_DD-HHMM}", so within one
+# employee that is creation order, and unlike order_by('createdAt') it keeps tickets written
+# without a createdAt field (Firestore drops documents missing the ordered field from a query).
+TICKET_PAGE_SIZE = 10
+TICKET_LIST_FIELDS = ['referenceCode', 'problemDescription', 'priority', 'issueLevel', 'progressReport', 'createdAt', 'updatedAt']
+
+def list_tickets_page(employee_id: str, page_size: int = None, cursor=None):
+    """
+    Return one page of an employee's tickets in creation (ticket ID) order: (tickets, next_cursor).
+    next_cursor is None on the last page, otherwise pass it back to get the following page.
+    Pages come from the ticket cache when it holds the employee's tickets; otherwise from a
+    projected, cursor-paginated Firestore query. A first page that turns out to be the complete
+    list is put in the cache.
+    """
+    page_size = page_size or TICKET_PAGE_SIZE
+    if TICKET_CACHE_ENABLED and (cursor is None or isinstance(cursor, int)):
+        cached = ticket_cache.get(employee_id)
+        if cached is not None:
+            offset = cursor or 0
+            next_offset = offset + page_size
+            return cached[offset:next_offset], (next_offset if next_offset < len(cached) else None)
+    base_query = get_db().collection('Tickets').where('employeeID', '==', employee_id)
+    query = base_query.order_by('__name__').select(TICKET_LIST_FIELDS).limit(page_size + 1)
+    if isinstance(cursor, int):
+        # Offset cursor from a cached page whose cache entry has since expired
+        query = query.offset(cursor)
+    elif cursor is not None:
+        query = query.start_after(cursor)
+    docs = list(query.stream())
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    tickets = [doc.to_dict() for doc in docs]
+    if TICKET_CACHE_ENABLED and cursor is None and not has_more:
+        ticket_cache.load(employee_id, [{**t, 'employeeID': employee_id} for t in tickets])
+        if TICKET_CACHE_LISTEN:
+            ticket_cache.watch(employee_id, base_query)
+    return tickets, (docs[-1] if has_more else None)
+
+# --- Background severity triage ---
+# When enabled, create_ticket writes the ticket straight away with a provisional level/priority
+# and triageStatus "pending"; a worker pool classifies it and patches the document afterwards,
+# unless an admin has changed the level or priority in the meantime (see _apply_triage).
+DEFER_SEVERITY_TRIAGE = os.getenv("DEFER_SEVERITY_TRIAGE", "0") == "1"
+TRIAGE_WORKERS = 4
+TRIAGE_RETRIES = 3
+TRIAGE_RETRY_DELAY = 2  # seconds, doubled after each failed attempt
+PROVISIONAL_SEVERITY = ('L2', 'medium')  # (issueLevel, priority) written until triage replaces them
+_triage_executor = concurrent.futures.ThreadPoolExecutor(max_workers=TRIAGE_WORKERS, thread_name_prefix="triage")
+_triage_lock = threading.Lock()
+triage_counters = collections.Counter()  # queued, completed, failed, retries
+
+def triage_queue_depth() -> int:
+    """
+    Number of tickets queued or being classified by the background triage workers.
+    """
+    with _triage_lock:
+        return triage_counters['queued'] - triage_counters['completed'] - triage_counters['failed']
+
+def _apply_triage(ref_code: str, issue_level: str, priority: str) -> bool:
+    """
+    Write a triage result, unless the ticket's level or priority no longer hold the provisional
+    values (an admin changed them while it was queued: the ticket is only marked "skipped").
+    The write is conditional on the update time of the document that was checked, so an edit
+    landing in between is not overwritten either; the check is then made again.
+    Returns True if the result was written.
+    """
+    db = get_db()
+    ref = db.collection('Tickets').document(ref_code)
+    for _ in range(TRIAGE_RETRIES):
+        snapshot = ref.get()
+        if not snapshot.exists:
+            logging.info(f"Ticket {ref_code} was deleted before triage finished.")
+            return False
+        current = snapshot.to_dict()
+        if (current.get('issueLevel'), current.get('priority')) == PROVISIONAL_SEVERITY:
+            triage_fields = {'issueLevel': issue_level, 'priority': priority, 'triageStatus': 'done'}
+        else:
+            triage_fields = {'triageStatus': 'skipped'}
+        triage_fields['updatedAt'] = datetime.now(timezone.utc)
+        try:
+            ref.update(triage_fields, option=db.write_option(last_update_time=snapshot.update_time))
+        except _failed_precondition():
+            continue
+        notify_ticket_write(ref_code, 'update', triage_fields)
+        return 'issueLevel' in triage_fields
+    raise RuntimeError(f"Ticket {ref_code} kept changing during triage")
+
+def _triage_ticket(ref_code: str, description: str) -> None:
+    delay = TRIAGE_RETRY_DELAY
+    try:
+        for attempt in range(TRIAGE_RETRIES):
+            try:
+                issue_level, priority = analyze_issue_severity(description, strict=True, cache=attempt == 0)
+                _apply_triage(ref_code, issue_level, priority)
+                with _triage_lock:
+                    triage_counters['completed'] += 1
+                return
+            except Exception as e:
+                logging.warning(f"Triage of ticket {ref_code} failed (attempt {attempt+1}): {e}")
+                if attempt < TRIAGE_RETRIES - 1:
+                    with _triage_lock:
+                        triage_counters['retries'] += 1
+                    time.sleep(delay)
+                    delay *= 2
+        # Keep the provisional values but make the failure visible on the ticket
+        try:
+            failed_fields = {'triageStatus': 'failed', 'updatedAt': datetime.now(timezone.utc)}
+            get_db().collection('Tickets').document(ref_code).update(failed_fields)
+            notify_ticket_write(ref_code, 'update', failed_fields)
+        except Exception as e:
+            logging.error(f"Could not mark ticket {ref_code} as triage failed: {e}")
+        with _triage_lock:
+            triage_counters['failed'] += 1
+    except BaseException:
+        with _triage_lock:
+            triage_counters['failed'] += 1
+        raise
+
+def schedule_ticket_triage(ref_code: str, description: str) -> None:
+    with _triage_lock:
+        triage_counters['queued'] += 1
+    _triage_executor.submit(_triage_ticket, ref_code, description)
 
 # --- LLM-Driven Modular Tools ---
-def create_ticket(employee_id: str, description: str) -> str:
+ISSUE_LEVELS = ('L0', 'L1', 'L2', 'L3', 'L4')
+PRIORITIES = ('low', 'medium', 'high')
+
+def _valid_severity(issue_level, priority):
+    """
+    Normalize a level/priority pair supplied by the intent engine. Returns None unless both are valid.
+    """
+    level = str(issue_level).strip().upper() if issue_level else None
+    prio = str(priority).strip().lower() if priority else None
+    if level in ISSUE_LEVELS and prio in PRIORITIES:
+        return level, prio
+    return None
+
+def create_ticket(employee_id: str, description: str, issue_level: str = None, priority: str = None, defer_triage: bool = None) -> str:
     """
     Create a support ticket for the given employee with the provided description.
-    Sentiment/priority is determined from the description.
+    Sentiment/priority is determined from the description, either before the write or,
+    with deferred triage, by a background worker after it (see DEFER_SEVERITY_TRIAGE).
+    If the intent engine already supplied a valid issue_level and priority (combined-schema mode),
+    no separate severity analysis is made.
     Returns a formatted confirmation message.
     """
-    employee_doc = db.collection('Employees').document(employee_id).get()
+    supplied = _valid_severity(issue_level, priority)
+    if defer_triage is None:
+        defer_triage = DEFER_SEVERITY_TRIAGE
+    if supplied:
+        defer_triage = False
+    employee_doc = get_db().collection('Employees').document(employee_id).get()
     if not employee_doc.exists:
         return f"Error: Employee with ID {employee_id} does not exist."
     employee_data = employee_doc.to_dict()
@@ -29,13 +352,14 @@ def create_ticket(employee_id: str, description: str) -> str:
     employee_email = employee_data.get('email', 'N/A')
     employee_phone = employee_data.get('phone', 'N/A')
     # Analyze issue severity (stub: default to L2/medium if LLM not available)
-    issue_level, priority = 'L2', 'medium'
-    try:
-        result = analyze_issue_severity(description)
-        if result:
-            issue_level, priority = result
-    except Exception:
-        pass
+    issue_level, priority = supplied or PROVISIONAL_SEVERITY
+    if not supplied and not defer_triage:
+        try:
+            result = analyze_issue_severity(description)
+            if result:
+                issue_level, priority = result
+        except Exception:
+            pass
     ref_code = f"{employee_id}-{datetime.now(timezone.utc).strftime('%Y_%m_%d-%H%M')}"
     ticket = {
         'name': employee_name,
@@ -52,24 +376,32 @@ def create_ticket(employee_id: str, description: str) -> str:
         },
         'referenceCode': ref_code
     }
-    db.collection('Tickets').document(ref_code).set(ticket)
+    if defer_triage:
+        ticket['triageStatus'] = 'pending'
+    get_db().collection('Tickets').document(ref_code).set(ticket)
+    notify_ticket_write(ref_code, 'set', ticket)
+    provisional = ''
+    if defer_triage:
+        schedule_ticket_triage(ref_code, description)
+        provisional = ' (provisional, triage pending)'
     return f"""
 ### 🎫 Support Ticket Created
 
 **Reference Code:** `{ref_code}`
 **Employee:** {employee_name} (`{employee_id}`)
 **Description:** {description}
-**Priority:** `{priority.upper()}`
-**Level:** `{issue_level}`
+**Priority:** `{priority.upper()}`{provisional}
+**Level:** `{issue_level}`{provisional}
 **Created:** {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}
 
 ---
 """
 
-def provide_tech_support_advice(issue_description: str):
+def provide_tech_support_advice(issue_description: str, stream: bool = False):
     """
     Use LLM to provide comprehensive, well-formatted tech support advice for the reported issue.
     Returns detailed troubleshooting steps with clear formatting and explanations.
+    With stream=True, returns a generator of text chunks so the UI can render the advice as it arrives.
     """
     advice_prompt = f"""
     You are a senior IT tech support specialist with 15+ years of experience. A user has reported the following technical issue:
@@ -81,87 +413,149 @@ def provide_tech_support_advice(issue_description: str):
     Make your response comprehensive but organized, so users can easily follow along and understand each step.
     """
     
+    if stream:
+        return _stream_tech_support_advice(advice_prompt)
     try:
         # Request the maximum allowed response from the LLM for full advice
-        advice = invoke_llm(advice_prompt, max_tokens=8192)  # Maximize token limit for longer, complete responses
-        # If using a streaming LLM API, add logic here to wait for the full response before returning
+        advice = invoke_llm(advice_prompt, call_site="advice")  # max_tokens comes from the "advice" route (8192, for complete responses)
         return advice
-    except Exception as e:
+    except LLMError as e:
+        logging.error(f"Tech support advice failed: {e}")
         return f"""
         I'm sorry, but I couldn't generate detailed troubleshooting advice at this time.
     """
 
+def _stream_tech_support_advice(advice_prompt: str):
+    yielded = False
+    try:
+        for chunk in invoke_llm(advice_prompt, stream=True, call_site="advice"):
+            yielded = True
+            yield chunk
+    except LLMError as e:
+        logging.error(f"Tech support advice failed: {e}")
+        if yielded:
+            # Part of the answer is already on screen, so just note the interruption
+            yield f"\n\n_(Response interrupted: {e})_"
+            return
+        yield f"""
+        I'm sorry, but I couldn't generate detailed troubleshooting advice at this time.
+    """
+
+# --- Field update engine ---
+# Firestore's update() carries an implicit "document exists" precondition, so a single write both
+# checks existence and applies the change; a missing document surfaces as NotFound (see _not_found).
+# tool name -> (collection, Firestore field, value argument, confirmation message)
+FIELD_UPDATES = {
+    'update_ticket_description': ('Tickets', 'problemDescription', 'new_description', "**✅ Ticket `{id}` description updated.**"),
+    'update_ticket_progress': ('Tickets', 'progressReport', 'new_progress', "**✅ Ticket `{id}` progress report updated to `{value}`.**"),
+    'update_ticket_issue_level': ('Tickets', 'issueLevel', 'new_issue_level', "**✅ Ticket `{id}` issue level updated to `{value}`.**"),
+    'update_ticket_priority': ('Tickets', 'priority', 'new_priority', "**✅ Ticket `{id}` priority updated to `{value}`.**"),
+    'update_ticket_status': ('Tickets', 'progressReport', 'new_status', "**✅ Ticket `{id}` status updated to `{value}`.**"),
+    'update_employee_name': ('Employees', 'name', 'new_name', "**✅ Employee `{id}` name updated to `{value}`.**"),
+    'update_employee_email': ('Employees', 'email', 'new_email', "**✅ Employee `{id}` email updated to `{value}`.**"),
+    'update_employee_phone': ('Employees', 'phone', 'new_phone', "**✅ Employee `{id}` phone updated to `{value}`.**"),
+    'update_employee_dateOfBirth': ('Employees', 'dateOfBirth', 'new_dateOfBirth', "**✅ Employee `{id}` date of birth updated to `{value}`.**"),
+    'update_employee_employeeID': ('Employees', 'employeeID', 'new_employeeID', "**✅ Employee `{id}` employee ID updated to `{value}`.**"),
+    'update_employee_password': ('Employees', 'password', 'new_password', "**✅ Employee `{id}` password updated.**"),
+    'update_employee_role': ('Employees', 'role', 'new_role', "**✅ Employee `{id}` role updated to `{value}`.**"),
+    'update_employee_taxFileNumber': ('Employees', 'taxFileNumber', 'new_taxFileNumber', "**✅ Employee `{id}` tax file number updated to `{value}`.**"),
+}
+NOT_FOUND_MESSAGES = {
+    'Tickets': "Ticket with ID {id} does not exist.",
+    'Employees': "Employee with ID {id} does not exist.",
+}
+# Human-readable field names for multi-field confirmations
+FIELD_LABELS = {
+    'problemDescription': 'description', 'progressReport': 'status', 'issueLevel': 'issue level',
+    'priority': 'priority', 'name': 'name', 'email': 'email', 'phone': 'phone', 'dateOfBirth': 'date of birth',
+    'employeeID': 'employee ID', 'password': 'password', 'role': 'role', 'taxFileNumber': 'tax file number',
+}
+
+def update_document_fields(collection: str, doc_id: str, fields: dict) -> bool:
+    """
+    Apply all `fields` (plus updatedAt) to one document in a single conditional write.
+    Returns False if the document does not exist.
+    """
+    fields = {**fields, 'updatedAt': datetime.now(timezone.utc)}
+    try:
+        get_db().collection(collection).document(doc_id).update(fields)
+    except _not_found():
+        return False
+    notify_write(collection, doc_id, 'update', fields)
+    return True
+
+def _collect_field_updates(collection: str, updates: dict) -> dict:
+    """
+    Map tool-style value arguments (new_priority, new_issue_level, ...) to Firestore fields.
+    When two arguments target the same field (new_status / new_progress) the later one wins.
+    """
+    field_for_arg = {value_arg: field for spec_collection, field, value_arg, _ in FIELD_UPDATES.values() if spec_collection == collection}
+    unknown = set(updates) - set(field_for_arg)
+    if unknown:
+        raise ValueError(f"Unknown field(s) for {collection}: {', '.join(sorted(unknown))}")
+    return {field_for_arg[arg]: value for arg, value in updates.items() if value is not None}
+
+def apply_field_update(tool: str, doc_id: str, value) -> str:
+    """
+    Run one of the single-field update tools in FIELD_UPDATES and return its confirmation message.
+    """
+    collection, field, _, message = FIELD_UPDATES[tool]
+    if not update_document_fields(collection, doc_id, {field: value}):
+        return NOT_FOUND_MESSAGES[collection].format(id=doc_id)
+    return message.format(id=doc_id, value=value)
+
+def _format_multi_field_update(label: str, doc_id: str, fields: dict) -> str:
+    changes = ', '.join(
+        FIELD_LABELS.get(field, field) if field == 'password' else f"{FIELD_LABELS.get(field, field)} → `{value}`"
+        for field, value in fields.items()
+    )
+    return f"**✅ {label} `{doc_id}` updated: {changes}.**"
+
+def update_ticket_fields(ticket_id: str, **updates) -> str:
+    """
+    Update several ticket fields in one write, e.g.
+    update_ticket_fields(ticket_id, new_priority="high", new_issue_level="L1").
+    """
+    fields = _collect_field_updates('Tickets', updates)
+    if not fields:
+        return f"No fields to update for ticket `{ticket_id}`."
+    if not update_document_fields('Tickets', ticket_id, fields):
+        return NOT_FOUND_MESSAGES['Tickets'].format(id=ticket_id)
+    return _format_multi_field_update('Ticket', ticket_id, fields)
+
 def update_ticket_description(ticket_id: str, new_description: str) -> str:
     """
     Update the problem description of a ticket.
     """
-    doc_ref = db.collection('Tickets').document(ticket_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Ticket with ID {ticket_id} does not exist."
-    doc_ref.update({'problemDescription': new_description, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Ticket `{ticket_id}` description updated.**"
+    return apply_field_update('update_ticket_description', ticket_id, new_description)
 
 def update_ticket_progress(ticket_id: str, new_progress: str) -> str:
-    doc_ref = db.collection('Tickets').document(ticket_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Ticket with ID {ticket_id} does not exist."
-    doc_ref.update({'progressReport': new_progress, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Ticket `{ticket_id}` progress report updated to `{new_progress}`.**"
+    return apply_field_update('update_ticket_progress', ticket_id, new_progress)
 
 def update_ticket_issue_level(ticket_id: str, new_issue_level: str) -> str:
-    doc_ref = db.collection('Tickets').document(ticket_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Ticket with ID {ticket_id} does not exist."
-    doc_ref.update({'issueLevel': new_issue_level, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Ticket `{ticket_id}` issue level updated to `{new_issue_level}`.**"
+    return apply_field_update('update_ticket_issue_level', ticket_id, new_issue_level)
 
 def update_ticket_priority(ticket_id: str, new_priority: str) -> str:
-    doc_ref = db.collection('Tickets').document(ticket_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Ticket with ID {ticket_id} does not exist."
-    doc_ref.update({'priority': new_priority, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Ticket `{ticket_id}` priority updated to `{new_priority}`.**"
+    return apply_field_update('update_ticket_priority', ticket_id, new_priority)
 
 def update_ticket_status(ticket_id: str, new_status: str) -> str:
-    doc_ref = db.collection('Tickets').document(ticket_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Ticket with ID {ticket_id} does not exist."
-    doc_ref.update({'progressReport': new_status, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Ticket `{ticket_id}` status updated to `{new_status}`.**"
+    return apply_field_update('update_ticket_status', ticket_id, new_status)
 
 def delete_ticket(ticket_id: str) -> str:
-    doc_ref = db.collection('Tickets').document(ticket_id)
-    doc = doc_ref.get()
-    if doc.exists:
-        doc_ref.delete()
-        return f"**🗑️ Ticket `{ticket_id}` deleted.**"
-    else:
+    # Single conditional delete: the exists precondition replaces a separate get()
+    db = get_db()
+    try:
+        db.collection('Tickets').document(ticket_id).delete(option=db.write_option(exists=True))
+    except _not_found():
         return f"**❌ Ticket with ID `{ticket_id}` does not exist.**"
+    notify_ticket_write(ticket_id, 'delete')
+    return f"**🗑️ Ticket `{ticket_id}` deleted.**"
 
-def show_tickets(employee_id: str) -> str:
-    """
-    Show all tickets for the given employee ID, formatted.
-    """
-    docs = db.collection('Tickets').where('employeeID', '==', employee_id).stream()
-    tickets = [doc.to_dict() for doc in docs]
-    # Set ticket number to reference code mapping for LLM intent resolution
-    ticket_map = {}
-    for idx, t in enumerate(tickets, 1):
-        ticket_map[str(idx)] = t.get('referenceCode')
-    current_tech_session['last_ticket_map'] = ticket_map
-    if not tickets:
-        return f"""
-**No tickets found for employee ID `{employee_id}`.**
-"""
+def _render_ticket_page(title: str, tickets: list, start: int, has_more: bool) -> str:
     out = f"""
-### 🎫 Tickets for `{employee_id}`
+### 🎫 {title}
 """
-    for idx, t in enumerate(tickets, 1):
+    for idx, t in enumerate(tickets, start):
         out += f"""
 ---
 **Ticket #{idx}**
@@ -172,84 +566,110 @@ def show_tickets(employee_id: str) -> str:
 *Status:* `{t.get('progressReport','N/A')}`
 *Created:* `{t.get('createdAt','N/A')}`
 *Updated:* `{t.get('updatedAt','N/A')}`
+"""
+    if has_more:
+        out += f"""
+---
+*Showing tickets {start}–{start + len(tickets) - 1}. Say "next page" to see more.*
 """
     return out
 
+def _show_ticket_page(employee_id: str, title: str, listing: dict = None) -> str:
+    """
+    Render the first page of an employee's tickets, or the page after `listing` (the session's
+    current listing state). Ticket numbers continue across pages and last_ticket_map keeps
+    every number shown so far, so "ticket 12" still resolves after paging.
+    """
+    cursor = listing['next_cursor'] if listing else None
+    start = listing['shown'] + 1 if listing else 1
+    tickets, next_cursor = list_tickets_page(employee_id, cursor=cursor)
+    # Set ticket number to reference code mapping for LLM intent resolution
+    session = current_session()
+    ticket_map = dict(session.get('last_ticket_map') or {}) if listing else {}
+    for idx, t in enumerate(tickets, start):
+        ticket_map[str(idx)] = t.get('referenceCode')
+    session['last_ticket_map'] = ticket_map
+    session['ticket_listing'] = {
+        'employee_id': employee_id,
+        'title': title,
+        'shown': start - 1 + len(tickets),
+        'next_cursor': next_cursor,
+    }
+    if not tickets:
+        if listing:
+            return "**No more tickets to show.**"
+        return f"""
+**No tickets found for employee ID `{employee_id}`.**
+"""
+    return _render_ticket_page(title, tickets, start, next_cursor is not None)
+
+def show_tickets(employee_id: str) -> str:
+    """
+    Show the first page of tickets for the given employee ID, formatted.
+    """
+    return _show_ticket_page(employee_id, f"Tickets for `{employee_id}`")
+
+def show_more_tickets() -> str:
+    """
+    Show the next page of the most recent ticket listing. No arguments required.
+    """
+    listing = current_session().get('ticket_listing')
+    if not listing or listing.get('next_cursor') is None:
+        return "**No more tickets to show.**"
+    return _show_ticket_page(listing['employee_id'], listing['title'], listing)
+
+def has_more_tickets() -> bool:
+    listing = current_session().get('ticket_listing')
+    return bool(listing) and listing.get('next_cursor') is not None
+
+def update_employee_fields(employee_id: str, **updates) -> str:
+    """
+    Update several employee fields in one write, e.g.
+    update_employee_fields(employee_id, new_email="...", new_phone="...").
+    """
+    fields = _collect_field_updates('Employees', updates)
+    if not fields:
+        return f"No fields to update for employee `{employee_id}`."
+    if not update_document_fields('Employees', employee_id, fields):
+        return NOT_FOUND_MESSAGES['Employees'].format(id=employee_id)
+    return _format_multi_field_update('Employee', employee_id, fields)
+
 def update_employee_name(employee_id: str, new_name: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'name': new_name, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` name updated to `{new_name}`.**"
+    return apply_field_update('update_employee_name', employee_id, new_name)
 
 def update_employee_email(employee_id: str, new_email: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'email': new_email, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` email updated to `{new_email}`.**"
+    return apply_field_update('update_employee_email', employee_id, new_email)
 
 def update_employee_phone(employee_id: str, new_phone: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'phone': new_phone, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` phone updated to `{new_phone}`.**"
+    return apply_field_update('update_employee_phone', employee_id, new_phone)
 
 def update_employee_dateOfBirth(employee_id: str, new_dateOfBirth: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'dateOfBirth': new_dateOfBirth, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` date of birth updated to `{new_dateOfBirth}`.**"
+    return apply_field_update('update_employee_dateOfBirth', employee_id, new_dateOfBirth)
 
 def update_employee_employeeID(employee_id: str, new_employeeID: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'employeeID': new_employeeID, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` employee ID updated to `{new_employeeID}`.**"
+    return apply_field_update('update_employee_employeeID', employee_id, new_employeeID)
 
 def update_employee_password(employee_id: str, new_password: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'password': new_password, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` password updated.**"
+    return apply_field_update('update_employee_password', employee_id, new_password)
 
 def update_employee_role(employee_id: str, new_role: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'role': new_role, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` role updated to `{new_role}`.**"
+    return apply_field_update('update_employee_role', employee_id, new_role)
 
 def update_employee_taxFileNumber(employee_id: str, new_taxFileNumber: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        return f"Employee with ID {employee_id} does not exist."
-    doc_ref.update({'taxFileNumber': new_taxFileNumber, 'updatedAt': datetime.now(timezone.utc)})
-    return f"**✅ Employee `{employee_id}` tax file number updated to `{new_taxFileNumber}`.**"
+    return apply_field_update('update_employee_taxFileNumber', employee_id, new_taxFileNumber)
 
 def delete_employee(employee_id: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
-    doc = doc_ref.get()
-    if doc.exists:
-        doc_ref.delete()
-        return f"**🗑️ Employee `{employee_id}` deleted.**"
-    else:
+    # Single conditional delete: the exists precondition replaces a separate get()
+    db = get_db()
+    try:
+        db.collection('Employees').document(employee_id).delete(option=db.write_option(exists=True))
+    except _not_found():
         return f"**❌ Employee with ID `{employee_id}` does not exist.**"
+    notify_write('Employees', employee_id, 'delete')
+    return f"**🗑️ Employee `{employee_id}` deleted.**"
 
 def show_employee(employee_id: str) -> str:
-    doc_ref = db.collection('Employees').document(employee_id)
+    doc_ref = get_db().collection('Employees').document(employee_id)
     doc = doc_ref.get()
     if not getattr(doc, 'exists', False) or (callable(doc.exists) and not doc.exists()):
         return f"Employee with ID {employee_id} does not exist."
@@ -279,6 +699,62 @@ def show_employee_info(employee_id: str) -> str:
     return show_employee(employee_id)
 show_employee_info = show_employee
 
+def search_employees(query: str, limit: int = 5) -> str:
+    """
+    Admin-only: find employees by name, email, phone number or employee ID (fuzzy on names).
+    Answered from the in-memory employee directory.
+    """
+    role = current_session().get('role')
+    if role is None or str(role).lower() != 'admin':
+        return notAdmin()
+    matches = get_employee_directory().search(query, limit=int(limit))
+    if not matches:
+        return f"**No employees found matching `{query}`.**"
+    rows = '\n'.join(
+        f"| `{e.get('employeeID', 'N/A')}` | {e.get('name', 'N/A')} | {e.get('email', 'N/A')} | {e.get('phone', 'N/A')} | {e.get('role', 'N/A')} |"
+        for _, e in matches
+    )
+    return f"""
+### 🔎 Employees matching `{query}`
+
+| Employee ID | Name | Email | Phone | Role |
+|-------------|------|-------|-------|------|
+{rows}
+"""
+
+def search_tickets(query: str, limit: int = TICKET_SEARCH_LIMIT, status: str = None) -> str:
+    """
+    Full-text search over tickets (description, reference code, employee name, status fields), best
+    match first, optionally only those with the given status. Regular users only see their own
+    tickets; admins see everyone's. Matches are numbered so "ticket 2" refers to the second one.
+    """
+    session = current_session()
+    role = session.get('role')
+    admin = role is not None and str(role).lower() == 'admin'
+    employee_id = session.get('employee_id')
+    if not admin and not employee_id:
+        return "No employee ID found in session. Please authenticate first."
+    matches = get_ticket_search_index().search(query, limit=int(limit), employee_id=None if admin else employee_id, status=status)
+    if not matches:
+        return f"**No tickets found matching `{query}`.**"
+    session['last_ticket_map'] = {str(idx): t.get('referenceCode') for idx, (_, t) in enumerate(matches, 1)}
+    session['ticket_listing'] = None
+    rows = []
+    for idx, (_, t) in enumerate(matches, 1):
+        issue = re.sub(r'\s+', ' ', str(t.get('problemDescription', 'N/A'))).replace('|', '\\|')
+        if len(issue) > 80:
+            issue = issue[:77] + '...'
+        rows.append(f"| {idx} | `{t.get('referenceCode', 'N/A')}` | {t.get('name', t.get('employeeID', 'N/A'))} | {issue} | "
+                    f"`{str(t.get('priority', 'N/A')).upper()}` | `{t.get('issueLevel', 'N/A')}` | `{t.get('progressReport', 'N/A')}` |")
+    rows = '\n'.join(rows)
+    return f"""
+### 🔎 Tickets matching `{query}`
+
+| # | Reference Code | Employee | Issue | Priority | Level | Status |
+|---|----------------|----------|-------|----------|-------|--------|
+{rows}
+"""
+
 def notAdmin(message: str = None) -> str:
     """
     Return a formatted message indicating the user does not have admin privileges.
@@ -290,51 +766,315 @@ def notAdmin(message: str = None) -> str:
 
 def show_tickets_for_update():
     """
-    Show all tickets for the current employee, formatted for update selection. No arguments required.
+    Show the first page of tickets for the current employee, formatted for update selection. No arguments required.
     """
-    global current_tech_session
-    employee_id = current_tech_session.get('employee_id')
+    employee_id = current_session().get('employee_id')
     if not employee_id:
         return "No employee ID found in session. Please authenticate first."
-    # Get tickets and store mapping of index to reference code in session
-    docs = db.collection('Tickets').where('employeeID', '==', employee_id).stream()
-    tickets = [doc.to_dict() for doc in docs]
-    ticket_map = {}
-    for idx, t in enumerate(tickets, 1):
-        ticket_map[str(idx)] = t.get('referenceCode')
-    current_tech_session['last_ticket_map'] = ticket_map
-    # Show tickets as before
-    if not tickets:
-        return f"""
-**No tickets found for employee ID `{employee_id}`.**
-"""
-    out = f"""
-### 🎫 Tickets for `{employee_id}` (Select to update)
-"""
-    for idx, t in enumerate(tickets, 1):
-        out += f"""
----
-**Ticket #{idx}**
-*ID:* `{t.get('referenceCode','N/A')}`
-*Issue:* {t.get('problemDescription','N/A')}
-*Priority:* `{t.get('priority','N/A').upper()}`
-*Level:* `{t.get('issueLevel','N/A')}`
-*Status:* `{t.get('progressReport','N/A')}`
-*Created:* `{t.get('createdAt','N/A')}`
-*Updated:* `{t.get('updatedAt','N/A')}`
-"""
-    return out
+    return _show_ticket_page(employee_id, f"Tickets for `{employee_id}` (Select to update)")
+
+# --- Execution planner for multi-intent results ---
+# Consecutive writes are committed together in one WriteBatch and consecutive reads run
+# concurrently; everything else runs on its own, in order. Results keep the input order.
+WRITE_BATCH_LIMIT = 500  # Firestore's maximum number of writes per batch
+BATCHED_WRITE_TOOLS = set(FIELD_UPDATES) | {'update_ticket_fields', 'update_employee_fields', 'delete_ticket', 'delete_employee'}
+CONCURRENT_READ_TOOLS = {'show_tickets', 'show_tickets_for_update', 'show_more_tickets', 'show_employee', 'show_employee_info', 'search_employees', 'search_tickets'}
+# Reads that also set last_ticket_map; at most one per concurrent group so the last one shown wins
+TICKET_MAP_TOOLS = {'show_tickets', 'show_tickets_for_update', 'show_more_tickets', 'search_tickets'}
+PLANNED_TOOLS = BATCHED_WRITE_TOOLS | CONCURRENT_READ_TOOLS
+_read_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool-read")
+
+def call_tool(tool: str, args: dict = None):
+    """
+    Call a tool function by name, turning failures into the usual error messages.
+    """
+    func = globals().get(tool)
+    if not func:
+        return f"Function '{tool}' not implemented."
+    try:
+        # If the function takes no arguments, call without args
+        return func(**args) if args else func()
+    except Exception as e:
+        return f"Error calling {tool}: {e}"
+
+def _plan_write(tool: str, args: dict):
+    """
+    Describe a write tool call as (doc_ref, operation, fields, success message), or None if it
+    can't be batched (unexpected arguments etc.) and must run through the tool function itself.
+    """
+    args = args or {}
+    if tool in ('delete_ticket', 'delete_employee'):
+        collection, id_arg, label = ('Tickets', 'ticket_id', 'Ticket') if tool == 'delete_ticket' else ('Employees', 'employee_id', 'Employee')
+        if set(args) != {id_arg}:
+            return None
+        return get_db().collection(collection).document(args[id_arg]), 'delete', None, f"**🗑️ {label} `{args[id_arg]}` deleted.**"
+    if tool in ('update_ticket_fields', 'update_employee_fields'):
+        collection, id_arg, label = ('Tickets', 'ticket_id', 'Ticket') if tool == 'update_ticket_fields' else ('Employees', 'employee_id', 'Employee')
+        updates = {k: v for k, v in args.items() if k != id_arg}
+        if id_arg not in args:
+            return None
+        try:
+            fields = _collect_field_updates(collection, updates)
+        except ValueError:
+            return None
+        if not fields:
+            return None
+        return get_db().collection(collection).document(args[id_arg]), 'update', fields, _format_multi_field_update(label, args[id_arg], fields)
+    collection, field, value_arg, message = FIELD_UPDATES[tool]
+    id_arg = 'ticket_id' if collection == 'Tickets' else 'employee_id'
+    if set(args) != {id_arg, value_arg}:
+        return None
+    doc_id, value = args[id_arg], args[value_arg]
+    return get_db().collection(collection).document(doc_id), 'update', {field: value}, message.format(id=doc_id, value=value)
+
+def _run_write_group(calls: list, indices: list, results: list) -> None:
+    plans = [_plan_write(*calls[i]) for i in indices]
+    if len(indices) < 2 or any(plan is None for plan in plans):
+        for i in indices:
+            results[i] = call_tool(*calls[i])
+        return
+    db = get_db()
+    exists = db.write_option(exists=True)
+    for start in range(0, len(indices), WRITE_BATCH_LIMIT):
+        chunk = list(zip(indices, plans))[start:start + WRITE_BATCH_LIMIT]
+        batch = db.batch()
+        now = datetime.now(timezone.utc)
+        writes = []
+        for i, (doc_ref, operation, fields, _) in chunk:
+            if operation == 'delete':
+                batch.delete(doc_ref, option=exists)
+            else:
+                fields = {**fields, 'updatedAt': now}
+                batch.update(doc_ref, fields)
+            collection = 'Tickets' if calls[i][0].startswith(('update_ticket', 'delete_ticket')) else 'Employees'
+            writes.append((collection, doc_ref.id, operation, fields if operation != 'delete' else None))
+        try:
+            batch.commit()
+        except _write_rejected() as e:
+            # The batch is atomic and was rejected, so nothing was applied: replay one by one to get
+            # the exact per-item outcome (e.g. which ticket does not exist). Any other error (a timeout,
+            # ServiceUnavailable) may come after the commit landed, so it propagates instead of replaying.
+            logging.info(f"Batched write of {len(chunk)} operations failed ({e}), applying individually.")
+            for i, _ in chunk:
+                results[i] = call_tool(*calls[i])
+            continue
+        for collection, doc_id, operation, fields in writes:
+            notify_write(collection, doc_id, operation, fields)
+        for i, (_, _, _, message) in chunk:
+            results[i] = message
+
+def _run_read_group(calls: list, indices: list, results: list) -> None:
+    if len(indices) < 2:
+        for i in indices:
+            results[i] = call_tool(*calls[i])
+        return
+    # Each read runs in a copy of the caller's context, so tools see the caller's session
+    futures = {i: _read_executor.submit(contextvars.copy_context().run, call_tool, *calls[i]) for i in indices}
+    for i, future in futures.items():
+        results[i] = future.result()
+
+def _plan_tool_calls(calls: list) -> list:
+    """
+    Split calls into ordered groups: ('write', [indices]), ('read', [indices]) or ('single', [index]).
+    """
+    groups = []
+    for i, (tool, _) in enumerate(calls):
+        kind = 'write' if tool in BATCHED_WRITE_TOOLS else 'read' if tool in CONCURRENT_READ_TOOLS else 'single'
+        if groups and kind != 'single' and groups[-1][0] == kind:
+            group = groups[-1][1]
+            if not (kind == 'read' and tool in TICKET_MAP_TOOLS and any(calls[j][0] in TICKET_MAP_TOOLS for j in group)):
+                group.append(i)
+                continue
+        groups.append((kind, [i]))
+    return groups
+
+def execute_tool_calls(calls: list) -> list:
+    """
+    Execute [(tool, args), ...] and return the results in the same order.
+    Consecutive independent writes become one WriteBatch commit, consecutive reads run concurrently.
+    """
+    results = [None] * len(calls)
+    for kind, indices in _plan_tool_calls(calls):
+        if kind == 'write':
+            _run_write_group(calls, indices, results)
+        elif kind == 'read':
+            _run_read_group(calls, indices, results)
+        else:
+            results[indices[0]] = call_tool(*calls[indices[0]])
+    return results
+
 # Initialize NVIDIA OpenAI client
 # You can set your API key as an environment variable: NVIDIA_API_KEY
 # Or replace the os.getenv() with your actual API key
-client = OpenAI(
-    base_url="https://integrate.api.nvidia.com/v1",
-    # api_key=os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Baseline Tests
-    # api_key=os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Prompt Injection Tests
-    # api_key=os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Indirect Reference Tests
-    # api_key=os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Arithmatic Tests
-    api_key=os.getenv("") # Second Arithamtic Tests
-)
+NVIDIA_BASE_URL = "https://integrate.api.nvidia.com/v1"
+# NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Baseline Tests
+# NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Prompt Injection Tests
+# NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Indirect Reference Tests
+# NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY", "YOUR OWN NVIDIA API KEY")  # Arithmatic Tests
+NVIDIA_API_KEY = os.getenv("") # Second Arithamtic Tests
+
+# LLM call settings
+LLM_MODEL = "openai/gpt-oss-120b"
+# LLM_MODEL = "qwen/qwen3-coder-480b-a35b-instruct"
+# LLM_MODEL = "qwen/qwen3-next-80b-a3b-thinking"
+
+# Per-call-site model routing. A route may set "model", "max_tokens" and "temperature"; whatever
+# it leaves out comes from the "default" route (model: LLM_MODEL). Arguments passed explicitly to
+# invoke_llm still win. LLM_MODEL_ROUTES (JSON) overrides routes without touching call sites, e.g.
+#   LLM_MODEL_ROUTES='{"severity": {"model": "meta/llama-3.1-8b-instruct", "temperature": 0}}'
+# Compare candidates for a call site first with benchmarks/modelComparison.py.
+MODEL_ROUTES = {
+    "default": {"max_tokens": 2048, "temperature": 0.7},
+    "intent": {},
+    "intent_llm2": {},
+    "severity": {},
+    "bulk_triage": {},  # packed severity requests, several tickets each (see bulkTriage)
+    "advice": {"max_tokens": 8192},  # long-form troubleshooting answers
+    "missing_arg": {},
+    "chat": {"max_tokens": 4096},  # generate_response (general questions)
+}
+for _call_site, _route in _json.loads(os.getenv("LLM_MODEL_ROUTES", "{}")).items():
+    MODEL_ROUTES.setdefault(_call_site, {}).update(_route)
+
+def resolve_model_route(call_site: str, model: str = None, max_tokens: int = None, temperature: float = None) -> dict:
+    """
+    Model, max_tokens and temperature for a call: explicit arguments, then the call site's
+    route, then the default route.
+    """
+    route = {**MODEL_ROUTES.get("default", {}), **MODEL_ROUTES.get(call_site, {})}
+    return {
+        "model": model or route.get("model") or LLM_MODEL,
+        "max_tokens": max_tokens if max_tokens is not None else route.get("max_tokens", 2048),
+        "temperature": temperature if temperature is not None else route.get("temperature", 0.7),
+    }
+LLM_CALL_TIMEOUT = 30  # seconds, hard deadline for a single attempt
+LLM_RETRIES = 3
+# Exponential backoff with full jitter between attempts: up to LLM_BACKOFF_BASE * 2**n seconds, capped
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 8.0
+# Slack invoke_llm allows on top of all attempts and retry delays before it gives up on a call
+LLM_DEADLINE_GRACE = 5  # seconds
+# Per-model circuit breaker: fail fast after this many consecutive failures, probe again after the reset
+LLM_BREAKER_FAILURES = 5
+LLM_BREAKER_RESET = 30  # seconds
+# Hedged requests (non-streaming calls only): if the primary model hasn't answered after the call
+# site's p95 latency, send the same request to the first alternate model and take the first success
+LLM_HEDGING = os.getenv("LLM_HEDGING", "0") == "1"
+LLM_HEDGE_MODELS = ["qwen/qwen3-coder-480b-a35b-instruct", "qwen/qwen3-next-80b-a3b-thinking"]
+LLM_HEDGE_QUANTILE = 0.95
+LLM_HEDGE_MIN_DELAY = 1.0  # seconds
+LLM_HEDGE_DEFAULT_DELAY = 5.0  # seconds, until the call site has latency history
+# Shared keep-alive connection pool so retries and later calls reuse the TLS session
+LLM_MAX_CONNECTIONS = 20
+LLM_MAX_KEEPALIVE_CONNECTIONS = 10
+LLM_KEEPALIVE_EXPIRY = 60  # seconds
+
+# One AsyncOpenAI client per event loop (httpx pools are bound to the loop they were created on)
+_async_clients = weakref.WeakKeyDictionary()
+# Background event loop used by the synchronous invoke_llm() shim
+_llm_loop = None
+_llm_loop_lock = threading.Lock()
+
+# Response cache, opt-in per call site via invoke_llm(..., cache=True). Set LLM_CACHE_PATH="" for memory only.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "firebaseTests/llm_cache.sqlite3")
+LLM_CACHE_TTL = 24 * 3600  # seconds
+llm_cache = None
+
+def get_llm_cache():
+    """
+    Return the shared LLM response cache, creating the default two-tier cache on first use.
+    """
+    global llm_cache
+    if llm_cache is None:
+        llm_cache = LLMResponseCache(path=LLM_CACHE_PATH or None, ttl=LLM_CACHE_TTL)
+    return llm_cache
+
+def set_llm_cache(cache) -> None:
+    """
+    Plug in a different cache backend (any object with get(key), set(key, value) and stats()).
+    """
+    global llm_cache
+    llm_cache = cache
+
+def llm_cache_stats() -> dict:
+    return get_llm_cache().stats()
+
+# Record/replay cassettes for offline load tests (see llmCassette). LLM_CASSETTE_MODE="record" stores
+# every successful response with its measured latency in LLM_CASSETTE_PATH; "replay" serves them from
+# there without calling the endpoint, after the recorded latency or, with LLM_CASSETTE_LATENCY="zero", at once.
+# The response cache is bypassed while a cassette is active.
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "firebaseTests/llm_cassette.sqlite3")
+LLM_CASSETTE_LATENCY = os.getenv("LLM_CASSETTE_LATENCY", "recorded")
+llm_cassette = None
+_llm_cassette_lock = threading.Lock()
+
+def get_llm_cassette():
+    """
+    Return the active cassette, opening LLM_CASSETTE_PATH on first use, or None when not recording/replaying.
+    """
+    global llm_cassette
+    if llm_cassette is None and LLM_CASSETTE_MODE:
+        with _llm_cassette_lock:
+            if llm_cassette is None:
+                llm_cassette = LLMCassette(LLM_CASSETTE_PATH, mode=LLM_CASSETTE_MODE)
+    return llm_cassette
+
+def set_llm_cassette(cassette) -> None:
+    """
+    Switch cassettes at runtime (e.g. LLMCassette(path, mode='replay')), or pass None to call the endpoint.
+    """
+    global llm_cassette
+    llm_cassette = cassette
+
+# Prompt sizes (tokens) of the LLM requests actually sent, per call site
+prompt_sizes = PromptSizeTracker()
+
+# Per-call latency / token / retry metrics. LLM_METRICS_JSONL appends every call record to a file.
+llm_metrics = LLMMetrics(jsonl_path=os.getenv("LLM_METRICS_JSONL") or None)
+
+def prompt_size_report() -> dict:
+    return prompt_sizes.report()
+
+def get_async_llm_client() -> "AsyncOpenAI":
+    """
+    Return the AsyncOpenAI client for the running event loop, creating it (and its pooled
+    keep-alive HTTP client) on first use.
+    """
+    import httpx
+    from openai import AsyncOpenAI
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            # Backstop only, the per-attempt deadline is enforced in ainvoke_llm
+            timeout=httpx.Timeout(LLM_CALL_TIMEOUT, connect=10.0),
+        )
+        async_client = AsyncOpenAI(
+            base_url=NVIDIA_BASE_URL,
+            api_key=NVIDIA_API_KEY,
+            http_client=http_client,
+            max_retries=0,  # retries are handled by ainvoke_llm
+        )
+        _async_clients[loop] = async_client
+    return async_client
+
+def _get_llm_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide background event loop, starting its thread on first use.
+    """
+    global _llm_loop
+    with _llm_loop_lock:
+        if _llm_loop is None or _llm_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+            _llm_loop = loop
+    return _llm_loop
 
 def make_json_serializable(obj):
     """
@@ -350,97 +1090,422 @@ def make_json_serializable(obj):
     else:
         return obj
     
-def invoke_llm(prompt: str, max_tokens: int = 2048, temperature: float = 0.7) -> str:
+def llm_error_message(error) -> str:
     """
-    Helper function to invoke the NVIDIA LLM with consistent parameters.
+    User-facing text for a failed LLM call (an LLMError).
+    """
+    if isinstance(error, LLMUnavailableError):
+        return "I apologize, but the AI service is currently unavailable. Please try again in a minute."
+    return f"I apologize, but I'm having trouble processing your request right now. Error: {error}"
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(model)
+        if breaker is None:
+            breaker = _circuit_breakers[model] = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET)
+        return breaker
+
+def _retry_delay(attempt: int) -> float:
+    return backoff_delay(attempt - 1, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX)
+
+def _llm_messages(prompt: str, system_prompt: str = None) -> list:
+    # A fixed system prompt goes first so the server can reuse its cached prefix across calls
+    messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+def _start_llm_call(call_site: str, model: str, stream: bool, queued_at: float = None) -> dict:
+    """
+    New metrics record for one LLM call (see llmMetrics); completed by _finish_llm_call.
+    """
+    now = time.perf_counter()
+    return {
+        'call_site': call_site, 'model': model, 'stream': stream, 'outcome': 'error',
+        'attempts': 0, 'retries': 0, 'queue_wait': now - queued_at if queued_at is not None else 0.0,
+        'ttft': None, 'latency': None, 'prompt_tokens': None, 'completion_tokens': None, 'error': None,
+        '_started': now,
+    }
+
+def _finish_llm_call(call: dict) -> None:
+    call['latency'] = time.perf_counter() - call.pop('_started')
+    call['retries'] = max(call['attempts'] - 1, 0)
+    try:
+        llm_metrics.record(call)
+    except Exception as e:
+        logging.error(f"Recording LLM metrics failed: {e}")
+
+def _record_usage(call: dict, usage) -> None:
+    if usage is not None:
+        call['prompt_tokens'] = getattr(usage, 'prompt_tokens', None)
+        call['completion_tokens'] = getattr(usage, 'completion_tokens', None)
+
+async def ainvoke_llm(prompt: str, max_tokens: int = None, temperature: float = None, timeout: float = LLM_CALL_TIMEOUT, cache: bool = False,
+                      system_prompt: str = None, call_site: str = "default", queued_at: float = None, model: str = None,
+                      validate=None) -> str:
     """
-    import time
-    import logging
-    from threading import Timer
-    retries = 3
-    delay = 2  # seconds
+    Async version of invoke_llm. Each attempt is cancelled once it exceeds `timeout` seconds,
+    and cancelling the awaiting task aborts the in-flight HTTP request.
+    With cache=True, successful responses are served from / stored in the LLM response cache;
+    validate(response) -> bool, when given, decides which responses are usable enough to cache.
+    queued_at is the time.perf_counter() at which the call was submitted, for the queue-wait metric.
+    """
+    route = resolve_model_route(call_site, model, max_tokens, temperature)
+    call = _start_llm_call(call_site, route["model"], False, queued_at)
+    try:
+        return await _ainvoke_llm(call, prompt, route["max_tokens"], route["temperature"], timeout, cache, system_prompt, validate)
+    except asyncio.CancelledError:
+        call['outcome'] = 'cancelled'
+        raise
+    finally:
+        _finish_llm_call(call)
+
+async def _ainvoke_llm(call, prompt, max_tokens, temperature, timeout, cache, system_prompt, validate=None) -> str:
+    logging.basicConfig(level=logging.INFO)
+    cassette = get_llm_cassette()
+    cache_key = None
+    # No response cache under a cassette: recording must see every request, and replay must keep the recorded latencies
+    if cache and cassette is None:
+        cache_key = make_cache_key(call['model'], temperature, max_tokens, prompt, system_prompt)
+        cached = get_llm_cache().get(cache_key)
+        # An entry the caller can't use (stored before it validated) is fetched again and replaced
+        if cached is not None and (validate is None or validate(cached)):
+            logging.info(f"LLM cache hit for prompt: {prompt[:100]}...")
+            call['outcome'] = 'cache_hit'
+            return cached
+    prompt_sizes.record(call['call_site'], prompt, system_prompt)
+    cassette_key = make_cache_key(call['model'], temperature, max_tokens, prompt, system_prompt) if cassette else None
+    if cassette is not None and cassette.mode == 'replay':
+        take = await _replay_take(call, cassette, cassette_key)
+        await asyncio.sleep(take['latency'] if LLM_CASSETTE_LATENCY == 'recorded' else 0)
+        return take['response']
+    messages = _llm_messages(prompt, system_prompt)
+    last_error = None
+    for attempt in range(LLM_RETRIES):
+        if attempt:
+            await asyncio.sleep(_retry_delay(attempt))
+        call['attempts'] = attempt + 1
+        logging.info(f"Calling NVIDIA LLM (attempt {attempt+1}) with prompt: {prompt[:100]}...")
+        attempt_started = time.perf_counter()
+        try:
+            content, usage, model = await _hedged_completion(call, messages, max_tokens, temperature, timeout)
+        except LLMUnavailableError as e:
+            # Circuit open: fail fast, retrying would only wait for the same answer
+            call['outcome'] = 'circuit_open'
+            call['error'] = str(e)
+            e.attempts = attempt
+            raise
+        except LLMError as e:
+            last_error = e
+            call['outcome'] = 'timeout' if isinstance(e, LLMTimeoutError) else 'error'
+            logging.error(f"Error calling NVIDIA LLM (attempt {attempt+1}): {e}")
+            continue
+        _record_usage(call, usage)
+        call['model'] = model
+        logging.info(f"LLM response: {content[:100]}")
+        call['outcome'] = 'ok'
+        if cache_key is not None and (validate is None or validate(content)):
+            get_llm_cache().set(cache_key, content)
+        if cassette is not None:
+            _record_take(cassette, cassette_key, call, content, time.perf_counter() - attempt_started)
+        return content
+    logging.error(f"Final LLM error after retries: {last_error}")
+    call['error'] = str(last_error)
+    last_error.attempts = LLM_RETRIES
+    raise last_error
+
+async def _replay_take(call: dict, cassette, key: str) -> dict:
+    """
+    Next recorded take for the request, with its token counts put on the call's metrics record.
+    Raises CassetteMissError if the request was never recorded.
+    """
+    call['attempts'] = 1
+    take = cassette.play(key)
+    if take is None:
+        call['error'] = "not on cassette"
+        raise CassetteMissError(f"No recorded LLM response for this {call['call_site']} request.", attempts=1, model=call['model'])
+    call['prompt_tokens'] = take['prompt_tokens']
+    call['completion_tokens'] = take['completion_tokens']
+    call['outcome'] = 'ok'
+    call['replayed'] = True
+    return take
+
+def _record_take(cassette, key: str, call: dict, content: str, latency: float, ttft: float = None) -> None:
+    try:
+        cassette.record(key, content, latency, ttft=ttft, call_site=call['call_site'], model=call['model'],
+                        prompt_tokens=call['prompt_tokens'], completion_tokens=call['completion_tokens'])
+    except Exception as e:
+        logging.error(f"Recording LLM response on cassette failed: {e}")
+
+async def _completion_once(model: str, messages: list, max_tokens: int, temperature: float, timeout: float):
+    """
+    One chat completion request to model, guarded by its circuit breaker.
+    Returns (content, usage); raises an LLMError subclass on failure.
+    """
+    breaker = get_circuit_breaker(model)
+    if not breaker.allow():
+        raise LLMUnavailableError(f"{model} is failing, circuit open for another {breaker.retry_after():.0f} seconds.", model=model)
+    try:
+        completion = await asyncio.wait_for(
+            get_async_llm_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                top_p=1,
+                max_tokens=max_tokens,
+                stream=False
+            ),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        breaker.record_failure()
+        raise LLMTimeoutError(f"LLM call timed out after {timeout} seconds.", model=model)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        breaker.record_failure()
+        raise LLMError(str(e), model=model) from e
+    # The endpoint answered, so it is healthy even if the answer is unusable
+    breaker.record_success()
+    if not completion or not getattr(completion, 'choices', None):
+        raise LLMResponseError("No response from LLM API.", model=model)
+    message = getattr(completion.choices[0], 'message', None)
+    content = (getattr(message, 'content', None) or '').strip()
+    if not content:
+        raise LLMResponseError("Empty response from LLM.", model=model)
+    return content, getattr(completion, 'usage', None)
+
+def _hedge_delay(call_site: str, model: str) -> float:
+    # Only calls that reached the model count: cache hits and replays would pull the p95 towards zero
+    p95 = llm_metrics.quantile(call_site, LLM_HEDGE_QUANTILE, model=model, outcome='ok')
+    return max(LLM_HEDGE_MIN_DELAY, p95 if p95 is not None else LLM_HEDGE_DEFAULT_DELAY)
+
+async def _hedged_completion(call: dict, messages: list, max_tokens: int, temperature: float, timeout: float):
+    """
+    One attempt against the call's routed model. With LLM_HEDGING, a duplicate request goes to the
+    first alternate model if the primary is slower than the call site's p95; the first success
+    wins and the other request is cancelled. The attempt as a whole is still bounded by `timeout`.
+    Returns (content, usage, model).
+    """
+    primary_model = call['model']
+    hedge_models = [m for m in LLM_HEDGE_MODELS if m != primary_model] if LLM_HEDGING else []
+    if not hedge_models:
+        content, usage = await _completion_once(primary_model, messages, max_tokens, temperature, timeout)
+        return content, usage, primary_model
+    delay = _hedge_delay(call['call_site'], primary_model)
+    primary = asyncio.ensure_future(_completion_once(primary_model, messages, max_tokens, temperature, timeout))
+    models = {primary: primary_model}
+    try:
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if not done and timeout > delay:
+            hedge_model = hedge_models[0]
+            hedge = asyncio.ensure_future(_completion_once(hedge_model, messages, max_tokens, temperature, timeout - delay))
+            models[hedge] = hedge_model
+            call['hedged'] = True
+            logging.info(f"Hedging {call['call_site']} call to {hedge_model} after {delay:.2f}s")
+        pending = set(models)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    content, usage = task.result()
+                    return content, usage, models[task]
+        # Both failed: report the primary model's failure
+        raise primary.exception()
+    finally:
+        for task in models:
+            if not task.done():
+                task.cancel()
+
+async def astream_llm(prompt: str, max_tokens: int = None, temperature: float = None, timeout: float = LLM_CALL_TIMEOUT,
+                      system_prompt: str = None, call_site: str = "default", queued_at: float = None, model: str = None):
+    """
+    Async generator yielding the LLM response in content chunks as they are generated.
+    `timeout` bounds the wait for the first chunk and for each following chunk.
+    An attempt is only retried if it failed before anything was yielded.
+    """
+    route = resolve_model_route(call_site, model, max_tokens, temperature)
+    call = _start_llm_call(call_site, route["model"], True, queued_at)
+    try:
+        async for text in _astream_llm(call, prompt, route["max_tokens"], route["temperature"], timeout, system_prompt):
+            yield text
+    except (asyncio.CancelledError, GeneratorExit):
+        call['outcome'] = 'cancelled'
+        raise
+    finally:
+        _finish_llm_call(call)
+
+async def _astream_llm(call, prompt, max_tokens, temperature, timeout, system_prompt):
     last_error = None
     logging.basicConfig(level=logging.INFO)
-    def timeout_handler():
-        logging.error("LLM call timed out.")
-    for attempt in range(retries):
+    prompt_sizes.record(call['call_site'], prompt, system_prompt)
+    cassette = get_llm_cassette()
+    cassette_key = make_cache_key(call['model'], temperature, max_tokens, prompt, system_prompt) if cassette else None
+    if cassette is not None and cassette.mode == 'replay':
+        take = await _replay_take(call, cassette, cassette_key)
+        async for text in _replay_stream(call, take):
+            yield text
+        return
+    messages = _llm_messages(prompt, system_prompt)
+    async_client = get_async_llm_client()
+    model = call['model']
+    breaker = get_circuit_breaker(model)
+    for attempt in range(LLM_RETRIES):
+        if attempt:
+            await asyncio.sleep(_retry_delay(attempt))
+        if not breaker.allow():
+            call['outcome'] = 'circuit_open'
+            raise LLMUnavailableError(f"{model} is failing, circuit open for another {breaker.retry_after():.0f} seconds.",
+                                      attempts=attempt, model=model)
+        call['attempts'] = attempt + 1
+        logging.info(f"Streaming NVIDIA LLM (attempt {attempt+1}) with prompt: {prompt[:100]}...")
+        attempt_started = time.perf_counter()
+        attempt_ttft = None
+        parts = []
+        yielded = False
         try:
-            logging.info(f"Calling NVIDIA LLM (attempt {attempt+1}) with prompt: {prompt[:100]}...")
-            # Set a timeout for the LLM call (simulate with Timer)
-            result = [None]
-            def call_llm():
+            stream = await asyncio.wait_for(
+                async_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    top_p=1,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True},  # final chunk carries completion.usage
+                ),
+                timeout=timeout,
+            )
+            chunks = stream.__aiter__()
+            while True:
                 try:
-                    result[0] = client.chat.completions.create(
-                        model="openai/gpt-oss-120b",
-                        # model="qwen/qwen3-coder-480b-a35b-instruct",
-                        # model="qwen/qwen3-next-80b-a3b-thinking",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=temperature,
-                        top_p=1,
-                        max_tokens=max_tokens,
-                        stream=False
-                    )
-                except Exception as e:
-                    result[0] = e
-            t = Timer(30, timeout_handler)  # 30 second timeout
-            t.start()
-            call_llm()
-            t.cancel()
-            completion = result[0]
-            if isinstance(completion, Exception):
-                last_error = str(completion)
-                logging.error(f"LLM call error: {last_error}")
-                time.sleep(delay)
-                continue
-            if not completion or not hasattr(completion, 'choices') or not completion.choices:
-                last_error = "No response from LLM API."
-                logging.error(last_error)
-                time.sleep(delay)
-                continue
-            message = getattr(completion.choices[0], 'message', None)
-            if not message or not hasattr(message, 'content'):
-                last_error = "No message content in LLM response."
-                logging.error(last_error)
-                time.sleep(delay)
-                continue
-            content = message.content.strip()
-            if not content:
-                last_error = "Empty response from LLM."
-                logging.error(last_error)
-                time.sleep(delay)
-                continue
-            logging.info(f"LLM response: {content[:100]}")
-            return content
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                _record_usage(call, getattr(chunk, 'usage', None))
+                delta = getattr(chunk.choices[0], 'delta', None) if chunk.choices else None
+                text = getattr(delta, 'content', None) if delta else None
+                if text:
+                    if not yielded:
+                        call['ttft'] = time.perf_counter() - call['_started']
+                        attempt_ttft = time.perf_counter() - attempt_started
+                        breaker.record_success()
+                    yielded = True
+                    parts.append(text)
+                    yield text
+            if yielded:
+                call['outcome'] = 'ok'
+                if cassette is not None:
+                    _record_take(cassette, cassette_key, call, ''.join(parts), time.perf_counter() - attempt_started, attempt_ttft)
+                return
+            breaker.record_success()
+            last_error = LLMResponseError("Empty response from LLM.", model=model)
+            call['outcome'] = 'error'
+            logging.error(last_error)
+        except asyncio.TimeoutError:
+            last_error = LLMTimeoutError(f"LLM stream stalled for more than {timeout} seconds.", model=model)
+            call['outcome'] = 'timeout'
+            logging.error(last_error)
+            if not yielded:
+                breaker.record_failure()
         except Exception as e:
-            last_error = str(e)
-            logging.error(f"Error calling NVIDIA LLM (attempt {attempt+1}): {e}")
-            time.sleep(delay)
+            last_error = LLMError(str(e), model=model)
+            call['outcome'] = 'error'
+            logging.error(f"Error streaming NVIDIA LLM (attempt {attempt+1}): {e}")
+            if not yielded:
+                breaker.record_failure()
+        except (asyncio.CancelledError, GeneratorExit):
+            if not yielded:
+                breaker.release()
+            raise
+        if yielded:
+            # Part of the answer has already been delivered, so don't start it over
+            call['outcome'] = 'interrupted'
+            call['error'] = str(last_error)
+            last_error.attempts = attempt + 1
+            raise last_error
     logging.error(f"Final LLM error after retries: {last_error}")
-    return f"I apologize, but I'm having trouble processing your request right now. Error: {last_error}"
-
-# Global variable to store the current tech support session context
-current_tech_session = {
-    'employee_id': None,
-    'original_issue': None,
-    'in_session': False,
-    'authenticated': False,  # Track if user is authenticated with employee ID
-    'awaiting_ticket_response': False,  # Track if we're waiting for user response to ticket prompt
-    'last_issue_description': None,  # Store the issue for potential ticket creation
-    'awaiting_ticket_management': False,  # Track if we're in ticket management mode
-    'current_tickets': None,  # Store current user's tickets
-    'selected_ticket': None,  # Store the selected ticket for operations
-    'management_action': None,  # Store the action (update/delete)
-    'update_field': None  # Store which field is being updated
-}
+    call['error'] = str(last_error)
+    last_error.attempts = LLM_RETRIES
+    raise last_error
 
-def analyze_issue_severity(issue_description: str):
+async def _replay_stream(call: dict, take: dict):
     """
-    Use LLM to analyze the issue description and determine appropriate issue level and priority.
-    Returns tuple: (issue_level, priority)
+    Yield a recorded response in word chunks, paced to its recorded time to first token and latency
+    (or all at once with LLM_CASSETTE_LATENCY="zero").
     """
-    analysis_prompt = f"""
-    Analyze the following IT support issue description and determine:
-    1. Issue Level (L0-L4):
+    words = re.findall(r'\S+\s*|\s+', take['response'])
+    chunks = [''.join(words[i:i + 3]) for i in range(0, len(words), 3)] or ['']
+    paced = LLM_CASSETTE_LATENCY == 'recorded'
+    ttft = take['ttft'] if take['ttft'] is not None else take['latency']
+    interval = max(take['latency'] - ttft, 0) / len(chunks) if paced else 0
+    await asyncio.sleep(ttft if paced else 0)
+    call['ttft'] = time.perf_counter() - call['_started']
+    for i, chunk in enumerate(chunks):
+        if i:
+            await asyncio.sleep(interval)
+        yield chunk
+
+def _iter_on_llm_loop(agen):
+    """
+    Drive an async generator on the background LLM loop and yield its items synchronously.
+    Closing this generator early closes the async one, which aborts the HTTP stream.
+    """
+    loop = _get_llm_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+def invoke_llm(prompt: str, max_tokens: int = None, temperature: float = None, timeout: float = LLM_CALL_TIMEOUT, stream: bool = False, cache: bool = False,
+               system_prompt: str = None, call_site: str = "default", model: str = None, validate=None):
+    """
+    Helper function to invoke the NVIDIA LLM with consistent parameters.
+    Synchronous shim over ainvoke_llm: the call runs on the shared background event loop and
+    is cancelled if the caller's overall deadline (all attempts plus retry delays) passes.
+    With stream=True, returns a generator of text chunks instead of the full string.
+    With cache=True, identical (normalized) prompts are answered from the response cache; only
+    responses accepted by validate(response) -> bool are stored, so a malformed answer is not
+    served again to the caller's retry.
+    system_prompt is sent as a separate system message ahead of prompt; call_site labels the
+    call in prompt_size_report() and the LLM metrics (llm_metrics) and selects its MODEL_ROUTES
+    entry. model, max_tokens and temperature override the route when given.
+    """
+    queued_at = time.perf_counter()
+    if stream:
+        return _iter_on_llm_loop(astream_llm(prompt, max_tokens=max_tokens, temperature=temperature, timeout=timeout,
+                                             system_prompt=system_prompt, call_site=call_site, queued_at=queued_at, model=model))
+    future = asyncio.run_coroutine_threadsafe(
+        ainvoke_llm(prompt, max_tokens=max_tokens, temperature=temperature, timeout=timeout, cache=cache,
+                    system_prompt=system_prompt, call_site=call_site, queued_at=queued_at, model=model, validate=validate),
+        _get_llm_loop(),
+    )
+    deadline = LLM_RETRIES * timeout + sum(min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** i) for i in range(LLM_RETRIES - 1)) + LLM_DEADLINE_GRACE
+    try:
+        return future.result(deadline)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        logging.error(f"LLM call exceeded overall deadline of {deadline} seconds, cancelled.")
+        raise LLMTimeoutError(f"LLM call timed out after {deadline} seconds.", model=resolve_model_route(call_site, model)["model"])
+    except BaseException:
+        # e.g. KeyboardInterrupt or a Streamlit rerun: don't leave the request running
+        future.cancel()
+        raise
+
+# Session state of the user being served. Each request binds its user's TechSession (handle_command
+# does it for its session argument, the UI per script run), and this proxy reads/writes whichever
+# session is bound, so concurrent users in one process never see each other's state (see techSession).
+current_tech_session = SessionProxy()
+
+# Level/priority rubric shared by the single-ticket and bulk triage prompts (see bulkTriage)
+SEVERITY_GUIDE = '''    1. Issue Level (L0-L4):
        - L0: Critical system outage, complete service failure, security breach
        - L1: High impact, service severely degraded, affects multiple users
        - L2: Medium impact, service partially affected, workaround available
@@ -450,7 +1515,23 @@ def analyze_issue_severity(issue_description: str):
     2. Priority (low, medium, high):
        - high: Urgent, business critical, blocks work completely
        - medium: Important but not urgent, has workaround
-       - low: Nice to have, minimal business impact
+       - low: Nice to have, minimal business impact'''
+
+def _parse_severity(result: str):
+    level_match = re.search(r'LEVEL:(L[0-4])', result, re.I)
+    priority_match = re.search(r'PRIORITY:(low|medium|high)', result, re.I)
+    return level_match, priority_match
+
+def analyze_issue_severity(issue_description: str, strict: bool = False, cache: bool = True):
+    """
+    Use LLM to analyze the issue description and determine appropriate issue level and priority.
+    Returns tuple: (issue_level, priority)
+    With strict=True, raises instead of falling back to the L2/medium defaults.
+    Retries should pass cache=False so they get a fresh answer.
+    """
+    analysis_prompt = f"""
+    Analyze the following IT support issue description and determine:
+{SEVERITY_GUIDE}
 
     Issue Description: "{issue_description}"
 
@@ -458,26 +1539,28 @@ def analyze_issue_severity(issue_description: str):
     """
     
     try:
-        result = invoke_llm(analysis_prompt)
+        result = invoke_llm(analysis_prompt, cache=cache, call_site="severity", validate=lambda text: all(_parse_severity(text)))
         # Parse the response
-        import re
-        level_match = re.search(r'LEVEL:(L[0-4])', result, re.I)
-        priority_match = re.search(r'PRIORITY:(low|medium|high)', result, re.I)
+        level_match, priority_match = _parse_severity(result)
+        if strict and not (level_match and priority_match):
+            raise ValueError(f"Unparseable severity response: {result[:100]}")
         
         issue_level = level_match.group(1) if level_match else 'L2'  # Default to L2
         priority = priority_match.group(1).lower() if priority_match else 'medium'  # Default to medium
         
         return issue_level, priority
     except Exception as e:
+        if strict:
+            raise
         # Fallback to defaults if LLM analysis fails
-        print(f"Issue analysis failed, using defaults: {e}")
+        logging.warning(f"Issue analysis failed, using defaults: {e}")
         return 'L2', 'medium'
 
 def retrieve_all_employees():
     """
     Retrieve all employee documents from the Employees collection.
     """
-    docs = db.collection('Employees').stream()
+    docs = get_db().collection('Employees').stream()
     employees = []
     for doc in docs:
         data = doc.to_dict()
@@ -510,7 +1593,10 @@ Respond ONLY with a JSON object:
   "message": "..."  # What to say to the user
 }}
 """
-    response = invoke_llm(prompt)
+    try:
+        response = invoke_llm(prompt, call_site="missing_arg")
+    except LLMError as e:
+        return {"status": "ask_again", "args": {}, "message": llm_error_message(e)}
     try:
         result = _json.loads(response)
     except Exception:
@@ -518,36 +1604,59 @@ Respond ONLY with a JSON object:
         return {"status": "ask_again", "args": {}, "message": response}
     return result
 
-def process_prompt_for_tool_call(user_request: str, user_role: str = None, tech_session=None, llm_func=None, chat_history=None) -> str:
-    """
-    Constructs the intent prompt and calls the provided LLM function.
-    Returns the raw LLM result (JSON string).
-    """
-    session = tech_session if tech_session is not None else globals().get('current_tech_session', {})
-    employee_id = session.get('employee_id')
-    last_issue_description = session.get('last_issue_description')
-    role = user_role if user_role else "user"
-    ticket_map = session.get('last_ticket_map', {})
-    ticket_map_str = '\n'.join([f"{k}: {v}" for k, v in ticket_map.items()]) if ticket_map else 'None'
-    
-    # Format chat history for context
-    history_str = ""
-    if chat_history and len(chat_history) > 0:
-        # Include last 5 messages for context (to avoid token limits)
-        recent_history = chat_history[-5:] if len(chat_history) > 5 else chat_history
-        history_entries = []
-        for msg in recent_history:
-            role_name = msg.get('role', 'unknown')
-            content = msg.get('content', '')
-            # Truncate very long messages
-            if len(content) > 200:
-                content = content[:200] + "..."
-            history_entries.append(f"{role_name.upper()}: {content}")
-        history_str = '\n'.join(history_entries)
-    else:
-        history_str = "No previous conversation history available."
-    
-    intent_prompt = f'''
+# Few-shot examples for the intent prompt: (user message, expected tool list).
+# Also used as training data for the local intent classifier.
+INTENT_FEW_SHOT_EXAMPLES = [
+    ("Update my ticket", [
+        {"tool": "show_tickets_for_update", "args": {}, "missing_args": []},
+    ]),
+    ("Can I delete a ticket?", [
+        {"tool": "show_tickets_for_update", "args": {}, "missing_args": []},
+    ]),
+    ("Update my ticket 1234 to high priority", [
+        {"tool": "update_ticket_priority", "args": {"ticket_id": "1234", "new_priority": "high"}, "missing_args": []},
+    ]),
+    ("Update my ticket but I don't remember the number", [
+        {"tool": "show_tickets_for_update", "args": {}, "missing_args": []},
+    ]),
+    ("Update my ticket 1234 but I don't know what to change", [
+        {"tool": "show_tickets_for_update", "args": {}, "missing_args": []},
+        {"tool": "update_ticket_priority", "args": {"ticket_id": "1234"}, "missing_args": ["new_priority"]},
+    ]),
+    ("My internet is really slow", [
+        {"tool": "provide_tech_support_advice", "args": {"issue_description": "My internet is really slow"}, "missing_args": []},
+    ]),
+    ("How does this work?", [
+        {"tool": "none", "args": {}, "missing_args": []},
+    ]),
+]
+
+def format_intent_examples(examples) -> str:
+    blocks = []
+    for user_message, response in examples:
+        lines = ',\n'.join(f"    {_json.dumps(item)}" for item in response)
+        blocks.append(f'User: "{user_message}"\nResponse:\n[\n{lines}\n]')
+    return '\n\n'.join(blocks)
+
+# Combined-schema mode: the intent engine also classifies severity for create_ticket,
+# so create_ticket can skip its separate analyze_issue_severity call
+INTENT_COMBINED_SEVERITY = os.getenv("INTENT_COMBINED_SEVERITY", "0") == "1"
+
+COMBINED_SEVERITY_INSTRUCTIONS = """
+- When selecting create_ticket, also classify the issue and include "issue_level" and "priority" in its args:
+    - issue_level (L0-L4): L0 critical outage/security breach, L1 high impact/multiple users, L2 partial impact with workaround, L3 minor/single user, L4 informational/request.
+    - priority (low, medium, high): high blocks work completely, medium important with workaround, low minimal business impact.
+    - These two are never listed in "missing_args"; omit them only if there is no description."""
+
+# Compact mode: keep the few-shot examples out of the system prompt and send only the
+# INTENT_COMPACT_EXAMPLES most similar to the request (chosen by the local TF-IDF model)
+INTENT_COMPACT_PROMPT = os.getenv("INTENT_COMPACT_PROMPT", "0") == "1"
+INTENT_COMPACT_EXAMPLES = 3
+
+# Static part of the intent prompt. It never contains per-user or per-request data, so it is
+# byte-identical across calls (for a given mode) and the server can reuse its cached prefix.
+# The dynamic sections it refers to (User Role, RECENT CHAT HISTORY, ...) follow in the user message.
+INTENT_SYSTEM_PROMPT_TEMPLATE = '''
 ADMIN FUNCTION RESTRICTIONS:
 
 - The following functions are **admin-only** and must NOT be called unless the user's role is "admin":
@@ -562,35 +1671,28 @@ ADMIN FUNCTION RESTRICTIONS:
 
 - If a regular user requests an admin-only function, return a tool called "notAdmin" with a message explaining they do not have privileges.
 
-- Always check the user's role before selecting a tool. If the user's role is not "admin", do not allow admin-only functions.
-
-User Role: "{role}"
-Current Employee ID: "{employee_id}"
-
-RECENT CHAT HISTORY (for context):
-{history_str}
+- Always check the user's role (User Role in the request details) before selecting a tool. If the user's role is not "admin", do not allow admin-only functions.
 
 You are an intent and argument extraction engine for a tech support system. Your job is to:
 1. Select the most appropriate tool(s)/function(s) to call (see list below). You may return a single tool or a list of tools to execute in order, if the user's request requires multiple steps (e.g., show tickets before updating, or show then update).
 2. Extract as many arguments as possible from the user's request and recent context.
 3. Identify which required arguments are missing (if any).
-4. Use the chat history to understand context and previous responses to make better decisions about what tools to call. If they want to refer to a previous response then look through {history_str} to get it and come back with a more detailed response.
+4. Use the chat history to understand context and previous responses to make better decisions about what tools to call. If they want to refer to a previous response then look through the RECENT CHAT HISTORY to get it and come back with a more detailed response.
 
-User request: "{user_request}"
-LAST ISSUE DESCRIPTION (use this for the description argument if the user refers to a previous issue or says something like 'create a ticket'): "{last_issue_description}"
-TICKET NUMBER TO REFERENCE CODE MAP (from last shown tickets):
-{ticket_map_str}
+The user message contains the request details: User Role, Current Employee ID, RECENT CHAT HISTORY, LAST ISSUE DESCRIPTION (use this for the description argument if the user refers to a previous issue or says something like 'create a ticket'), TICKET NUMBER TO REFERENCE CODE MAP (from last shown tickets) and the User request itself.
 
 TOOLS (atomic, stateless, always require explicit arguments):
-- create_ticket(employee_id: str, description: str)
+- {create_ticket_signature}
 - provide_tech_support_advice(issue_description: str)
 - update_ticket_progress(ticket_id: str, new_progress: str)
 - update_ticket_issue_level(ticket_id: str, new_issue_level: str)
 - update_ticket_description(ticket_id: str, new_description: str)
 - update_ticket_priority(ticket_id: str, new_priority: str)
 - update_ticket_status(ticket_id: str, new_status: str)
+- update_ticket_fields(ticket_id: str, new_description: str, new_priority: str, new_issue_level: str, new_status: str, new_progress: str)  # Use when several fields of one ticket change at once; pass only the fields being changed. Admin-only unless the only field is new_description.
 - delete_ticket(ticket_id: str)
 - show_tickets(employee_id: str)
+- show_more_tickets()  # Shows the next page of the last ticket listing (e.g. "next page", "show more tickets"). Takes no arguments.
 - update_employee_name(employee_id: str, new_name: str)
 - update_employee_email(employee_id: str, new_email: str)
 - update_employee_phone(employee_id: str, new_phone: str)
@@ -599,8 +1701,11 @@ TOOLS (atomic, stateless, always require explicit arguments):
 - update_employee_password(employee_id: str, new_password: str)
 - update_employee_role(employee_id: str, new_role: str)
 - update_employee_taxFileNumber(employee_id: str, new_taxFileNumber: str)
+- update_employee_fields(employee_id: str, new_name: str, new_email: str, new_phone: str, new_dateOfBirth: str, new_employeeID: str, new_password: str, new_role: str, new_taxFileNumber: str)  # Use when several fields of one employee change at once; pass only the fields being changed.
 - delete_employee(employee_id: str)
 - show_employee_info(employee_id: str)
+- search_employees(query: str)  # Admin-only. Find employees by name, email, phone number or employee ID.
+- search_tickets(query: str, status: str)  # Find tickets by words in their description, reference code, employee name or status (e.g. "find tickets mentioning Outlook crashes"); status is optional. Regular users only get their own tickets.
 - show_tickets_for_update()  # Use this if the user wants to update a ticket but hasn't specified which one or which attribute. This function takes no arguments and will display all tickets for the current employee.
 
 INSTRUCTIONS:
@@ -612,7 +1717,7 @@ INSTRUCTIONS:
 - If the user wants to update a ticket but does not specify what field to update (e.g., description, priority, status), ask the user to rephrase their request to include the field/attribute they want to update.
 - If the request is a general question or does not match any tool, set tool(s) to "none", this should be done as a final measure.
 - If a user wants to delete a ticket that is not their own, return "notAdmin" with a message explaining they do not have privileges, you can find this out if the employee ID used isnt in the first digits of the ticket number (e.g., ticket Delete Ticket MR909_162_526-2025_09_16-0632 belongs to MR909_162_526 however if JM362_393_537 wants to delete it they cant).
-- If a user want to view or modify employee data for any user no matter who they are, return "notAdmin" with a message explaining they do not have privileges.
+- If a user want to view or modify employee data for any user no matter who they are, return "notAdmin" with a message explaining they do not have privileges.{severity_instructions}
 
 Respond in strict JSON format. If only one tool is needed, return a single object. If multiple tools are needed, return a list of objects, each with:
 {{
@@ -620,105 +1725,268 @@ Respond in strict JSON format. If only one tool is needed, return a single objec
     "args": {{ "arg1": "value", ... }},
     "missing_args": ["arg1", ...]
 }}
+{examples_section}'''
 
-Examples:
-User: "Update my ticket"
-Response:
-[
-    {{"tool": "show_tickets_for_update", "args": {{}}, "missing_args": []}}
-]
+_intent_system_prompts = {}
 
-User: "Can I delete a ticket?"
-Response:
-[
-    {{"tool": "show_tickets_for_update", "args": {{}}, "missing_args": []}}
-]
+def build_intent_system_prompt(compact: bool = None) -> str:
+    """
+    Return the static intent system prompt for the current mode (built once per mode).
+    """
+    compact = INTENT_COMPACT_PROMPT if compact is None else compact
+    key = (compact, INTENT_COMBINED_SEVERITY)
+    if key not in _intent_system_prompts:
+        if INTENT_COMBINED_SEVERITY:
+            create_ticket_signature = "create_ticket(employee_id: str, description: str, issue_level: str, priority: str)"
+            severity_instructions = COMBINED_SEVERITY_INSTRUCTIONS
+        else:
+            create_ticket_signature = "create_ticket(employee_id: str, description: str)"
+            severity_instructions = ""
+        examples_section = "" if compact else f"\nExamples:\n{format_intent_examples(INTENT_FEW_SHOT_EXAMPLES)}\n"
+        _intent_system_prompts[key] = INTENT_SYSTEM_PROMPT_TEMPLATE.format(
+            create_ticket_signature=create_ticket_signature,
+            severity_instructions=severity_instructions,
+            examples_section=examples_section,
+        )
+    return _intent_system_prompts[key]
+
+def select_intent_examples(user_request: str, k: int = INTENT_COMPACT_EXAMPLES) -> list:
+    """
+    The k few-shot examples most similar to the request (TF-IDF cosine, or shared words if
+    numpy is unavailable), in their original order.
+    """
+    texts = [user_message for user_message, _ in INTENT_FEW_SHOT_EXAMPLES]
+    classifier = get_intent_classifier()
+    if classifier is not None:
+        scores = classifier.similarities(user_request, texts)
+    else:
+        from firebaseTests.intentClassifier import tokenize
+        request_terms = set(tokenize(user_request))
+        scores = [len(request_terms & set(tokenize(text))) for text in texts]
+    best = sorted(range(len(texts)), key=lambda i: -scores[i])[:k]
+    return [INTENT_FEW_SHOT_EXAMPLES[i] for i in sorted(best)]
 
-User: "Update my ticket 1234 to high priority"
-Response:
-[
-    {{"tool": "update_ticket_priority", "args": {{"ticket_id": "1234", "new_priority": "high"}}, "missing_args": []}}
-]
+def process_prompt_for_tool_call(user_request: str, user_role: str = None, tech_session=None, llm_func=None, chat_history=None, compact: bool = None) -> str:
+    """
+    Constructs the intent prompt and calls the provided LLM function.
+    The static instructions go in the system prompt (build_intent_system_prompt) and only the
+    per-request details in the user message, so llm_func is called as
+    llm_func(user_message, system_prompt=...).
+    Returns the raw LLM result (JSON string).
+    """
+    compact = INTENT_COMPACT_PROMPT if compact is None else compact
+    session = tech_session if tech_session is not None else current_session()
+    employee_id = session.get('employee_id')
+    last_issue_description = session.get('last_issue_description')
+    role = user_role if user_role else session.get('role', 'user')
+    ticket_map = session.get('last_ticket_map', {})
+    ticket_map_str = '\n'.join([f"{k}: {v}" for k, v in ticket_map.items()]) if ticket_map else 'None'
+    
+    # Format chat history for context
+    history_str = ""
+    if chat_history and len(chat_history) > 0:
+        # Include last 5 messages for context (to avoid token limits)
+        recent_history = chat_history[-5:] if len(chat_history) > 5 else chat_history
+        history_entries = []
+        for msg in recent_history:
+            role_name = msg.get('role', 'unknown')
+            content = msg.get('content', '')
+            # Truncate very long messages
+            if len(content) > 200:
+                content = content[:200] + "..."
+            history_entries.append(f"{role_name.upper()}: {content}")
+        history_str = '\n'.join(history_entries)
+    else:
+        history_str = "No previous conversation history available."
 
-User: "Update my ticket but I don't remember the number"
-Response:
-[
-    {{"tool": "show_tickets_for_update", "args": {{}}, "missing_args": []}}
-]
+    examples_section = ""
+    if compact:
+        examples_section = f"\nExamples:\n{format_intent_examples(select_intent_examples(user_request))}\n"
 
-User: "Update my ticket 1234 but I don't know what to change"
-Response:
-[
-    {{"tool": "show_tickets_for_update", "args": {{}}, "missing_args": []}},
-    {{"tool": "update_ticket_priority", "args": {{"ticket_id": "1234"}}, "missing_args": ["new_priority"]}}
-]
+    user_message = f'''User Role: "{role}"
+Current Employee ID: "{employee_id}"
 
-User: "My internet is really slow"
-Response:
-[
-    {{"tool": "provide_tech_support_advice", "args": {{"issue_description": "My internet is really slow"}}, "missing_args": []}}
-]
+RECENT CHAT HISTORY (for context):
+{history_str}
 
-User: "How does this work?"
-Response:
-[
-    {{"tool": "none", "args": {{}}, "missing_args": []}}
-]
+LAST ISSUE DESCRIPTION: "{last_issue_description}"
+TICKET NUMBER TO REFERENCE CODE MAP:
+{ticket_map_str}
+{examples_section}
+User request: "{user_request}"
 '''
-    llm = llm_func if llm_func is not None else invoke_llm
-    return llm(intent_prompt)
+    llm = llm_func if llm_func is not None else _invoke_llm_intent
+    return llm(user_message, system_prompt=build_intent_system_prompt(compact))
 
-def analyze_ticket_intent(user_request: str, user_role: str = None, chat_history: list = None) -> str:
+def _invoke_llm_intent(prompt: str, **kwargs) -> str:
+    return invoke_llm(prompt, call_site="intent", **kwargs)
+
+def _is_intent_json(result: str) -> bool:
+    result = result.strip()
+    if not (result.startswith('{') and result.endswith('}') or result.startswith('[') and result.endswith(']')):
+        return False
+    try:
+        _json.loads(result)
+    except ValueError:
+        return False
+    return True
+
+def _invoke_llm_cached(prompt: str, **kwargs) -> str:
+    return invoke_llm(prompt, cache=True, call_site="intent", validate=_is_intent_json, **kwargs)
+
+# Resolve common, trivially structured commands locally before paying for an LLM call
+FAST_PATH_ROUTING = True
+
+def fast_path_stats() -> dict:
+    """
+    Fast-path router hits per route, unresolved matches, LLM fallbacks and the overall hit rate.
+    """
+    return route_stats()
+
+# Ask for missing arguments and fill them from the next message with typed extractors (slotFilling);
+# llm_missing_arg_handler is only consulted when nothing can be extracted
+SLOT_FILLING = True
+# Local TF-IDF classifier: answer without the LLM when it is at least this confident.
+# Temperature and threshold are calibrated on the held-out phrasings (benchmarks/intentCalibration.py)
+LOCAL_INTENT_CLASSIFIER = True
+INTENT_CLASSIFIER_TEMPERATURE = 0.2
+INTENT_CLASSIFIER_THRESHOLD = 0.35
+INTENT_CORPUS_PATH = "firebaseTests/intent_corpus.jsonl"
+INTENT_HELDOUT_PATH = "firebaseTests/intent_heldout.jsonl"
+# Requests to delete/remove/cancel something always go to the LLM: the classifier must never
+# answer them with a read tool (a listing with no warning) or a canned reply
+DESTRUCTIVE_REQUEST = re.compile(r"\b(?:delete|remove|cancel|erase|wipe|purge|drop|discard|get rid of)\b", re.I)
+_intent_classifier = None
+_intent_classifier_lock = threading.Lock()
+
+def get_intent_classifier():
+    """
+    Train (once) and return the local intent classifier, or None if numpy is unavailable.
+    """
+    global _intent_classifier
+    from firebaseTests import intentClassifier
+    if intentClassifier.np is None:
+        return None
+    with _intent_classifier_lock:
+        if _intent_classifier is None:
+            texts = [user_message for user_message, _ in INTENT_FEW_SHOT_EXAMPLES]
+            labels = [response[0]["tool"] for _, response in INTENT_FEW_SHOT_EXAMPLES]
+            if os.path.exists(INTENT_CORPUS_PATH):
+                corpus_texts, corpus_labels = intentClassifier.load_corpus(INTENT_CORPUS_PATH)
+                texts += corpus_texts
+                labels += corpus_labels
+            _intent_classifier = intentClassifier.TfidfCentroidClassifier(INTENT_CLASSIFIER_TEMPERATURE).fit(texts, labels)
+    return _intent_classifier
+
+def classify_intent_locally(user_request: str, user_role: str = None, session: dict = None):
+    """
+    Classify the request with the local model. Returns an intent list only when the model is
+    confident AND every argument of the predicted tool can be filled without the LLM
+    (tools that need ticket IDs, new values or descriptions extracted still go to the LLM).
+    """
+    classifier = get_intent_classifier()
+    if classifier is None:
+        return None
+    session = session if session is not None else current_session()
+    tool, confidence = classifier.classify(user_request)
+    if confidence < INTENT_CLASSIFIER_THRESHOLD:
+        return None
+    if DESTRUCTIVE_REQUEST.search(user_request) and tool != "notAdmin":
+        return None
+    employee_id = session.get('employee_id')
+    role = user_role if user_role else session.get('role', 'user')
+    if tool == "none":
+        return [{"tool": "none", "args": {}, "missing_args": []}]
+    if tool == "provide_tech_support_advice":
+        return [{"tool": tool, "args": {"issue_description": user_request}, "missing_args": []}]
+    if tool == "show_tickets_for_update":
+        return [{"tool": tool, "args": {}, "missing_args": []}]
+    if tool in ("show_tickets", "show_employee_info") and employee_id:
+        return [{"tool": tool, "args": {"employee_id": employee_id}, "missing_args": []}]
+    if tool == "notAdmin" and str(role).lower() != 'admin':
+        return [{"tool": "notAdmin", "args": {"message": "You do not have admin privileges for this action."}, "missing_args": []}]
+    return None
+
+def classify_many(texts: list) -> list:
+    """
+    Batch-classify texts with the local model for offline evaluation. Returns [(tool, confidence), ...].
+    """
+    classifier = get_intent_classifier()
+    if classifier is None:
+        raise ImportError("numpy is required for the local intent classifier")
+    return classifier.classify_many(texts)
+
+def analyze_ticket_intent(user_request: str, user_role: str = None, chat_history: list = None, fast_path: bool = True, session: dict = None,
+                          cache: bool = True) -> str:
     """
     Use LLM to analyze user request and determine what tool/action they want, extract arguments, and identify missing arguments.
+    Common commands are resolved by the deterministic fast-path router first (see intentRouter),
+    then by the local classifier when it is confident and needs no argument extraction.
+    session defaults to the current session (see techSession). Retries should pass cache=False so
+    the LLM is asked again rather than the cached answer returned.
     Returns a dict: {"tool": ..., "args": {...}, "missing_args": [...]}.
+    Raises LLMError if the LLM call fails.
     """
-    global current_tech_session
+    session = session if session is not None else current_session()
+    if fast_path and FAST_PATH_ROUTING:
+        routed = route_intent(user_request, session, user_role)
+        if routed is not None:
+            return routed
+    if fast_path and LOCAL_INTENT_CLASSIFIER:
+        classified = classify_intent_locally(user_request, user_role, session)
+        if classified is not None:
+            return classified
     try:
-        result = process_prompt_for_tool_call(user_request, user_role, tech_session=current_tech_session, chat_history=chat_history)
-        import pprint
-        print("INFO:root:LLM response:")
-        pprint.pprint(result)
+        # Cached: the key covers the whole prompt, including role, history and ticket map.
+        # LLM2 deliberately bypasses the cache so it stays an independent second opinion.
+        llm_func = _invoke_llm_cached if cache else _invoke_llm_intent
+        result = process_prompt_for_tool_call(user_request, user_role, tech_session=session, llm_func=llm_func, chat_history=chat_history)
+        logging.debug(f"Intent LLM response: {result}")
         result_stripped = result.strip()
         is_object = result_stripped.startswith('{') and result_stripped.endswith('}')
         is_array = result_stripped.startswith('[') and result_stripped.endswith(']')
         if not (is_object or is_array):
-            print(f"Intent analysis failed: LLM did not return JSON. Raw output: {result_stripped}")
+            logging.warning(f"Intent analysis failed: LLM did not return JSON. Raw output: {result_stripped}")
             return [{"tool": "unknown", "args": {}, "missing_args": []}]
         parsed = _json.loads(result_stripped)
         if is_object:
             parsed = [parsed]
         # Let the LLM be the sole authority on admin permissions - no backend filtering
         return parsed
+    except LLMError:
+        # The call itself failed: surface it rather than treating it as an unknown intent
+        raise
     except Exception as e:
-        print(f"Intent analysis failed: {e}")
+        logging.warning(f"Intent analysis failed: {e}")
         return {"tool": "unknown", "args": {}, "missing_args": []}
 
-def analyze_ticket_intent_llm2(user_request: str, user_role: str = None, chat_history: list = None) -> str:
+def analyze_ticket_intent_llm2(user_request: str, user_role: str = None, chat_history: list = None, session: dict = None) -> str:
     """
     Use a second LLM to analyze user request and determine tool/action, arguments, and missing arguments.
     Returns a dict: {"tool": ..., "args": {...}, "missing_args": [...]}.
     """
-    global current_tech_session
+    session = session if session is not None else current_session()
     # Replace 'invoke_llm_2' with the actual second LLM function if available
-    def invoke_llm_2(prompt):
+    def invoke_llm_2(prompt, **kwargs):
         # For now, use the same LLM as a placeholder
-        return invoke_llm(prompt)
+        return invoke_llm(prompt, call_site="intent_llm2", **kwargs)
     try:
-        result = process_prompt_for_tool_call(user_request, user_role, tech_session=current_tech_session, llm_func=invoke_llm_2, chat_history=chat_history)
+        result = process_prompt_for_tool_call(user_request, user_role, tech_session=session, llm_func=invoke_llm_2, chat_history=chat_history)
         result_stripped = result.strip()
         is_object = result_stripped.startswith('{') and result_stripped.endswith('}')
         is_array = result_stripped.startswith('[') and result_stripped.endswith(']')
         if not (is_object or is_array):
-            print(f"LLM2 Intent analysis failed: LLM did not return JSON. Raw output: {result_stripped}")
+            logging.warning(f"LLM2 Intent analysis failed: LLM did not return JSON. Raw output: {result_stripped}")
             return [{"tool": "unknown", "args": {}, "missing_args": []}]
         parsed = _json.loads(result_stripped)
         if is_object:
             parsed = [parsed]
         # Let the LLM be the sole authority on admin permissions - no backend filtering
         return parsed
+    except LLMError:
+        raise
     except Exception as e:
-        print(f"LLM2 Intent analysis failed: {e}")
+        logging.warning(f"LLM2 Intent analysis failed: {e}")
         return {"tool": "unknown", "args": {}, "missing_args": []}
 
 def compare_intent_responses(resp1, resp2):
@@ -736,42 +2004,163 @@ def compare_intent_responses(resp1, resp2):
     r1 = normalize(resp1)
     r2 = normalize(resp2)
     return r1 == r2
-def handle_command(command: str):
+# How handle_command treats the second intent LLM:
+#   "wait"  - run both extractions in parallel and wait for both before acting (dispute shown inline)
+#   "async" - act on the primary result as soon as it arrives; the dispute verdict is attached later
+INTENT_DISPUTE_POLICY = os.getenv("INTENT_DISPUTE_POLICY", "wait")
+_intent_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="intent")
+# Most recent verdicts from the async policy, newest last
+intent_dispute_log = collections.deque(maxlen=100)
+
+def _record_intent_dispute(command: str, primary_results, secondary_future, session: dict) -> None:
+    """
+    Done-callback for the second intent LLM under the "async" policy: compare with the primary
+    result and attach the verdict to the user's session and the dispute log.
+    """
+    try:
+        secondary_results = secondary_future.result()
+    except Exception as e:
+        secondary_results = {"tool": "unknown", "args": {}, "missing_args": [], "error": str(e)}
+    verdict = {
+        'command': command,
+        'disputed': not compare_intent_responses(primary_results, secondary_results),
+        'llm1': primary_results,
+        'llm2': secondary_results,
+        'at': datetime.now(timezone.utc).isoformat(),
+    }
+    intent_dispute_log.append(verdict)
+    session['last_intent_dispute'] = verdict
+    if verdict['disputed']:
+        logging.warning(f"Dispute detected between LLMs for {command!r}. LLM1: {primary_results} LLM2: {secondary_results}")
+
+def handle_command(command: str, session: dict = None):
+    """
+    Run one user command end to end (intent, tools, reply) for `session`, a TechSession
+    (default: the current session). The session is bound as the current session while the
+    command runs, so the tools read and update the same user's state.
+    Returns the reply parts joined by newlines (see handle_command_events for them one by one).
+    """
+    output = []
+    for event in handle_command_events(command, session):
+        if event['type'] == 'restart':
+            output.clear()
+        elif event['type'] == 'output':
+            output.append(event['text'])
+    return "\n".join(str(o) for o in output)
+
+def handle_command_events(command: str, session: dict = None, stream: bool = False):
+    """
+    Generator version of handle_command for streaming frontends (see apiServer). Yields
+    {"type": "output", "text": ...} for each reply part as soon as it is ready. With stream=True
+    tech support advice arrives as {"type": "delta", "text": ...} chunks while it is generated.
+    {"type": "restart"} means the command was re-interpreted and the parts so far are superseded.
+    Iterate it to the end (or close it) in the thread that started it: it binds `session`.
+    """
+    session = session if session is not None else current_session()
+    with use_session(session):
+        yield from _command_events(command, session, stream)
+
+def _output(text) -> dict:
+    return {'type': 'output', 'text': text}
+
+def _pending_call_events(command: str, session: dict):
+    """
+    Take command as the answer to the question for the pending call's missing arguments: fill
+    them with the typed extractors, or ask the LLM when none can be extracted. Runs the call once
+    complete, asks for the rest otherwise. Returns False, with the pending call dropped, when
+    command turns out to be a new request.
+    """
+    pending = session['pending_call']
+    if is_cancel(command):
+        session['pending_call'] = None
+        yield _output("Okay, cancelled.")
+        return True
+    args, missing = fill_slots(pending, command, session)
+    if len(missing) == len(pending['missing']):
+        llm_result = llm_missing_arg_handler(pending['tool'], missing, command, context=fallback_context(session, pending))
+        if llm_result.get("status") == "new_intent":
+            session['pending_call'] = None
+            return False
+        if llm_result.get("status") == "ok" and isinstance(llm_result.get("args"), dict):
+            args.update(llm_result["args"])
+            missing = [m for m in missing if m not in llm_result["args"]]
+        if missing:
+            yield _output(llm_result.get("message") or missing_args_question(missing))
+            return True
+    if missing:
+        session['pending_call'] = dict(pending, args=args, missing=missing)
+        yield _output(missing_args_question(missing))
+        return True
+    session['pending_call'] = None
+    denied = permission_error(pending['tool'], args, session)
+    if denied:
+        yield _output(notAdmin(denied))
+        return True
+    yield from (_output(result) for result in execute_tool_calls([(pending['tool'], args)]))
+    if pending['tool'] == "create_ticket":
+        session["last_issue_description"] = None
+    return True
+
+def _command_events(command: str, session: dict, stream: bool):
     command_lower = command.lower()
-    global current_tech_session
 
     # Handle session management commands
     if command_lower in ['end session', 'logout', 'clear session', 'reset', 'new user']:
-        current_tech_session = {
-            'employee_id': None,
-            'original_issue': None,
-            'in_session': False,
-            'authenticated': False,
-            'awaiting_ticket_response': False,
-            'last_issue_description': None,
-            'awaiting_ticket_management': False,
-            'current_tickets': None,
-            'selected_ticket': None,
-            'management_action': None,
-            'update_field': None
-        }
-        return "Session cleared. You can start fresh with a new employee ID."
+        # Cleared in place: the caller keeps holding the same session object
+        session.clear()
+        session.update(TechSession())
+        yield _output("Session cleared. You can start fresh with a new employee ID.")
+        return
 
     # Show current session info
     elif command_lower in ['session info', 'who am i', 'current user']:
-        if current_tech_session['authenticated']:
-            return f"Current session: Employee ID {current_tech_session['employee_id']}\nYou can type 'end session' to clear this and start fresh."
+        if session.get('authenticated'):
+            yield _output(f"Current session: Employee ID {session['employee_id']}\nYou can type 'end session' to clear this and start fresh.")
         else:
-            return "No active session. Please describe your technical issue to get started."
-
-    # Use both LLMs to analyze ticket/employee management intent and extract arguments
-    intent_results_1 = analyze_ticket_intent(command)
-    intent_results_2 = analyze_ticket_intent_llm2(command)
-    output = []
-    # Compare both LLM results
-    if not compare_intent_responses(intent_results_1, intent_results_2):
-        output.append("⚠️ Dispute detected between LLMs. Using main LLM result.\nLLM1: {}\nLLM2: {}".format(intent_results_1, intent_results_2))
+            yield _output("No active session. Please describe your technical issue to get started.")
+        return
+
+    routed = route_intent(command, session) if FAST_PATH_ROUTING else None
+    if session.get('pending_call'):
+        # A recognised command replaces the pending call; anything else is taken as the answer
+        if routed is None and (yield from _pending_call_events(command, session)):
+            return
+        session['pending_call'] = None
+    if routed is None and LOCAL_INTENT_CLASSIFIER:
+        routed = classify_intent_locally(command, session=session)
+    if routed is not None:
+        # Resolved locally: no LLM call, and nothing for a second LLM to dispute
+        intent_results_1 = routed
+    else:
+        # Use both LLMs (in parallel) to analyze ticket/employee management intent and extract arguments
+        future_1 = _intent_executor.submit(analyze_ticket_intent, command, fast_path=False, session=session)
+        future_2 = _intent_executor.submit(analyze_ticket_intent_llm2, command, session=session)
+        try:
+            intent_results_1 = future_1.result()
+        except LLMError as e:
+            future_2.cancel()
+            yield _output(llm_error_message(e))
+            return
+        if INTENT_DISPUTE_POLICY == "async":
+            future_2.add_done_callback(lambda f: _record_intent_dispute(command, intent_results_1, f, session))
+        else:
+            try:
+                intent_results_2 = future_2.result()
+            except LLMError as e:
+                # No second opinion available: act on the primary result
+                logging.warning(f"Second intent LLM failed, skipping dispute check: {e}")
+                intent_results_2 = intent_results_1
+            # Compare both LLM results
+            if not compare_intent_responses(intent_results_1, intent_results_2):
+                yield _output("⚠️ Dispute detected between LLMs. Using main LLM result.\nLLM1: {}\nLLM2: {}".format(intent_results_1, intent_results_2))
     intent_results = intent_results_1
+    # Ready-to-run reads/writes are queued and executed together by the execution planner;
+    # the queue is flushed before anything else is output so the order stays the same
+    pending_calls = []
+    def flush_pending_calls():
+        results = execute_tool_calls(pending_calls) if pending_calls else []
+        pending_calls.clear()
+        return [_output(result) for result in results]
     for intent_result in intent_results:
         tool = intent_result.get("tool", "none")
         args = intent_result.get("args", {})
@@ -779,41 +2168,60 @@ def handle_command(command: str):
 
         # If the user is asking for advice, store their prompt as the last issue description
         if tool == "provide_tech_support_advice":
-            current_tech_session["last_issue_description"] = command
+            session["last_issue_description"] = command
         # If user asks to create a ticket and description is missing, use last_issue_description
+        if tool == "create_ticket":
+            # issue_level/priority are optional; create_ticket classifies them itself when absent
+            missing_args = [m for m in missing_args if m not in ("issue_level", "priority")]
         if tool == "create_ticket" and "description" in missing_args:
-            last_desc = current_tech_session.get("last_issue_description")
+            last_desc = session.get("last_issue_description")
             if last_desc:
                 args["description"] = last_desc
                 missing_args = [m for m in missing_args if m != "description"]
+        if SLOT_FILLING and missing_args:
+            # The request itself may hold what the intent step missed (a reference code, a priority, ...)
+            args, missing_args = fill_slots({'args': args, 'missing': missing_args}, command, session, text=False)
+            if missing_args and tool not in ("none", "unknown", "notAdmin"):
+                session['pending_call'] = {'tool': tool, 'args': args, 'missing': missing_args}
+                yield from flush_pending_calls()
+                yield _output(missing_args_question(missing_args))
+                continue
+            if permission_error(tool, args, session):
+                tool = "notAdmin"
+        if tool in PLANNED_TOOLS and not missing_args:
+            pending_calls.append((tool, args))
+            continue
+        yield from flush_pending_calls()
         if tool == "notAdmin":
-            output.append("⛔ You do not have admin privileges for this action.")
+            yield _output("⛔ You do not have admin privileges for this action.")
             continue
         if tool == "none":
-            output.append("No ticket or employee management action detected.")
+            yield _output("No ticket or employee management action detected.")
             continue
         if tool == "unknown":
-            output.append("Sorry, I couldn't determine the correct action for your request.")
+            yield _output("Sorry, I couldn't determine the correct action for your request.")
             continue
 
         # If there are missing arguments, use LLM-based handler
         if missing_args:
             # Call LLM error handler to ask user for missing args
-            llm_result = llm_missing_arg_handler(tool, missing_args, command, context=current_tech_session)
-            output.append(llm_result.get("message", ""))
+            llm_result = llm_missing_arg_handler(tool, missing_args, command, context=session)
+            yield _output(llm_result.get("message", ""))
             # If user provided missing args, try to call the tool again
             if llm_result.get("status") == "ok" and llm_result.get("args"):
                 try:
                     func = globals().get(tool)
                     if func:
                         result = func(**llm_result["args"])
-                        output.append(result)
+                        yield _output(result)
                         continue
                 except Exception as e:
-                    output.append(f"Error calling {tool} with user-supplied args: {e}")
+                    yield _output(f"Error calling {tool} with user-supplied args: {e}")
             # If LLM says to re-analyze intent, break and re-run intent analysis
             if llm_result.get("status") == "new_intent":
-                return handle_command(llm_result.get("message", ""))
+                yield {'type': 'restart'}
+                yield from _command_events(llm_result.get("message", ""), session, stream)
+                return
             # Otherwise, ask again or stop
             continue
 
@@ -821,7 +2229,11 @@ def handle_command(command: str):
         try:
             func = globals().get(tool)
             if not func:
-                output.append(f"Function '{tool}' not implemented.")
+                yield _output(f"Function '{tool}' not implemented.")
+                continue
+            if stream and tool == "provide_tech_support_advice":
+                for chunk in func(**args, stream=True):
+                    yield {'type': 'delta', 'text': chunk}
                 continue
             # If the function takes no arguments, call without args
             if args:
@@ -830,11 +2242,11 @@ def handle_command(command: str):
                 result = func()
             # If a ticket is created, clear last_issue_description to avoid reusing old issues
             if tool == "create_ticket":
-                current_tech_session["last_issue_description"] = None
-            output.append(result)
+                session["last_issue_description"] = None
+            yield _output(result)
         except Exception as e:
-            output.append(f"Error calling {tool}: {e}")
-    return "\n".join(str(o) for o in output)
+            yield _output(f"Error calling {tool}: {e}")
+    yield from flush_pending_calls()
 
 template = """
 You are an expert technology support assistant and customer service representative.
@@ -877,9 +2289,10 @@ Here is the user question to answer: {question}
 def generate_response(history: str, question: str) -> str:
     """
     Generate a response using the NVIDIA LLM with the template.
+    Raises LLMError if the LLM call fails.
     """
     formatted_prompt = template.format(history=history, question=question)
-    return invoke_llm(formatted_prompt, max_tokens=4096)
+    return invoke_llm(formatted_prompt, call_site="chat")
 
 history = []
 
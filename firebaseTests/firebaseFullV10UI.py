@@ -3,8 +3,6 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import firebaseTests.firebaseFullV10 as firebaseFullV10
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
 import os
 import re
 from firebaseTests.firebaseFullV10 import (
@@ -12,16 +10,18 @@ from firebaseTests.firebaseFullV10 import (
     update_ticket_progress, update_ticket_issue_level, delete_ticket, show_tickets, update_employee_name, update_employee_email, 
     update_employee_phone, update_employee_dateOfBirth, update_employee_employeeID, update_employee_password, update_employee_role, 
     update_employee_taxFileNumber, delete_employee, show_employee, show_employee_info, show_tickets_for_update, analyze_ticket_intent, 
-    invoke_llm, current_tech_session, notAdmin
+    invoke_llm, notAdmin, llm_error_message
 )
+from firebaseTests.llmResilience import LLMError, LLMUnavailableError
+from firebaseTests.techSession import TechSession, activate_session
 
-# Only initialize Firebase once (for Streamlit reruns)
-if not firebase_admin._apps:
-    cred = credentials.Certificate(r"firebaseTests/firestoreKey.json")
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Built once per process and shared by every session and rerun
+@st.cache_resource(show_spinner=False)
+def get_firestore_client():
+    return firebaseFullV10.get_db()
 
 st.set_page_config(page_title="Tech Support Chat", page_icon="💬", layout="wide")
+db = get_firestore_client()
 with st.sidebar:
     if st.button("Clear Chat History", key="clear_chat"):
         st.session_state['history'] = []
@@ -56,7 +56,9 @@ if 'authenticated' not in st.session_state:
 if 'employee_id' not in st.session_state:
     st.session_state['employee_id'] = None
 if 'current_tech_session' not in st.session_state:
-    st.session_state['current_tech_session'] = current_tech_session.copy()
+    st.session_state['current_tech_session'] = TechSession()
+# Each script run serves one browser session: bind that user's session state for the backend's tools
+activate_session(st.session_state['current_tech_session'])
 
 def authenticate_user_ui():
     st.info(WELCOME_MSG)
@@ -70,7 +72,7 @@ def authenticate_user_ui():
         if doc.exists:
             st.session_state['authenticated'] = True
             st.session_state['employee_id'] = emp_id
-            # Set role in session and current_tech_session
+            # Set role in this user's tech session
             emp_data = doc.to_dict()
             role = emp_data.get('role', 'user')
             st.session_state['role'] = role
@@ -78,9 +80,6 @@ def authenticate_user_ui():
             st.session_state['current_tech_session']['employee_id'] = emp_id
             st.session_state['current_tech_session']['authenticated'] = True
             st.session_state['current_tech_session']['role'] = role
-            firebaseFullV10.current_tech_session['employee_id'] = emp_id
-            firebaseFullV10.current_tech_session['authenticated'] = True
-            firebaseFullV10.current_tech_session['role'] = role
             st.success(f"Welcome, {emp_id}! Role: {role}")
                 # Show startup message in chat history after login
             if len(st.session_state.get('history', [])) == 0:
@@ -108,6 +107,12 @@ if not st.session_state['authenticated']:
 for msg in st.session_state['history']:
     st.chat_message(msg['role']).write(msg['content'])
 
+# Paginated ticket listings: offer the next page without another LLM round trip
+if firebaseFullV10.has_more_tickets():
+    if st.button("➡️ Next page of tickets", key="next_ticket_page"):
+        chat_print(firebaseFullV10.show_more_tickets())
+        st.rerun()
+
 user_input = st.chat_input("Type your message...")
 STARTUP_MSG = "💡 You are now logged in! Type your issue or request below to get started."
 if user_input:
@@ -117,41 +122,63 @@ if user_input:
     st.session_state['history'].append({'role': 'user', 'content': user_input})
     st.chat_message('user').write(user_input)
     session = st.session_state['current_tech_session']
-    firebaseFullV10.current_tech_session.update(session)
     import time
     max_attempts = 3
     intent_results = None
+    llm_error = None
     user_role = st.session_state.get('role', None)
     for attempt in range(max_attempts):
         try:
-            intent_results = analyze_ticket_intent(user_input, user_role=user_role, chat_history=st.session_state['history'])
+            intent_results = analyze_ticket_intent(user_input, user_role=user_role, chat_history=st.session_state['history'], session=session,
+                                                   cache=attempt == 0)
+            llm_error = None
+        except LLMError as e:
+            intent_results = None
+            llm_error = e
+            if isinstance(e, LLMUnavailableError):
+                break  # circuit open: retrying now would fail the same way
         except Exception as e:
             intent_results = None
         if (isinstance(intent_results, list) and any(ir.get("tool") not in ["none", "unknown", None] for ir in intent_results)):
             break
         time.sleep(1.5)
     if not isinstance(intent_results, list):
-        st.session_state['history'].append({'role': 'assistant', 'content': "Sorry, I couldn't understand your request after several attempts. Please rephrase or try again."})
-        st.chat_message('assistant').write("Sorry, I couldn't understand your request after several attempts. Please rephrase or try again.")
+        message = llm_error_message(llm_error) if llm_error else "Sorry, I couldn't understand your request after several attempts. Please rephrase or try again."
+        st.session_state['history'].append({'role': 'assistant', 'content': message})
+        st.chat_message('assistant').write(message)
         st.stop()
     # Block any response that doesn't actively call a tool or use call_llm
     if all(ir.get("tool") in ["none", "unknown", None] for ir in intent_results):
         with st.spinner('🤖 Thinking...'):
             try:
-                result = invoke_llm(user_input)
+                result = invoke_llm(user_input, call_site="chat")
                 st.session_state['history'].append({'role': 'assistant', 'content': str(result)})
                 st.chat_message('assistant').write(str(result))
+            except LLMError as e:
+                st.session_state['history'].append({'role': 'assistant', 'content': llm_error_message(e)})
+                st.chat_message('assistant').write(llm_error_message(e))
             except Exception as e:
                 st.session_state['history'].append({'role': 'assistant', 'content': f"Error calling invoke_llm: {e}"})
                 st.chat_message('assistant').write(f"Error calling invoke_llm: {e}")
         st.stop()
     output = []
+    # Ready-to-run reads/writes, executed together by the execution planner (batched writes,
+    # concurrent reads) and flushed into output before anything else so the order is unchanged
+    pending_calls = []
     # --- Unified Tool Flow ---
     with st.spinner('🤖 Thinking...'):
         for intent_result in intent_results:
             tool = intent_result.get("tool", "none")
             args = intent_result.get("args", {})
             missing_args = intent_result.get("missing_args", [])
+            if tool == "delete_ticket" or st.session_state.get('awaiting_ticket_delete', False):
+                # The delete flows below run inline: run and show the earlier calls first so the order is unchanged
+                output.extend(firebaseFullV10.execute_tool_calls(pending_calls))
+                pending_calls = []
+                for o in output:
+                    chat_print(o)
+                    st.chat_message('assistant').write(str(o))
+                output = []
             # Handle ticket deletion flow
             if tool == "delete_ticket":
                 # If ticket_id is missing, show tickets and prompt for ID or number
@@ -165,7 +192,7 @@ if user_input:
                 ticket_id = args.get("ticket_id")
                 if ticket_id:
                     # If user gave a ticket number, map to referenceCode
-                    ticket_map = firebaseFullV10.current_tech_session.get('last_ticket_map', {})
+                    ticket_map = session.get('last_ticket_map', {})
                     if ticket_id.isdigit() and ticket_id in ticket_map:
                         ticket_id = ticket_map[ticket_id]
                     result = delete_ticket(ticket_id=ticket_id)
@@ -177,7 +204,7 @@ if user_input:
             if st.session_state.get('awaiting_ticket_delete', False):
                 # Try to extract ticket number or ID from user input
                 match = re.search(r"(?:ticket\s*)?(\d+|[A-Za-z0-9_-]{6,})", user_input, re.IGNORECASE)
-                ticket_map = firebaseFullV10.current_tech_session.get('last_ticket_map', {})
+                ticket_map = session.get('last_ticket_map', {})
                 ticket_id = None
                 if match:
                     val = match.group(1)
@@ -195,18 +222,37 @@ if user_input:
                     st.chat_message('assistant').write("❗ Please specify a valid ticket ID or ticket number to delete.")
                 continue
             # --- Other tool flows ---
+            if tool == "create_ticket":
+                missing_args = [m for m in missing_args if m not in ("issue_level", "priority")]
             if tool == "create_ticket" and "description" in missing_args:
                 last_desc = session.get("last_issue_description")
                 if last_desc:
                     args["description"] = last_desc
                     missing_args = [m for m in missing_args if m != "description"]
+            if tool in firebaseFullV10.PLANNED_TOOLS and not missing_args:
+                pending_calls.append((tool, args))
+                continue
+            output.extend(firebaseFullV10.execute_tool_calls(pending_calls))
+            pending_calls = []
             if tool == "provide_tech_support_advice":
                 session["last_issue_description"] = user_input
+                if not missing_args:
+                    # Show anything already produced first, then stream the advice in as it is generated
+                    for o in output:
+                        chat_print(o)
+                        st.chat_message('assistant').write(str(o))
+                    output = []
+                    with st.chat_message('assistant'):
+                        advice = st.write_stream(provide_tech_support_advice(args.get("issue_description", user_input), stream=True))
+                    chat_print(advice)
+                    continue
             if tool == "call_llm":
                 prompt = args.get("prompt", user_input)
                 try:
-                    result = invoke_llm(prompt)
+                    result = invoke_llm(prompt, call_site="chat")
                     output.append(result)
+                except LLMError as e:
+                    output.append(llm_error_message(e))
                 except Exception as e:
                     output.append(f"Error calling invoke_llm: {e}")
                 continue
@@ -230,6 +276,7 @@ if user_input:
                 output.append(result)
             except Exception as e:
                 output.append(f"Error calling {tool}: {e}")
+        output.extend(firebaseFullV10.execute_tool_calls(pending_calls))
         for o in output:
             st.session_state['history'].append({'role': 'assistant', 'content': str(o)})
             st.chat_message('assistant').write(str(o))
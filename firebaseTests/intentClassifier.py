@@ -0,0 +1,129 @@
+"""
+Local, CPU-only intent classifier: TF-IDF features with a nearest-centroid model (NumPy).
+
+Predicts the tool name analyze_ticket_intent would emit. Trained from the few-shot examples
+in the intent prompt plus a labelled corpus file (one {"text": ..., "tool": ...} JSON object per line).
+"""
+import json
+import math
+import re
+from collections import Counter, defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # the classifier is optional, callers fall back to the LLM
+    np = None
+
+DEFAULT_CORPUS_PATH = "firebaseTests/intent_corpus.jsonl"
+
+_TOKEN = re.compile(r"[a-z0-9_']+")
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased word unigrams and bigrams.
+    """
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def load_corpus(path: str = DEFAULT_CORPUS_PATH):
+    """
+    Read a labelled corpus file. Returns (texts, labels).
+    """
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            texts.append(row["text"])
+            labels.append(row["tool"])
+    return texts, labels
+
+
+class TfidfCentroidClassifier:
+    """
+    Nearest-centroid classifier over L2-normalised TF-IDF vectors.
+    Confidence is a softmax over the cosine similarities to each class centroid.
+    """
+
+    def __init__(self, temperature: float = 0.1):
+        if np is None:
+            raise ImportError("numpy is required for the local intent classifier")
+        self.temperature = temperature
+        self.vocabulary = {}
+        self.idf = None
+        self.labels = []
+        self.centroids = None
+
+    def fit(self, texts: list, labels: list):
+        documents = [tokenize(t) for t in texts]
+        document_frequency = Counter(term for doc in documents for term in set(doc))
+        self.vocabulary = {term: i for i, term in enumerate(sorted(document_frequency))}
+        n = len(documents)
+        self.idf = np.array(
+            [math.log((1 + n) / (1 + document_frequency[term])) + 1 for term in sorted(document_frequency)]
+        )
+        vectors = self._vectorize(documents)
+        rows_by_label = defaultdict(list)
+        for i, label in enumerate(labels):
+            rows_by_label[label].append(i)
+        self.labels = sorted(rows_by_label)
+        centroids = np.stack([vectors[rows_by_label[label]].mean(axis=0) for label in self.labels])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.where(norms == 0, 1, norms)
+        return self
+
+    def _vectorize(self, documents: list):
+        matrix = np.zeros((len(documents), len(self.vocabulary)))
+        for row, doc in enumerate(documents):
+            for term, count in Counter(doc).items():
+                col = self.vocabulary.get(term)
+                if col is not None:
+                    matrix[row, col] = 1 + math.log(count)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def classify_many(self, texts: list) -> list:
+        """
+        Classify a batch of texts in one matrix product. Returns [(tool, confidence), ...].
+        """
+        if not texts:
+            return []
+        similarities = self._vectorize([tokenize(t) for t in texts]) @ self.centroids.T
+        scaled = similarities / self.temperature
+        scaled -= scaled.max(axis=1, keepdims=True)
+        probabilities = np.exp(scaled)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        # A text with no known terms has no evidence for any class
+        known = similarities.max(axis=1) > 0
+        return [
+            (self.labels[b], float(probabilities[i, b]) if known[i] else 0.0)
+            for i, b in enumerate(best)
+        ]
+
+    def classify(self, text: str):
+        return self.classify_many([text])[0]
+
+    def similarities(self, text: str, candidates: list) -> list:
+        """
+        Cosine similarity of text to each candidate text in the fitted TF-IDF space.
+        """
+        vectors = self._vectorize([tokenize(t) for t in [text, *candidates]])
+        return (vectors[1:] @ vectors[0]).tolist()
+
+
+def precision_by_tool(predicted: list, reference: list) -> dict:
+    """
+    Per-tool precision of predicted tool names against reference labels (e.g. the LLM's choices).
+    Also reports overall accuracy under the "__accuracy__" key.
+    """
+    predicted_count = Counter(predicted)
+    correct = Counter(p for p, r in zip(predicted, reference) if p == r)
+    report = {tool: correct[tool] / count for tool, count in predicted_count.items()}
+    report["__accuracy__"] = sum(correct.values()) / len(reference) if reference else 0.0
+    return report
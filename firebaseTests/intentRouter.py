@@ -0,0 +1,162 @@
+"""
+Deterministic fast-path intent router.
+
+Recognises the common, trivially structured commands ("show my tickets", "delete ticket 2",
+"set ticket 3 priority to high", ...) and returns the same
+[{"tool": ..., "args": {...}, "missing_args": [...]}] structure as the LLM intent engine.
+Returns None whenever it is not confident, so the caller falls back to the LLM.
+"""
+import re
+import threading
+from collections import Counter
+
+# Ticket reference codes look like MR909_162_526-2025_09_16-0632
+REFERENCE_CODE = r"[A-Za-z0-9_]+-\d{4}_\d{2}_\d{2}-\d{4}"
+TICKET_REF = rf"(?:ticket\s*)?(?:number\s*|no\.?\s*)?#?\s*(?P<ticket>\d+|{REFERENCE_CODE})"
+PRIORITIES = ('low', 'medium', 'high')
+LEVELS = ('l0', 'l1', 'l2', 'l3', 'l4')
+STATUSES = ('unassigned', 'assigned', 'in progress', 'resolved', 'closed', 'open')
+
+_POLITE = re.compile(r"^(?:please\s+|can you\s+|could you\s+|can i\s+|i want to\s+|i'd like to\s+)+|\s+please$", re.I)
+
+_stats_lock = threading.Lock()
+route_hits = Counter()
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"\s+", " ", text).strip().rstrip("?.!").strip()
+    return _POLITE.sub("", text).strip()
+
+
+def _is_admin(role) -> bool:
+    return role is not None and str(role).lower() == 'admin'
+
+
+def _intent(tool: str, args: dict = None, missing_args: list = None) -> dict:
+    return {"tool": tool, "args": args or {}, "missing_args": missing_args or []}
+
+
+def _resolve_ticket(value: str, session: dict):
+    """
+    Map a ticket number to its reference code through last_ticket_map; reference codes pass through.
+    Returns None if a number can't be resolved.
+    """
+    if value.isdigit():
+        return (session.get('last_ticket_map') or {}).get(value)
+    return value
+
+
+def _owns_ticket(ticket_id: str, employee_id) -> bool:
+    return bool(employee_id) and ticket_id.startswith(f"{employee_id}-")
+
+
+# (route name, pattern) - patterns are matched against the cleaned request, case-insensitively
+_ROUTES = [
+    ('show_tickets', re.compile(
+        r"^(?:(?:show|list|view|see|display|get|check)(?: me)?(?: all)?(?: of)? my (?:support )?tickets"
+        r"|my (?:support )?tickets|what are my tickets|what tickets do i have)$", re.I)),
+    ('show_employee_info', re.compile(
+        r"^(?:what(?:'s| is) my (?:info|information|details|profile|employee info)"
+        r"|(?:show|view|get|display)(?: me)? my (?:info|information|details|profile|employee (?:info|information|details))"
+        r"|my (?:info|details|profile))$", re.I)),
+    ('show_more_tickets', re.compile(
+        r"^(?:next page|next|more|show more(?: tickets)?|more tickets|(?:show|see)(?: the)? next page(?: of tickets)?)$", re.I)),
+    ('show_tickets_for_update', re.compile(
+        r"^(?:update|edit|change|modify|delete|remove) (?:my|a) ticket$", re.I)),
+    ('search_tickets', re.compile(
+        r"^(?:find|search(?: for)?|look ?up)(?: me)?(?: all| any| my| the)? tickets? "
+        r"(?:mentioning|that mention|which mention|about|containing|matching|related to|with) (?P<value>.+)$", re.I)),
+    ('search_employees', re.compile(
+        r"^(?:find|search(?: for)?|look ?up)(?: an| the)? employees?(?: named| called| with (?:the )?(?:name|email|phone(?: number)?))?:? (?P<value>.+)$", re.I)),
+    ('delete_ticket', re.compile(
+        rf"^(?:delete|remove|cancel) (?:my )?{TICKET_REF}$", re.I)),
+    ('update_ticket_priority', re.compile(
+        rf"^(?:set|change|update|make|mark) (?:my )?{TICKET_REF}(?:'s)?(?: priority)? (?:to |as )?(?P<value>{'|'.join(PRIORITIES)})(?: priority)?$", re.I)),
+    ('update_ticket_issue_level', re.compile(
+        rf"^(?:set|change|update|make|mark) (?:my )?{TICKET_REF}(?:'s)?(?: issue)? level (?:to |as )?(?P<value>{'|'.join(LEVELS)})$", re.I)),
+    ('update_ticket_status', re.compile(
+        rf"^(?:set|change|update|make|mark) (?:my )?{TICKET_REF}(?:'s)? status (?:to |as )?(?P<value>{'|'.join(STATUSES)})$", re.I)),
+    ('update_ticket_description', re.compile(
+        rf"^(?:set|change|update) (?:my )?{TICKET_REF}(?:'s)? description to (?P<value>.+)$", re.I)),
+]
+
+# Ticket field updates that only admins may perform (the LLM prompt and slotFilling.permission_error apply the same rule)
+ADMIN_ONLY_TICKET_TOOLS = {'update_ticket_priority', 'update_ticket_issue_level', 'update_ticket_status', 'update_ticket_progress'}
+_VALUE_ARG = {
+    'update_ticket_priority': 'new_priority',
+    'update_ticket_issue_level': 'new_issue_level',
+    'update_ticket_status': 'new_status',
+    'update_ticket_description': 'new_description',
+}
+
+
+def route_intent(user_request: str, session: dict, user_role: str = None):
+    """
+    Try to resolve user_request without the LLM.
+    Returns a list of intent dicts, or None to fall back to the LLM.
+    """
+    employee_id = session.get('employee_id')
+    role = user_role if user_role else session.get('role', 'user')
+    text = _clean(user_request)
+    for name, pattern in _ROUTES:
+        match = pattern.match(text)
+        if not match:
+            continue
+        result = _build(name, match, session, employee_id, role)
+        with _stats_lock:
+            route_hits[name if result is not None else f"{name}:unresolved"] += 1
+            if result is None:
+                route_hits['llm_fallback'] += 1
+        return result
+    with _stats_lock:
+        route_hits['llm_fallback'] += 1
+    return None
+
+
+def _build(name, match, session, employee_id, role):
+    if name in ('show_tickets', 'show_employee_info'):
+        if not employee_id:
+            return None
+        return [_intent(name, {"employee_id": employee_id})]
+    if name == 'show_more_tickets':
+        if not session.get('ticket_listing'):
+            return None
+        return [_intent(name)]
+    if name == 'show_tickets_for_update':
+        return [_intent(name)]
+    if name == 'search_tickets':
+        # The tool itself limits regular users to their own tickets
+        return [_intent(name, {"query": match.group('value')})]
+    if name == 'search_employees':
+        if not _is_admin(role):
+            return [_intent("notAdmin", {"message": "You do not have admin privileges for this action."})]
+        return [_intent(name, {"query": match.group('value')})]
+    ticket_id = _resolve_ticket(match.group('ticket'), session)
+    if not ticket_id:
+        # A ticket number we can't map confidently - let the LLM (and its context) decide
+        return None
+    if not _is_admin(role):
+        if name in ADMIN_ONLY_TICKET_TOOLS or not _owns_ticket(ticket_id, employee_id):
+            return [_intent("notAdmin", {"message": "You do not have admin privileges for this action."})]
+    if name == 'delete_ticket':
+        return [_intent(name, {"ticket_id": ticket_id})]
+    value = match.group('value')
+    if name == 'update_ticket_issue_level':
+        value = value.upper()
+    elif name != 'update_ticket_description':
+        value = value.lower()
+    if name == 'update_ticket_status':
+        value = value.title()
+    return [_intent(name, {"ticket_id": ticket_id, _VALUE_ARG[name]: value})]
+
+
+def route_stats() -> dict:
+    """
+    Per-route hit counts plus the overall fast-path hit rate.
+    """
+    with _stats_lock:
+        stats = dict(route_hits)
+    hits = sum(v for k, v in stats.items() if k != 'llm_fallback' and not k.endswith(':unresolved'))
+    total = hits + stats.get('llm_fallback', 0)
+    stats['hit_rate'] = hits / total if total else 0.0
+    return stats
@@ -0,0 +1,143 @@
+"""
+Response cache for invoke_llm.
+
+Two tiers: a small in-memory LRU in front of an on-disk SQLite table, both with a TTL.
+Entries are keyed on model, temperature, max_tokens and a hash of the normalized prompt
+(system prompt included).
+Any object with get(key) / set(key, value) / stats() can be plugged in instead
+(see firebaseFullV10.set_llm_cache).
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = "firebaseTests/llm_cache.sqlite3"
+# Bump when normalize_prompt changes so entries stored under the old normalization are never served
+CACHE_KEY_VERSION = 2
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Collapse whitespace so prompts that only differ in formatting share an entry. Case is kept:
+    extracted arguments (passwords, descriptions, reference codes) must come back as the user typed them.
+    """
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def make_cache_key(model: str, temperature: float, max_tokens: int, prompt: str, system_prompt: str = None) -> str:
+    text = normalize_prompt(prompt)
+    if system_prompt:
+        text = f"{normalize_prompt(system_prompt)}\x00{text}"
+    prompt_hash = hashlib.sha256(f"v{CACHE_KEY_VERSION}\x00{text}".encode('utf-8')).hexdigest()
+    return f"{model}|{temperature}|{max_tokens}|{prompt_hash}"
+
+
+class LLMResponseCache:
+    """
+    In-memory LRU + SQLite response cache with TTL and size-bounded eviction.
+    Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 24 * 3600,
+                 max_memory_entries: int = 512, max_disk_entries: int = 20000):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'sets': 0, 'evictions': 0}
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            self._conn.commit()
+
+    def get(self, key: str):
+        """
+        Return the cached response for key, or None on a miss or an expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return entry[1]
+                del self._memory[key]
+                self._counters['expired'] += 1
+            if self._conn is not None:
+                row = self._conn.execute("SELECT value, stored_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, stored_at = row
+                    if now - stored_at <= self.ttl:
+                        self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._conn.commit()
+                        self._remember(key, stored_at, value)
+                        self._counters['disk_hits'] += 1
+                        return value
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._counters['expired'] += 1
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._counters['sets'] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters plus current tier sizes, for sizing the cache.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = (
+                self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] if self._conn is not None else 0
+            )
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, stored_at, value):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def _evict_disk(self, now):
+        self._conn.execute("DELETE FROM llm_cache WHERE stored_at < ?", (now - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._counters['evictions'] += overflow
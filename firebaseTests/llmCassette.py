@@ -0,0 +1,108 @@
+"""
+Record/replay cassettes for LLM calls.
+
+In record mode every successful invoke_llm / ainvoke_llm / astream_llm response is stored with
+the latency measured for it (and the time to first token for streamed calls). In replay mode
+responses are served from the cassette without any network call, either after the recorded
+latency or immediately, so a whole test campaign can be rerun offline and at any concurrency.
+
+A cassette is a single SQLite file: one row per recorded response ("take"), zlib-compressed,
+indexed by the same request key as the response cache (model, temperature, max_tokens and the
+normalized prompt, see llmCache.make_cache_key). A request recorded several times replays its
+takes in recorded order, then starts over.
+"""
+import sqlite3
+import threading
+import time
+import zlib
+
+from firebaseTests.llmResilience import LLMError
+
+DEFAULT_CASSETTE_PATH = "firebaseTests/llm_cassette.sqlite3"
+MODES = ('record', 'replay')
+
+
+class CassetteMissError(LLMError):
+    """Replay mode was asked for a request that is not on the cassette."""
+
+
+class LLMCassette:
+    """
+    One cassette file opened for 'record' or 'replay'. Keeps at most max_takes takes per request.
+    """
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_PATH, mode: str = 'replay', max_takes: int = 3):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {MODES}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.max_takes = max_takes
+        self._lock = threading.Lock()
+        self._takes = {}     # key -> [take, ...] loaded for replay
+        self._next = {}      # key -> index of the next take to play
+        self._counters = {'recorded': 0, 'played': 0, 'misses': 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_takes ("
+            "id INTEGER PRIMARY KEY, key TEXT NOT NULL, call_site TEXT, model TEXT, response BLOB NOT NULL, "
+            "latency REAL NOT NULL, ttft REAL, prompt_tokens INTEGER, completion_tokens INTEGER, recorded_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_takes_key ON llm_takes (key, id)")
+        self._conn.commit()
+
+    def record(self, key: str, response: str, latency: float, ttft: float = None, call_site: str = None,
+               model: str = None, prompt_tokens: int = None, completion_tokens: int = None) -> bool:
+        """
+        Store one take for key. Returns False if key already has max_takes takes.
+        """
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_takes WHERE key = ?", (key,)).fetchone()[0]
+            if count >= self.max_takes:
+                return False
+            self._conn.execute(
+                "INSERT INTO llm_takes (key, call_site, model, response, latency, ttft, prompt_tokens, completion_tokens, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, call_site, model, zlib.compress(response.encode('utf-8')), latency, ttft,
+                 prompt_tokens, completion_tokens, time.time())
+            )
+            self._conn.commit()
+            self._takes.pop(key, None)
+            self._counters['recorded'] += 1
+        return True
+
+    def play(self, key: str):
+        """
+        The next take for key as a dict (response, latency, ttft, prompt_tokens, completion_tokens),
+        or None if the request was never recorded.
+        """
+        with self._lock:
+            takes = self._takes.get(key)
+            if takes is None:
+                rows = self._conn.execute(
+                    "SELECT response, latency, ttft, prompt_tokens, completion_tokens FROM llm_takes WHERE key = ? ORDER BY id",
+                    (key,)
+                ).fetchall()
+                takes = self._takes[key] = [
+                    {'response': zlib.decompress(response).decode('utf-8'), 'latency': latency, 'ttft': ttft,
+                     'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens}
+                    for response, latency, ttft, prompt_tokens, completion_tokens in rows
+                ]
+            if not takes:
+                self._counters['misses'] += 1
+                return None
+            index = self._next.get(key, 0)
+            self._next[key] = (index + 1) % len(takes)
+            self._counters['played'] += 1
+            return takes[index]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['takes'], stats['requests'] = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT key) FROM llm_takes").fetchone()
+        stats['mode'] = self.mode
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
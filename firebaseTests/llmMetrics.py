@@ -0,0 +1,216 @@
+"""
+In-process metrics for LLM calls.
+
+Every call made through invoke_llm / ainvoke_llm / astream_llm is recorded once, when it
+finishes, as a flat dict:
+
+    {"ts", "call_site", "model", "stream", "outcome", "attempts", "retries", "queue_wait",
+     "ttft", "latency", "prompt_tokens", "completion_tokens", "error"}
+
+Times are in seconds (ttft only for streamed calls), token counts come from completion.usage.
+The registry keeps counters and histograms labelled by call site and model, exportable as
+Prometheus text, plus the most recent call records, exportable as JSON lines.
+"""
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus semantics: counts per upper bound, plus sum and count).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        """
+        Estimate the q-quantile by linear interpolation inside the bucket it falls in.
+        Returns None when nothing has been observed.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):  # +Inf bucket: the largest finite bound is all we know
+                    return self.buckets[-1]
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+def _labels(labels: dict) -> str:
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+class LLMMetrics:
+    """
+    Registry of LLM call metrics. Pass jsonl_path to also append every call record to a file.
+    """
+
+    HISTOGRAMS = {
+        'llm_request_duration_seconds': ('latency', LATENCY_BUCKETS, "Total LLM call latency including retries."),
+        'llm_time_to_first_token_seconds': ('ttft', LATENCY_BUCKETS, "Time to the first streamed token."),
+        'llm_queue_wait_seconds': ('queue_wait', LATENCY_BUCKETS, "Wait before the call started on the LLM event loop."),
+        'llm_prompt_tokens': ('prompt_tokens', TOKEN_BUCKETS, "Prompt tokens per call (completion.usage)."),
+        'llm_completion_tokens': ('completion_tokens', TOKEN_BUCKETS, "Completion tokens per call (completion.usage)."),
+    }
+
+    def __init__(self, jsonl_path: str = None, max_records: int = 10000):
+        self.jsonl_path = jsonl_path
+        self.records = deque(maxlen=max_records)
+        self._calls = defaultdict(int)      # (call_site, model, outcome) -> count
+        self._retries = defaultdict(int)    # (call_site, model) -> count
+        self._tokens = defaultdict(int)     # (call_site, model, kind) -> count
+        self._histograms = defaultdict(dict)  # metric name -> {(call_site, model): Histogram}
+        self._outcome_latency = {}            # (call_site, model, outcome) -> Histogram of latency
+        self._lock = threading.Lock()
+        self._jsonl_file = None
+
+    def record(self, call: dict) -> None:
+        call.setdefault('ts', time.time())
+        site = (call.get('call_site', 'default'), call.get('model', ''))
+        with self._lock:
+            self.records.append(call)
+            self._calls[site + (call.get('outcome', 'unknown'),)] += 1
+            self._retries[site] += call.get('retries') or 0
+            for kind in ('prompt_tokens', 'completion_tokens'):
+                if call.get(kind):
+                    self._tokens[site + (kind,)] += call[kind]
+            for name, (field, buckets, _) in self.HISTOGRAMS.items():
+                value = call.get(field)
+                if value is None:
+                    continue
+                histogram = self._histograms[name].get(site)
+                if histogram is None:
+                    histogram = self._histograms[name][site] = Histogram(buckets)
+                histogram.observe(value)
+            if call.get('latency') is not None:
+                # Replayed cassette takes end 'ok' too, but never reached the model
+                key = site + ('replay' if call.get('replayed') else call.get('outcome', 'unknown'),)
+                histogram = self._outcome_latency.get(key)
+                if histogram is None:
+                    histogram = self._outcome_latency[key] = Histogram(LATENCY_BUCKETS)
+                histogram.observe(call['latency'])
+            if self.jsonl_path:
+                if self._jsonl_file is None:
+                    self._jsonl_file = open(self.jsonl_path, 'a', encoding='utf-8')
+                self._jsonl_file.write(json.dumps(call, default=str) + '\n')
+                self._jsonl_file.flush()
+
+    def quantile(self, call_site: str, q: float, model: str = None, metric: str = 'llm_request_duration_seconds',
+                 outcome: str = None):
+        """
+        Estimated q-quantile of a histogram for one call site (all models unless model is given).
+        With outcome (call latency only), just the calls that ended that way, e.g. 'ok' for calls
+        that reached the network, leaving out cache hits and cassette replays ('replay').
+        """
+        with self._lock:
+            if outcome is not None:
+                if metric != 'llm_request_duration_seconds':
+                    raise ValueError("outcome is only tracked for llm_request_duration_seconds")
+                histograms = [h for (site, m, o), h in self._outcome_latency.items()
+                              if site == call_site and o == outcome and (model is None or m == model)]
+            else:
+                histograms = [h for (site, m), h in self._histograms[metric].items()
+                              if site == call_site and (model is None or m == model)]
+            if not histograms:
+                return None
+            merged = Histogram(histograms[0].buckets)
+            for h in histograms:
+                merged.counts = [a + b for a, b in zip(merged.counts, h.counts)]
+                merged.sum += h.sum
+                merged.count += h.count
+        return merged.quantile(q)
+
+    def summary(self) -> dict:
+        """
+        {call_site: {calls, errors, retries, p50, p95, p99, avg_prompt_tokens, avg_completion_tokens}}.
+        errors counts calls that ended in 'error', 'timeout' or 'interrupted' (not caller cancellations).
+        """
+        with self._lock:
+            sites = sorted({key[0] for key in self._calls})
+            calls = dict(self._calls)
+            retries = dict(self._retries)
+            tokens = dict(self._tokens)
+        report = {}
+        for site in sites:
+            total = sum(n for (s, _, _), n in calls.items() if s == site)
+            errors = sum(n for (s, _, outcome), n in calls.items() if s == site and outcome not in ('ok', 'cache_hit', 'cancelled'))
+            report[site] = {
+                'calls': total,
+                'errors': errors,
+                'retries': sum(n for (s, _), n in retries.items() if s == site),
+                'p50': self.quantile(site, 0.50),
+                'p95': self.quantile(site, 0.95),
+                'p99': self.quantile(site, 0.99),
+                'avg_prompt_tokens': sum(n for (s, _, k), n in tokens.items() if s == site and k == 'prompt_tokens') / total,
+                'avg_completion_tokens': sum(n for (s, _, k), n in tokens.items() if s == site and k == 'completion_tokens') / total,
+            }
+        return report
+
+    def export_prometheus(self) -> str:
+        """
+        All counters and histograms in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            lines += ["# HELP llm_calls_total LLM calls by final outcome.", "# TYPE llm_calls_total counter"]
+            for (site, model, outcome), n in sorted(self._calls.items()):
+                lines.append(f"llm_calls_total{{{_labels({'call_site': site, 'model': model, 'outcome': outcome})}}} {n}")
+            lines += ["# HELP llm_retries_total LLM call attempts beyond the first.", "# TYPE llm_retries_total counter"]
+            for (site, model), n in sorted(self._retries.items()):
+                lines.append(f"llm_retries_total{{{_labels({'call_site': site, 'model': model})}}} {n}")
+            lines += ["# HELP llm_tokens_total Tokens reported by completion.usage.", "# TYPE llm_tokens_total counter"]
+            for (site, model, kind), n in sorted(self._tokens.items()):
+                lines.append(f"llm_tokens_total{{{_labels({'call_site': site, 'model': model, 'kind': kind})}}} {n}")
+            for name, (_, _, help_text) in self.HISTOGRAMS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (site, model), h in sorted(self._histograms[name].items()):
+                    labels = {'call_site': site, 'model': model}
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + ('+Inf',), h.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{{{_labels({**labels, 'le': bound})}}} {cumulative}")
+                    lines.append(f"{name}_sum{{{_labels(labels)}}} {h.sum}")
+                    lines.append(f"{name}_count{{{_labels(labels)}}} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def export_jsonl(self, path: str) -> int:
+        """
+        Write the retained call records to path as JSON lines. Returns the number written.
+        """
+        with self._lock:
+            records = list(self.records)
+        with open(path, 'w', encoding='utf-8') as f:
+            for call in records:
+                f.write(json.dumps(call, default=str) + '\n')
+        return len(records)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self._calls.clear()
+            self._retries.clear()
+            self._tokens.clear()
+            self._histograms.clear()
+            self._outcome_latency.clear()
@@ -0,0 +1,103 @@
+"""
+Failure handling for LLM calls: typed errors, jittered exponential backoff and a circuit breaker.
+
+invoke_llm and friends raise LLMError subclasses instead of returning an apology string, so
+callers can tell a failed call from a model answer. Use firebaseFullV10.llm_error_message(e)
+when the failure has to be shown to a user.
+"""
+import random
+import threading
+import time
+
+
+class LLMError(Exception):
+    """
+    An LLM call failed after all attempts. `attempts` is how many requests were made.
+    """
+
+    def __init__(self, message: str, attempts: int = 0, model: str = None):
+        super().__init__(message)
+        self.attempts = attempts
+        self.model = model
+
+
+class LLMTimeoutError(LLMError):
+    """The last attempt (or the caller's overall deadline) timed out."""
+
+
+class LLMResponseError(LLMError):
+    """The endpoint answered, but with no usable content."""
+
+
+class LLMUnavailableError(LLMError):
+    """The circuit breaker is open: the endpoint is failing and calls are rejected without a request."""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    "Full jitter" exponential backoff: a random delay in [0, min(cap, base * 2**attempt)].
+    attempt is 0 for the first retry.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for `reset_timeout`
+    seconds. After that one probe call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        True if a request may be sent now. In the half-open state only one probe is allowed.
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """
+        The call let through was abandoned (e.g. a cancelled hedge) without an outcome.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """
+        Seconds until an open circuit lets a probe through (0 if it is not open).
+        """
+        with self._lock:
+            if self.state != 'open':
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
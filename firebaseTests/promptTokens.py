@@ -0,0 +1,81 @@
+"""
+Prompt size accounting for LLM calls.
+
+count_tokens uses tiktoken (o200k_base, the gpt-oss tokenizer) when it is installed and a
+~4 characters per token estimate otherwise. PromptSizeTracker keeps per-call-site totals so
+the largest prompts can be found and trimmed.
+"""
+import functools
+import threading
+from collections import defaultdict
+
+TIKTOKEN_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    # Imported on first use (tiktoken is optional and slow to import)
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+
+
+@functools.lru_cache(maxsize=256)
+def count_tokens(text: str) -> int:
+    """
+    Number of tokens in text. Cached, so static prompt prefixes are only counted once.
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+
+class PromptSizeTracker:
+    """
+    Per-call-site prompt sizes: call count, total/max prompt tokens and the share taken by the
+    system prefix (the part a server-side prefix cache can reuse).
+    """
+
+    def __init__(self):
+        self._sites = defaultdict(lambda: {'calls': 0, 'prompt_tokens': 0, 'system_tokens': 0, 'max_prompt_tokens': 0})
+        self._lock = threading.Lock()
+
+    def record(self, call_site: str, prompt: str, system_prompt: str = None) -> int:
+        """
+        Count and record one prompt. Returns its total token count.
+        """
+        system_tokens = count_tokens(system_prompt) if system_prompt else 0
+        total = system_tokens + count_tokens(prompt)
+        with self._lock:
+            site = self._sites[call_site]
+            site['calls'] += 1
+            site['prompt_tokens'] += total
+            site['system_tokens'] += system_tokens
+            site['max_prompt_tokens'] = max(site['max_prompt_tokens'], total)
+        return total
+
+    def report(self) -> dict:
+        """
+        {call_site: {calls, avg_prompt_tokens, max_prompt_tokens, prefix_share}}, largest first.
+        """
+        with self._lock:
+            sites = {name: dict(site) for name, site in self._sites.items()}
+        report = {}
+        for name, site in sorted(sites.items(), key=lambda item: -item[1]['prompt_tokens']):
+            report[name] = {
+                'calls': site['calls'],
+                'avg_prompt_tokens': round(site['prompt_tokens'] / site['calls'], 1),
+                'max_prompt_tokens': site['max_prompt_tokens'],
+                'prefix_share': round(site['system_tokens'] / site['prompt_tokens'], 3) if site['prompt_tokens'] else 0.0,
+            }
+        return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
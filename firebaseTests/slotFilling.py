@@ -0,0 +1,183 @@
+"""
+Deterministic slot filling for intents with missing arguments.
+
+When an intent comes back with missing_args, the call is kept in the session as a pending call
+({"tool", "args", "missing"}) and the user is asked for what is missing. Their next message is
+run through a typed extractor per missing argument:
+
+    ticket       a ticket number from the last listing (last_ticket_map) or a reference code
+    priority     low / medium / high
+    level        L0-L4 ("level 2" works too)
+    status       Unassigned, Assigned, In Progress, Resolved, Closed, Open
+    date         2025-09-16, 16/09/2025, 16 Sep 2025, September 16 2025 -> YYYY-MM-DD
+    email, phone, employee_id
+    text         the whole message, when it is the only argument still missing
+
+The caller asks the LLM (llm_missing_arg_handler) only when none of the missing arguments can be
+extracted, so most follow-up turns need no LLM call at all.
+"""
+import re
+from datetime import datetime
+
+from firebaseTests.intentRouter import ADMIN_ONLY_TICKET_TOOLS
+
+from firebaseTests.intentRouter import LEVELS, PRIORITIES, REFERENCE_CODE, STATUSES
+
+# Argument name -> extractor type; anything not listed is free text
+SLOT_TYPES = {
+    'ticket_id': 'ticket',
+    'priority': 'priority', 'new_priority': 'priority',
+    'issue_level': 'level', 'new_issue_level': 'level',
+    'new_status': 'status',
+    'new_dateOfBirth': 'date',
+    'new_email': 'email',
+    'new_phone': 'phone',
+    'employee_id': 'employee_id', 'new_employeeID': 'employee_id',
+}
+
+QUESTIONS = {
+    'ticket': "Which ticket? Give its number from the list or its reference code.",
+    'priority': "Which priority: low, medium or high?",
+    'level': "Which issue level: L0, L1, L2, L3 or L4?",
+    'status': "Which status: " + ", ".join(s.title() for s in STATUSES) + "?",
+    'date': "What date? For example 1990-04-12.",
+    'email': "What email address?",
+    'phone': "What phone number?",
+    'employee_id': "Which employee ID? For example JS817_669_677.",
+}
+
+CANCEL = re.compile(r"^\s*(?:cancel|never ?mind|nevermind|forget it|stop|no(?:pe)?|abort)\b[\s.!]*$", re.I)
+_REFERENCE_CODE = re.compile(rf"\b{REFERENCE_CODE}\b")
+_TICKET_NUMBER = re.compile(r"(?:\bticket\s*|\bnumber\s*|\bno\.?\s*|#\s*|^\s*)(\d+)\b", re.I)
+_PRIORITY_WORDS = {**{p: p for p in PRIORITIES}, 'urgent': 'high', 'critical': 'high', 'normal': 'medium', 'med': 'medium'}
+_PRIORITY = re.compile(r"\b(" + "|".join(_PRIORITY_WORDS) + r")\b", re.I)
+_LEVEL = re.compile(r"\b(?:l|level\s*)([0-" + str(len(LEVELS) - 1) + r"])\b", re.I)
+_STATUS = re.compile(r"\b(" + "|".join(s.replace(' ', r'\s+') for s in STATUSES) + r")\b", re.I)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"\+?\d[\d\s()-]{6,}\d")
+_EMPLOYEE_ID = re.compile(r"\b[A-Za-z]{2}\d{3}_\d{3}_\d{3}\b")
+_DATE = re.compile(r"\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b|\b\d{1,2}[-/.]\d{1,2}[-/.]\d{4}\b"
+                   r"|\b\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]{3,9},?\s+\d{4}\b|\b[A-Za-z]{3,9}\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}\b")
+# Day first: dates are written the Australian way (phone numbers and tax file numbers are Australian too)
+_DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d %B %Y', '%d %b %Y', '%B %d %Y', '%b %d %Y')
+
+
+def slot_type(arg: str) -> str:
+    return SLOT_TYPES.get(arg, 'text')
+
+
+def _label(arg: str) -> str:
+    return re.sub(r'^new_', '', arg).replace('_', ' ').replace('dateOfBirth', 'date of birth')
+
+
+def missing_args_question(missing: list) -> str:
+    """
+    What to ask the user for the missing arguments, one line per argument.
+    """
+    return "\n".join(QUESTIONS.get(slot_type(arg), f"What should the {_label(arg)} be?") for arg in missing)
+
+
+def _parse_date(text: str):
+    text = re.sub(r'(\d)(?:st|nd|rd|th)\b', r'\1', text).replace(',', ' ')
+    text = re.sub(r'\s+', ' ', text).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def extract(kind: str, message: str, session: dict):
+    """
+    The value of type kind found in message, or None. Free text is never extracted here.
+    """
+    if kind == 'ticket':
+        match = _REFERENCE_CODE.search(message)
+        if match:
+            return match.group(0)
+        ticket_map = session.get('last_ticket_map') or {}
+        for number in _TICKET_NUMBER.findall(message):
+            if number in ticket_map:
+                return ticket_map[number]
+        return None
+    if kind == 'priority':
+        match = _PRIORITY.search(message)
+        return _PRIORITY_WORDS[match.group(1).lower()] if match else None
+    if kind == 'level':
+        match = _LEVEL.search(message)
+        return f"L{match.group(1)}" if match else None
+    if kind == 'status':
+        match = _STATUS.search(message)
+        return re.sub(r'\s+', ' ', match.group(1)).title() if match else None
+    if kind == 'date':
+        for match in _DATE.finditer(message):
+            value = _parse_date(match.group(0))
+            if value:
+                return value
+        return None
+    if kind == 'email':
+        match = _EMAIL.search(message)
+        return match.group(0) if match else None
+    if kind == 'phone':
+        match = _PHONE.search(message)
+        return re.sub(r'\s+', ' ', match.group(0)).strip() if match else None
+    if kind == 'employee_id':
+        match = _EMPLOYEE_ID.search(message)
+        return match.group(0).upper() if match else None
+    return None
+
+
+def fill_slots(pending: dict, message: str, session: dict, text: bool = True):
+    """
+    Fill what message supplies of pending's missing arguments. A free-text argument takes the
+    whole message, but only when text is True and it is the only argument missing.
+    Returns (args, still missing).
+    """
+    args = dict(pending.get('args') or {})
+    missing = list(pending.get('missing') or [])
+    for arg in list(missing):
+        value = extract(slot_type(arg), message, session)
+        if value is not None:
+            args[arg] = value
+            missing.remove(arg)
+    extracted = len(missing) < len(pending.get('missing') or [])
+    if text and not extracted and len(missing) == 1 and slot_type(missing[0]) == 'text' and message.strip():
+        args[missing.pop()] = message.strip()
+    return args, missing
+
+
+def is_cancel(message: str) -> bool:
+    return bool(CANCEL.match(message))
+
+
+def permission_error(tool: str, args: dict, session: dict):
+    """
+    Why a regular user may not make this call with the filled-in arguments (an admin-only tool or
+    field, someone else's ticket or employee ID), or None if they may. Admins may always.
+    """
+    if str(session.get('role') or '').lower() == 'admin':
+        return None
+    # Regular users may only change the description of their own tickets, and no employee data
+    if (tool in ADMIN_ONLY_TICKET_TOOLS or tool.startswith('update_employee') or tool in ('delete_employee', 'search_employees')
+            or (tool == 'update_ticket_fields' and set(args) - {'ticket_id', 'new_description'})):
+        return "You do not have admin privileges for this action."
+    employee_id = session.get('employee_id')
+    ticket_id = args.get('ticket_id')
+    if ticket_id and not (employee_id and str(ticket_id).startswith(f"{employee_id}-")):
+        return "You do not have admin privileges for this action."
+    if args.get('employee_id') not in (None, employee_id):
+        return "You do not have admin privileges for this action."
+    return None
+
+
+def fallback_context(session: dict, pending: dict) -> dict:
+    """
+    The part of the session the LLM fallback needs, instead of the whole session dict.
+    """
+    return {
+        'employee_id': session.get('employee_id'),
+        'role': session.get('role'),
+        'arguments_so_far': pending.get('args') or {},
+        'ticket_numbers': session.get('last_ticket_map') or {},
+    }
@@ -0,0 +1,113 @@
+"""
+Per-user tech support session state.
+
+A TechSession holds one user's conversation state (employee ID, role, ticket number map, last
+issue, ...). The session the running code belongs to is kept in a contextvar, so one process can
+serve many users at once: each request binds its user's session (use_session / activate_session)
+and the tools read it through current_session() or the current_tech_session proxy.
+
+Context variables follow asyncio tasks automatically but not thread pools: submit work with
+contextvars.copy_context().run (or pass the session explicitly) so it sees the same session.
+Code that never binds a session shares one process-wide default session, as before.
+"""
+import contextlib
+import contextvars
+from collections.abc import MutableMapping
+
+SESSION_DEFAULTS = {
+    'employee_id': None,
+    'original_issue': None,
+    'in_session': False,
+    'authenticated': False,  # Track if user is authenticated with employee ID
+    'awaiting_ticket_response': False,  # Track if we're waiting for user response to ticket prompt
+    'last_issue_description': None,  # Store the issue for potential ticket creation
+    'awaiting_ticket_management': False,  # Track if we're in ticket management mode
+    'current_tickets': None,  # Store current user's tickets
+    'selected_ticket': None,  # Store the selected ticket for operations
+    'management_action': None,  # Store the action (update/delete)
+    'update_field': None,  # Store which field is being updated
+    'last_ticket_map': {},  # Ticket number shown to the user -> reference code
+    'ticket_listing': None,  # Paging state of the last ticket listing
+    'pending_call': None,  # Tool call waiting for missing arguments (see slotFilling)
+}
+
+
+class TechSession(dict):
+    """
+    One user's session state. A dict, so session['employee_id'] / session.get(...) work as before.
+    """
+
+    def __init__(self, **values):
+        super().__init__(_defaults())
+        self.update(values)
+
+    def reset(self) -> None:
+        """
+        Clear everything back to the defaults (end of session / logout).
+        """
+        self.clear()
+        self.update(_defaults())
+
+
+def _defaults() -> dict:
+    return {key: (value.copy() if isinstance(value, dict) else value) for key, value in SESSION_DEFAULTS.items()}
+
+
+_default_session = TechSession()
+_current_session = contextvars.ContextVar('tech_session', default=None)
+
+
+def current_session():
+    """
+    The session bound to the running context, or the process-wide default session.
+    """
+    session = _current_session.get()
+    return session if session is not None else _default_session
+
+
+@contextlib.contextmanager
+def use_session(session):
+    """
+    Bind session as the current session for the duration of the with block.
+    """
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+
+
+def activate_session(session) -> contextvars.Token:
+    """
+    Bind session for the rest of the current context (e.g. one Streamlit script run).
+    Returns the token for contextvars' reset().
+    """
+    return _current_session.set(session)
+
+
+class SessionProxy(MutableMapping):
+    """
+    Mapping that forwards every access to current_session(), so module-level code written
+    against a single global session dict reads and writes the current user's session.
+    """
+
+    def __getitem__(self, key):
+        return current_session()[key]
+
+    def __setitem__(self, key, value):
+        current_session()[key] = value
+
+    def __delitem__(self, key):
+        del current_session()[key]
+
+    def __iter__(self):
+        return iter(current_session())
+
+    def __len__(self):
+        return len(current_session())
+
+    def copy(self) -> dict:
+        return dict(current_session())
+
+    def __repr__(self):
+        return repr(current_session())
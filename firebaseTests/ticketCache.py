@@ -0,0 +1,118 @@
+"""
+Per-employee ticket cache for show_tickets / show_tickets_for_update.
+
+The first listing of an employee whose tickets fit on one page (see list_tickets_page) loads
+them from Firestore; after that every ticket write path reports its change through apply_write(),
+so listings are served from memory. Employees with more than a page of tickets are not cached.
+Entries also expire after a TTL (for writes made by other processes), unless a Firestore
+on_snapshot listener keeps that employee's tickets current.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import Counter
+
+
+class TicketCache:
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._tickets = {}    # employee_id -> {referenceCode: ticket dict}
+        self._loaded_at = {}  # employee_id -> time.time() of the last full load
+        self._owner = {}      # referenceCode -> employee_id
+        self._watches = {}    # employee_id -> Firestore snapshot watch
+        self._lock = threading.RLock()
+        self.counters = Counter()
+
+    def get(self, employee_id: str):
+        """
+        Return copies of the employee's tickets, sorted by ticket ID (the listing order, see
+        list_tickets_page), or None if they are not cached or have expired.
+        """
+        with self._lock:
+            tickets = self._tickets.get(employee_id)
+            live = employee_id in self._watches
+            if tickets is None or (not live and time.time() - self._loaded_at[employee_id] > self.ttl):
+                self.counters['misses'] += 1
+                return None
+            self.counters['hits'] += 1
+            return [copy.deepcopy(tickets[ref]) for ref in sorted(tickets)]
+
+    def load(self, employee_id: str, tickets: list) -> None:
+        """
+        Replace the cached tickets for an employee with a fresh result from Firestore.
+        """
+        with self._lock:
+            for ref, owner in list(self._owner.items()):
+                if owner == employee_id:
+                    del self._owner[ref]
+            entries = {}
+            for i, ticket in enumerate(tickets):
+                ref = ticket.get('referenceCode') or f"__unnamed_{i}"
+                entries[ref] = copy.deepcopy(ticket)
+                self._owner[ref] = employee_id
+            self._tickets[employee_id] = entries
+            self._loaded_at[employee_id] = time.time()
+
+    def apply_write(self, ticket_id: str, op: str, data: dict = None) -> None:
+        """
+        Write-through hook: op is 'set' (data is the full ticket), 'update' (data holds the changed
+        fields) or 'delete'. Writes for employees that aren't cached are ignored.
+        """
+        with self._lock:
+            if op == 'set':
+                employee_id = (data or {}).get('employeeID')
+                if employee_id in self._tickets:
+                    self._tickets[employee_id][ticket_id] = copy.deepcopy(data)
+                    self._owner[ticket_id] = employee_id
+                return
+            employee_id = self._owner.get(ticket_id)
+            if employee_id is None or ticket_id not in self._tickets.get(employee_id, {}):
+                return
+            if op == 'delete':
+                del self._tickets[employee_id][ticket_id]
+                del self._owner[ticket_id]
+            else:
+                self._tickets[employee_id][ticket_id].update(copy.deepcopy(data or {}))
+            self.counters['write_through'] += 1
+
+    def invalidate(self, employee_id: str = None) -> None:
+        """
+        Drop one employee's tickets (or everything) so the next listing reloads from Firestore.
+        """
+        with self._lock:
+            employee_ids = [employee_id] if employee_id is not None else list(self._tickets)
+            for emp in employee_ids:
+                self._tickets.pop(emp, None)
+                self._loaded_at.pop(emp, None)
+                watch = self._watches.pop(emp, None)
+                if watch is not None:
+                    watch.unsubscribe()
+            self._owner = {ref: emp for ref, emp in self._owner.items() if emp in self._tickets}
+
+    def watch(self, employee_id: str, query) -> None:
+        """
+        Keep an employee's tickets current with a Firestore on_snapshot listener on `query`.
+        """
+        with self._lock:
+            if employee_id in self._watches:
+                return
+
+        def on_snapshot(docs, changes, read_time):
+            try:
+                self.load(employee_id, [doc.to_dict() for doc in docs])
+                self.counters['snapshots'] += 1
+            except Exception as e:
+                logging.error(f"Ticket cache snapshot for {employee_id} failed: {e}")
+
+        watch = query.on_snapshot(on_snapshot)
+        with self._lock:
+            self._watches[employee_id] = watch
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats['employees'] = len(self._tickets)
+            stats['tickets'] = sum(len(t) for t in self._tickets.values())
+            stats['watched'] = len(self._watches)
+        return stats
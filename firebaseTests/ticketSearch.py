@@ -0,0 +1,271 @@
+"""
+Local full-text search over tickets, ranked with BM25.
+
+An inverted index over problemDescription, referenceCode, name and the status fields
+(progressReport, priority, issueLevel), with per-field weights. Built once from the Tickets
+collection and then kept current incrementally, by this process's ticket writes (apply_write,
+registered as a ticket write listener) and optionally by a Firestore on_snapshot listener (watch).
+
+The index can be saved to a gzipped JSON file (save / load_file) so a restart does not stream the
+whole collection again; the caller then only fetches tickets written since synced_at.
+"""
+import gzip
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+INDEX_VERSION = 1  # bump when tokenization or the stored fields change; older files are rebuilt
+
+# Indexed field -> weight of a term occurrence in it
+FIELD_WEIGHTS = {
+    'problemDescription': 1.0,
+    'referenceCode': 2.0,
+    'name': 1.5,
+    'progressReport': 1.0,
+    'priority': 1.0,
+    'issueLevel': 1.0,
+}
+# Fields kept per ticket for filtering and rendering results
+STORED_FIELDS = ('referenceCode', 'employeeID', 'name', 'problemDescription', 'progressReport', 'priority', 'issueLevel', 'createdAt')
+STOPWORDS = frozenset(
+    "a an and are as at be but by can for from has have i in is it its my of on or that the this to was were when "
+    "with any all me mentioning mention mentions about ticket tickets".split()
+)
+REFERENCE_CODE = re.compile(r"[A-Za-z0-9_]+-\d{4}_\d{2}_\d{2}-\d{4}")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    # Light suffix stripping so "crashes", "crashed" and "crashing" meet at "crash"
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text) -> list:
+    """
+    Lowercased, stemmed word tokens without stopwords. Reference codes are also kept whole.
+    """
+    text = str(text or '')
+    tokens = [code.lower() for code in REFERENCE_CODE.findall(text)]
+    tokens += [_stem(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+    return tokens
+
+
+class TicketSearchIndex:
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._docs = {}                     # ticket ID -> stored fields
+        self._terms = {}                    # ticket ID -> {term: weighted frequency}
+        self._lengths = {}                  # ticket ID -> weighted length
+        self._postings = defaultdict(dict)  # term -> {ticket ID: weighted frequency}
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+        self._watch = None
+        self.synced_at = None               # time.time() up to which Firestore writes are reflected
+        self.counters = Counter()
+        self.ready = threading.Event()
+
+    # --- maintenance ---
+    def load(self, tickets, synced_at: float = None) -> None:
+        """
+        Replace the index contents with an iterable of (ticket ID, data) pairs.
+        """
+        with self._lock:
+            self._docs.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._postings.clear()
+            self._total_length = 0.0
+            for ticket_id, data in tickets:
+                self._add(ticket_id, data)
+            self.synced_at = synced_at if synced_at is not None else time.time()
+        self.ready.set()
+
+    def upsert(self, ticket_id: str, data: dict) -> None:
+        with self._lock:
+            self._remove(ticket_id)
+            self._add(ticket_id, data)
+
+    def patch(self, ticket_id: str, fields: dict) -> None:
+        with self._lock:
+            if ticket_id not in self._docs:
+                return
+            data = {**self._docs[ticket_id], **fields}
+            self._remove(ticket_id)
+            self._add(ticket_id, data)
+
+    def remove(self, ticket_id: str) -> None:
+        with self._lock:
+            self._remove(ticket_id)
+
+    def apply_write(self, ticket_id: str, op: str, data: dict = None) -> None:
+        """
+        Ticket write listener: op is 'set' (data is the full ticket), 'update' (changed fields) or 'delete'.
+        Ignored until the index is loaded.
+        """
+        if not self.ready.is_set():
+            return
+        if op == 'delete':
+            self.remove(ticket_id)
+        elif op == 'set':
+            self.upsert(ticket_id, data)
+        else:
+            self.patch(ticket_id, data or {})
+        self.counters['write_through'] += 1
+
+    def watch(self, collection_ref, timeout: float = 10.0) -> bool:
+        """
+        Load and then follow the collection with an on_snapshot listener.
+        Returns True once the first snapshot has been applied within `timeout` seconds.
+        """
+        def on_snapshot(docs, changes, read_time):
+            try:
+                if not self.ready.is_set():
+                    self.load((doc.id, doc.to_dict()) for doc in docs)
+                    return
+                for change in changes:
+                    kind = getattr(change.type, 'name', str(change.type))
+                    if kind == 'REMOVED':
+                        self.remove(change.document.id)
+                    else:
+                        self.upsert(change.document.id, change.document.to_dict())
+                self.synced_at = time.time()
+                self.counters['snapshots'] += 1
+            except Exception as e:
+                logging.error(f"Ticket search snapshot failed: {e}")
+
+        self._watch = collection_ref.on_snapshot(on_snapshot)
+        return self.ready.wait(timeout)
+
+    def close(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def ticket_ids(self) -> set:
+        with self._lock:
+            return set(self._docs)
+
+    # --- persistence ---
+    def save(self, path: str) -> None:
+        """
+        Write the index to path (gzipped JSON), replacing the previous file atomically.
+        """
+        with self._lock:
+            state = {'version': INDEX_VERSION, 'synced_at': self.synced_at, 'docs': self._docs, 'terms': self._terms}
+            data = json.dumps(state, default=str).encode('utf-8')
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.counters['saves'] += 1
+
+    def load_file(self, path: str) -> bool:
+        """
+        Restore an index written by save(). Returns False (index untouched) if the file is missing,
+        unreadable or from another INDEX_VERSION.
+        """
+        try:
+            with gzip.open(path, 'rb') as f:
+                state = json.loads(f.read().decode('utf-8'))
+        except (OSError, ValueError) as e:
+            if os.path.exists(path):
+                logging.warning(f"Ignoring unreadable ticket search index {path}: {e}")
+            return False
+        if state.get('version') != INDEX_VERSION:
+            return False
+        with self._lock:
+            self._docs = state['docs']
+            self._terms = state['terms']
+            self._lengths = {ticket_id: sum(terms.values()) for ticket_id, terms in self._terms.items()}
+            self._total_length = sum(self._lengths.values())
+            self._postings = defaultdict(dict)
+            for ticket_id, terms in self._terms.items():
+                for term, frequency in terms.items():
+                    self._postings[term][ticket_id] = frequency
+            self.synced_at = state.get('synced_at')
+        self.ready.set()
+        return True
+
+    # --- lookups ---
+    def search(self, query: str, limit: int = 10, employee_id: str = None, status: str = None) -> list:
+        """
+        Rank tickets against query with BM25. employee_id restricts the results to that employee's
+        tickets, status to one progressReport (case-insensitive). Returns up to `limit`
+        (score, ticket) pairs, best first.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        status = status.casefold() if status else None
+        scores = defaultdict(float)
+        with self._lock:
+            count = len(self._docs)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for ticket_id, frequency in postings.items():
+                    doc = self._docs[ticket_id]
+                    if employee_id is not None and doc.get('employeeID') != employee_id:
+                        continue
+                    if status is not None and str(doc.get('progressReport') or '').casefold() != status:
+                        continue
+                    norm = self.K1 * (1 - self.B + self.B * self._lengths[ticket_id] / average_length)
+                    scores[ticket_id] += idf * frequency * (self.K1 + 1) / (frequency + norm)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            self.counters['searches'] += 1
+            return [(score, dict(self._docs[ticket_id])) for ticket_id, score in ranked]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats['tickets'] = len(self._docs)
+            stats['terms'] = len(self._postings)
+            stats['synced_at'] = self.synced_at
+        return stats
+
+    # --- internals ---
+    def _add(self, ticket_id, data):
+        data = data or {}
+        stored = {field: data[field] for field in STORED_FIELDS if data.get(field) is not None}
+        stored.setdefault('referenceCode', ticket_id)
+        if 'createdAt' in stored and not isinstance(stored['createdAt'], str):
+            stored['createdAt'] = str(stored['createdAt'])
+        terms = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(stored.get(field)):
+                terms[term] += weight
+        self._docs[ticket_id] = stored
+        self._terms[ticket_id] = dict(terms)
+        self._lengths[ticket_id] = sum(terms.values())
+        self._total_length += self._lengths[ticket_id]
+        for term, frequency in terms.items():
+            self._postings[term][ticket_id] = frequency
+
+    def _remove(self, ticket_id):
+        if self._docs.pop(ticket_id, None) is None:
+            return
+        for term in self._terms.pop(ticket_id, {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(ticket_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(ticket_id, 0.0)
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+
+# The in-memory Firestore client lives with the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from memoryFirestore import MemoryFirestore  # noqa: E402
+
+from firebaseTests import firebaseFullV10 as backend  # noqa: E402
+from firebaseTests.employeeDirectory import EmployeeDirectory  # noqa: E402
+from firebaseTests.llmCache import LLMResponseCache  # noqa: E402
+from firebaseTests.ticketCache import TicketCache  # noqa: E402
+from firebaseTests.ticketSearch import TicketSearchIndex  # noqa: E402
+
+
+@pytest.fixture
+def memory_db(monkeypatch):
+    """
+    An empty MemoryFirestore as the backend's database, with fresh in-process caches and indexes
+    (and no saved search index read or written).
+    """
+    db = MemoryFirestore()
+    monkeypatch.setattr(backend, '_db', db)
+    ticket_cache, ticket_search_index = TicketCache(ttl=backend.TICKET_CACHE_TTL), TicketSearchIndex()
+    monkeypatch.setattr(backend, 'ticket_cache', ticket_cache)
+    monkeypatch.setattr(backend, 'ticket_search_index', ticket_search_index)
+    monkeypatch.setattr(backend, 'employee_directory', EmployeeDirectory())
+    monkeypatch.setattr(backend, 'ticket_write_listeners', [ticket_cache.apply_write, ticket_search_index.apply_write])
+    monkeypatch.setattr(backend, 'TICKET_SEARCH_INDEX_PATH', None)
+    return db
+
+
+class FakeCompletions:
+    """
+    Stands in for AsyncOpenAI().chat.completions: answers with the queued replies in order, where a
+    reply is a string, an exception to raise, or (seconds, reply) to answer after a delay. Streamed
+    requests get the reply word by word; a list reply streams its items, and an exception among
+    them breaks the stream there. Requests cancelled while waiting are counted in `cancelled`.
+    """
+
+    def __init__(self):
+        self.replies = []
+        self.requests = []
+        self.cancelled = 0
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        reply = self.replies.pop(0) if self.replies else "ok"
+        if isinstance(reply, tuple):
+            delay, reply = reply
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        if isinstance(reply, BaseException):
+            raise reply
+        if kwargs.get('stream'):
+            if isinstance(reply, str):
+                words = reply.split(' ')
+                reply = [word + ' ' for word in words[:-1]] + words[-1:]
+            return self._stream(reply)
+        message = types.SimpleNamespace(content=reply)
+        usage = types.SimpleNamespace(prompt_tokens=10, completion_tokens=len(reply.split()))
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+    async def _stream(self, parts):
+        for part in parts:
+            if isinstance(part, BaseException):
+                raise part
+            delta = types.SimpleNamespace(content=part)
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)], usage=None)
+        usage = types.SimpleNamespace(prompt_tokens=10, completion_tokens=len(parts))
+        yield types.SimpleNamespace(choices=[], usage=usage)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """
+    The backend's LLM client replaced by FakeCompletions, with a memory-only response cache,
+    no cassette, fresh circuit breakers and no backoff between retries.
+    """
+    completions = FakeCompletions()
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    monkeypatch.setattr(backend, 'get_async_llm_client', lambda: client)
+    monkeypatch.setattr(backend, 'llm_cache', LLMResponseCache(path=None))
+    monkeypatch.setattr(backend, 'llm_cassette', None)
+    monkeypatch.setattr(backend, 'LLM_CASSETTE_MODE', "")
+    monkeypatch.setattr(backend, '_circuit_breakers', {})
+    monkeypatch.setattr(backend, 'LLM_BACKOFF_BASE', 0.0)
+    return completions
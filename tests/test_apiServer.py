@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from firebaseTests.apiServer import SessionStore, TurnLimiter, _check_tool_call, create_app
+from firebaseTests.techSession import TechSession
+
+USER = TechSession(employee_id='JS817_669_677', role='user')
+ADMIN = TechSession(employee_id='AD100_200_300', role='admin')
+
+
+def _rejected(session, tool, args):
+    with pytest.raises(web.HTTPException) as excinfo:
+        _check_tool_call(session, tool, args)
+    return excinfo.value.status, json.loads(excinfo.value.text)['error']
+
+
+def test_user_create_ticket_defaults_to_own_employee_id():
+    args = _check_tool_call(USER, 'create_ticket', {'description': 'VPN drops'})
+    assert args == {'description': 'VPN drops', 'employee_id': 'JS817_669_677'}
+
+
+@pytest.mark.parametrize('extra', [{'priority': 'high'}, {'issue_level': 'L0'}, {'defer_triage': False}])
+def test_user_cannot_set_ticket_severity(extra):
+    status, error = _rejected(USER, 'create_ticket', {'description': 'VPN drops', **extra})
+    assert status == 403
+    assert next(iter(extra)) in error
+
+
+def test_user_cannot_update_ticket_priority_through_update_ticket_fields():
+    status, _ = _rejected(USER, 'update_ticket_fields', {'ticket_id': 'JS817_669_677-2025_09_16-0632', 'new_priority': 'high'})
+    assert status == 403
+
+
+def test_user_can_update_own_ticket_description():
+    args = {'ticket_id': 'JS817_669_677-2025_09_16-0632', 'new_description': 'Still broken'}
+    assert _check_tool_call(USER, 'update_ticket_fields', args) == args
+
+
+def test_user_cannot_touch_someone_elses_ticket():
+    status, _ = _rejected(USER, 'delete_ticket', {'ticket_id': 'AD100_200_300-2025_09_16-0632'})
+    assert status == 403
+
+
+def test_user_cannot_call_admin_tool():
+    status, _ = _rejected(USER, 'update_ticket_priority', {'ticket_id': 'JS817_669_677-2025_09_16-0632', 'new_priority': 'high'})
+    assert status == 403
+
+
+def test_unknown_tool_and_bad_arguments():
+    assert _rejected(ADMIN, 'no_such_tool', {})[0] == 404
+    assert _rejected(ADMIN, 'delete_ticket', {'ticket': 'x'})[0] == 400
+
+
+def test_admin_may_set_ticket_severity():
+    args = {'employee_id': 'JS817_669_677', 'description': 'VPN drops', 'priority': 'high', 'issue_level': 'L0'}
+    assert _check_tool_call(ADMIN, 'create_ticket', args) == args
+
+
+@pytest.mark.parametrize('session', [USER, ADMIN])
+@pytest.mark.parametrize('stream', [True, False])
+def test_stream_is_rejected_for_direct_tool_calls(session, stream):
+    status, error = _rejected(session, 'provide_tech_support_advice', {'issue_description': 'VPN drops', 'stream': stream})
+    assert status == 400
+    assert 'chat' in error
+
+
+def test_turn_limiter_sheds_load_beyond_the_queue():
+    async def scenario():
+        limiter = TurnLimiter(max_concurrent=1, max_queued=1)
+        release = asyncio.Event()
+
+        async def turn():
+            async with limiter.slot():
+                await release.wait()
+
+        running = asyncio.ensure_future(turn())
+        queued = asyncio.ensure_future(turn())
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.waiting) == (1, 1)
+        with pytest.raises(web.HTTPServiceUnavailable) as excinfo:
+            async with limiter.slot():
+                pass
+        assert excinfo.value.headers['Retry-After']
+        release.set()
+        await asyncio.gather(running, queued)
+        return limiter.counters
+
+    assert asyncio.run(scenario()) == {'completed': 2, 'failed': 0, 'rejected': 1}
+
+
+def test_turns_waiting_on_their_session_count_against_the_queue():
+    async def scenario():
+        limiter = TurnLimiter(max_concurrent=4, max_queued=1)
+        session_lock = asyncio.Lock()
+        release = asyncio.Event()
+
+        async def turn():
+            async with limiter.slot(session_lock):
+                await release.wait()
+
+        running = asyncio.ensure_future(turn())
+        queued = asyncio.ensure_future(turn())
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.waiting) == (1, 1)
+        with pytest.raises(web.HTTPServiceUnavailable):
+            async with limiter.slot(session_lock):
+                pass
+        release.set()
+        await asyncio.gather(running, queued)
+        assert not session_lock.locked()
+        return limiter.counters
+
+    assert asyncio.run(scenario()) == {'completed': 2, 'failed': 0, 'rejected': 1}
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(ttl=60)
+    entry = store.create(TechSession(employee_id='JS817_669_677'))
+    entry.last_used -= 61
+    with pytest.raises(web.HTTPNotFound):
+        store.get(entry.session_id)
+
+
+def test_tools_endpoint_enforces_user_argument_whitelist(memory_db):
+    memory_db.load('Employees', {'JS817_669_677': {'employeeID': 'JS817_669_677', 'name': 'John Smith', 'role': 'user'}})
+
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            response = await client.post('/sessions', json={'employee_id': 'JS817_669_677'})
+            session_id = (await response.json())['session_id']
+            tools = f'/sessions/{session_id}/tools'
+            escalated = await client.post(f'{tools}/create_ticket', json={'args': {'description': 'VPN drops', 'priority': 'high', 'issue_level': 'L0'}})
+            streamed = await client.post(f'{tools}/provide_tech_support_advice', json={'args': {'issue_description': 'VPN drops', 'stream': True}})
+            return escalated.status, streamed.status
+
+    assert asyncio.run(scenario()) == (403, 400)
+    assert list(memory_db.collection('Tickets').stream()) == []
+
+
+def test_metrics_export_fast_path_routing(memory_db):
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            return await (await client.get('/metrics')).text()
+
+    text = asyncio.run(scenario())
+    assert 'intent_fast_path_hit_rate ' in text
+    assert 'intent_fast_path_total' in text
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.llmMetrics import LLMMetrics
+from firebaseTests.llmResilience import LLMError, LLMTimeoutError
+
+
+def test_client_is_pooled_per_event_loop(monkeypatch):
+    monkeypatch.setattr(backend, 'NVIDIA_API_KEY', "test-key")
+    monkeypatch.setattr(backend, '_async_clients', backend._async_clients.__class__())
+
+    async def clients():
+        return backend.get_async_llm_client(), backend.get_async_llm_client()
+
+    first, again = asyncio.run(clients())
+    other, _ = asyncio.run(clients())
+    assert first is again
+    assert other is not first
+    assert first.max_retries == 0
+    assert first._client.timeout.read == backend.LLM_CALL_TIMEOUT
+
+
+def test_slow_attempt_is_cancelled_and_retried(fake_llm):
+    fake_llm.replies = [(1.0, "late"), "on time"]
+    assert backend.invoke_llm("Reset my VPN token", timeout=0.05) == "on time"
+    assert len(fake_llm.requests) == 2
+    assert fake_llm.cancelled == 1
+
+
+def test_timeout_is_raised_once_every_attempt_timed_out(fake_llm):
+    fake_llm.replies = [(1.0, "late")] * backend.LLM_RETRIES
+    with pytest.raises(LLMTimeoutError) as raised:
+        backend.invoke_llm("Reset my VPN token", timeout=0.05)
+    assert raised.value.attempts == backend.LLM_RETRIES
+    assert fake_llm.cancelled == backend.LLM_RETRIES
+
+
+def test_failed_attempt_is_retried(fake_llm):
+    fake_llm.replies = [ConnectionError("reset by peer"), "recovered"]
+    assert backend.invoke_llm("Reset my VPN token") == "recovered"
+    assert len(fake_llm.requests) == 2
+
+
+def test_error_after_retries_is_raised(fake_llm):
+    fake_llm.replies = [ConnectionError("reset by peer")] * backend.LLM_RETRIES
+    with pytest.raises(LLMError, match="reset by peer"):
+        backend.invoke_llm("Reset my VPN token")
+
+
+def test_cancelling_the_caller_aborts_the_request(fake_llm):
+    fake_llm.replies = [(1.0, "late")]
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(backend.ainvoke_llm("Reset my VPN token"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+    assert fake_llm.cancelled == 1
+    assert len(fake_llm.requests) == 1
+
+
+def test_shim_gives_up_at_the_overall_deadline(fake_llm, monkeypatch):
+    """A request that ignores its per-attempt cancellation is still abandoned at invoke_llm's deadline."""
+    monkeypatch.setattr(backend, 'LLM_RETRIES', 1)
+    monkeypatch.setattr(backend, 'LLM_DEADLINE_GRACE', 0)
+    metrics = LLMMetrics()
+    monkeypatch.setattr(backend, 'llm_metrics', metrics)
+    released = threading.Event()
+
+    async def stubborn(**kwargs):
+        fake_llm.requests.append(kwargs)
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            # Swallows the per-attempt timeout's cancellation, so only the shim can stop the wait
+            while not released.is_set():
+                await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(fake_llm, 'create', stubborn)
+    started = time.perf_counter()
+    try:
+        with pytest.raises(LLMTimeoutError, match="timed out after 0.1 seconds"):
+            backend.invoke_llm("Reset my VPN token", timeout=0.1)
+        assert time.perf_counter() - started < 0.9
+    finally:
+        # Let the abandoned call finish before the next test swaps the backend's globals
+        released.set()
+        deadline = time.monotonic() + 5
+        while not metrics.records and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert metrics.records[-1]['outcome'] == 'cancelled'
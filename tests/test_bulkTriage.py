@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import threading
+
+import pytest
+
+from firebaseTests import bulkTriage
+from firebaseTests import firebaseFullV10 as backend
+
+
+def test_parse_pack_response_keeps_only_well_formed_entries():
+    response = 'Sure! [{"id": "T1", "level": "l1", "priority": "HIGH"}, {"id": "T2", "level": "L9", "priority": "low"},' \
+               ' {"id": "X3", "level": "L2", "priority": "low"}, "junk", {"id": "T4", "level": "L4", "priority": "low"}]'
+    assert bulkTriage.parse_pack_response(response) == {1: ('L1', 'high'), 4: ('L4', 'low')}
+    assert bulkTriage.parse_pack_response("no json here") == {}
+    assert bulkTriage.parse_pack_response("[not json]") == {}
+
+
+def test_pack_prompt_numbers_and_truncates_descriptions():
+    prompt = bulkTriage.build_pack_prompt(["VPN\n  drops", "x" * (bulkTriage.TRIAGE_DESCRIPTION_CHARS + 50)])
+    assert "T1: VPN drops\n" in prompt
+    assert "T2: " + "x" * bulkTriage.TRIAGE_DESCRIPTION_CHARS + "...\n" in prompt
+
+
+class FakeLLM:
+    """
+    Answers packed requests with L1/high for every ticket except those whose description says
+    "skip me" (left out, so they go through the one-by-one fallback); fails on request fail_on.
+    """
+
+    def __init__(self, fail_on=None):
+        self.packed = 0
+        self.single = 0
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, call_site="default", **kwargs):
+        with self._lock:
+            if call_site == "severity":
+                self.single += 1
+                return "LEVEL:L3,PRIORITY:low"
+            self.packed += 1
+            request = self.packed
+        if request == self.fail_on:
+            raise RuntimeError("interrupted")
+        entries = re.findall(r'^T(\d+): (.*)$', prompt, re.M)
+        return json.dumps([{"id": f"T{n}", "level": "L1", "priority": "high"} for n, text in entries if text != "skip me"])
+
+
+@pytest.fixture
+def tickets(memory_db, monkeypatch):
+    memory_db.load('Tickets', {
+        f'T{i:03d}': {'problemDescription': "skip me" if i == 7 else f"issue {i}", 'progressReport': 'Unassigned',
+                      'issueLevel': 'L2', 'priority': 'medium'}
+        for i in range(30)
+    })
+    memory_db.load('Tickets', {'DONE': {'problemDescription': "fixed", 'progressReport': 'Resolved'}})
+    monkeypatch.setattr(bulkTriage, 'TRIAGE_WRITE_BATCH', 5)
+    return memory_db
+
+
+def _levels(db):
+    return {doc.id: (doc.to_dict().get('issueLevel'), doc.to_dict().get('triageStatus')) for doc in db.collection('Tickets').stream()}
+
+
+def test_run_packs_tickets_and_falls_back_for_missing_entries(tickets, monkeypatch, tmp_path):
+    llm = FakeLLM()
+    monkeypatch.setattr(backend, 'invoke_llm', llm)
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    report = bulkTriage.run_bulk_triage(pack_size=10, parallel=2, checkpoint_path=checkpoint)
+    assert (report['seen'], report['triaged'], report['failed']) == (30, 30, 0)
+    assert (llm.packed, llm.single, report['fallbacks']) == (3, 1, 1)
+    levels = _levels(tickets)
+    assert levels['T007'] == ('L3', 'done')
+    assert levels['T008'] == ('L1', 'done')
+    assert 'triageStatus' not in tickets.collection('Tickets').document('DONE').get().to_dict()
+    assert not os.path.exists(checkpoint)
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(tickets, monkeypatch, tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    monkeypatch.setattr(backend, 'invoke_llm', FakeLLM(fail_on=3))
+    with pytest.raises(RuntimeError):
+        bulkTriage.run_bulk_triage(pack_size=5, parallel=1, checkpoint_path=checkpoint)
+    with open(checkpoint, encoding='utf-8') as f:
+        done = set(json.load(f)['done'])
+    assert done and len(done) < 30
+    assert all(_levels(tickets)[ticket_id][1] == 'done' for ticket_id in done)
+
+    llm = FakeLLM()
+    monkeypatch.setattr(backend, 'invoke_llm', llm)
+    report = bulkTriage.run_bulk_triage(pack_size=5, parallel=1, checkpoint_path=checkpoint)
+    assert report['skipped'] == len(done)
+    assert report['triaged'] == 30 - len(done)
+    assert llm.packed == -(-(30 - len(done)) // 5)
+    assert all(status == 'done' for ticket_id, (_, status) in _levels(tickets).items() if ticket_id != 'DONE')
+    assert not os.path.exists(checkpoint)
+
+
+def test_packs_classified_before_an_interruption_are_written(tickets, monkeypatch, tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    monkeypatch.setattr(bulkTriage, 'TRIAGE_WRITE_BATCH', 100)
+    monkeypatch.setattr(backend, 'invoke_llm', FakeLLM(fail_on=1))
+    with pytest.raises(RuntimeError):
+        bulkTriage.run_bulk_triage(pack_size=5, parallel=3, checkpoint_path=checkpoint)
+    with open(checkpoint, encoding='utf-8') as f:
+        done = set(json.load(f)['done'])
+    # 6 packs, all in flight at once: only the failed one is left to the next run
+    assert len(done) == 25
+    assert all(_levels(tickets)[ticket_id][1] == 'done' for ticket_id in done)
+
+
+def test_checkpoint_for_another_status_is_ignored(tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    bulkTriage.TriageCheckpoint(path, 'Unassigned').add(['A', 'B'])
+    assert bulkTriage.TriageCheckpoint(path, 'Unassigned').done == {'A', 'B'}
+    assert bulkTriage.TriageCheckpoint(path, 'Assigned').done == set()
+
+
+def test_batch_failure_falls_back_to_single_writes(tickets):
+    written = bulkTriage.apply_triage({'T001': ('L0', 'high'), 'GONE': ('L0', 'high')})
+    assert written == ['T001']
+    assert _levels(tickets)['T001'] == ('L0', 'done')
+    assert not tickets.collection('Tickets').document('GONE').get().exists
@@ -0,0 +1,68 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.techSession import TechSession
+
+EMPLOYEE = 'JS817_669_677'
+
+
+@pytest.fixture
+def employees(memory_db):
+    memory_db.load('Employees', {EMPLOYEE: {'name': 'Jane Smith', 'email': 'jane@example.com', 'phone': '0400 000 000'}})
+    return memory_db
+
+
+def _only_ticket(db):
+    (ticket,) = [doc.to_dict() for doc in db.collection('Tickets').stream()]
+    return ticket
+
+
+@pytest.mark.parametrize('level, priority, expected', [
+    ('L1', 'high', ('L1', 'high')),
+    (' l3 ', 'Medium', ('L3', 'medium')),
+    ('L5', 'high', None),
+    ('L1', 'urgent', None),
+    (None, 'low', None),
+    ('L2', None, None),
+])
+def test_supplied_severity_is_normalized_or_rejected(level, priority, expected):
+    assert backend._valid_severity(level, priority) == expected
+
+
+def test_supplied_severity_skips_the_severity_call(employees, fake_llm):
+    backend.create_ticket(EMPLOYEE, "Laptop won't boot", issue_level='l1', priority='HIGH', defer_triage=True)
+    ticket = _only_ticket(employees)
+    assert (ticket['issueLevel'], ticket['priority']) == ('L1', 'high')
+    assert 'triageStatus' not in ticket
+    assert fake_llm.requests == []
+
+
+def test_invalid_supplied_severity_falls_back_to_the_severity_call(employees, fake_llm):
+    fake_llm.replies = ["LEVEL:L0,PRIORITY:high"]
+    backend.create_ticket(EMPLOYEE, "Whole office is offline", issue_level='L9', priority='high', defer_triage=False)
+    ticket = _only_ticket(employees)
+    assert (ticket['issueLevel'], ticket['priority']) == ('L0', 'high')
+    assert len(fake_llm.requests) == 1
+
+
+def test_combined_mode_asks_the_intent_engine_for_severity(monkeypatch):
+    monkeypatch.setattr(backend, 'INTENT_COMBINED_SEVERITY', False)
+    plain = backend.build_intent_system_prompt()
+    monkeypatch.setattr(backend, 'INTENT_COMBINED_SEVERITY', True)
+    combined = backend.build_intent_system_prompt()
+    assert backend.COMBINED_SEVERITY_INSTRUCTIONS not in plain
+    assert backend.COMBINED_SEVERITY_INSTRUCTIONS in combined
+    assert "create_ticket(employee_id: str, description: str, issue_level: str, priority: str)" in combined
+    assert "create_ticket(employee_id: str, description: str)" in plain
+
+
+def test_severity_from_the_intent_engine_reaches_create_ticket(employees, fake_llm, monkeypatch):
+    intent = {'tool': 'create_ticket', 'missing_args': [],
+              'args': {'employee_id': EMPLOYEE, 'description': "Laptop won't boot", 'issue_level': 'L1', 'priority': 'high'}}
+    monkeypatch.setattr(backend, 'FAST_PATH_ROUTING', True)
+    monkeypatch.setattr(backend, 'route_intent', lambda *args: [intent])
+    session = TechSession(employee_id=EMPLOYEE, role='user')
+    assert "Support Ticket Created" in backend.handle_command("my laptop won't boot, please raise a ticket", session=session)
+    ticket = _only_ticket(employees)
+    assert (ticket['issueLevel'], ticket['priority']) == ('L1', 'high')
+    assert fake_llm.requests == []
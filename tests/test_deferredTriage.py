@@ -0,0 +1,56 @@
+from firebaseTests import firebaseFullV10 as backend
+
+REF = 'JS817_669_677-2025_10_01-0900'
+
+
+def _ticket(**fields):
+    return {'employeeID': 'JS817_669_677', 'referenceCode': REF, 'problemDescription': 'VPN drops',
+            'issueLevel': 'L2', 'priority': 'medium', 'triageStatus': 'pending', **fields}
+
+
+def _stored(db):
+    return db.collection('Tickets').document(REF).get().to_dict()
+
+
+def test_triage_result_replaces_provisional_values(memory_db):
+    memory_db.load('Tickets', {REF: _ticket()})
+    assert backend._apply_triage(REF, 'L0', 'high') is True
+    stored = _stored(memory_db)
+    assert (stored['issueLevel'], stored['priority'], stored['triageStatus']) == ('L0', 'high', 'done')
+    assert stored['updatedAt']  # so a restored search index catches up with it
+
+
+def test_admin_edit_before_triage_is_kept(memory_db):
+    memory_db.load('Tickets', {REF: _ticket(priority='low')})
+    assert backend._apply_triage(REF, 'L0', 'high') is False
+    stored = _stored(memory_db)
+    assert (stored['issueLevel'], stored['priority'], stored['triageStatus']) == ('L2', 'low', 'skipped')
+
+
+def test_admin_edit_between_check_and_write_is_kept(memory_db):
+    memory_db.load('Tickets', {REF: _ticket()})
+    edited = []
+
+    def admin_edits_after_first_read(op, collection, seconds):
+        if op == 'get' and not edited:
+            edited.append(True)
+            memory_db.collection('Tickets').document(REF).update({'priority': 'low'})
+
+    memory_db.on_op = admin_edits_after_first_read
+    assert backend._apply_triage(REF, 'L0', 'high') is False
+    assert _stored(memory_db)['priority'] == 'low'
+
+
+def test_deleted_ticket_is_not_recreated(memory_db):
+    assert backend._apply_triage(REF, 'L0', 'high') is False
+    assert not memory_db.collection('Tickets').document(REF).get().exists
+
+
+def test_unparseable_severity_answer_is_retried_not_cached(memory_db, fake_llm, monkeypatch):
+    monkeypatch.setattr(backend, 'TRIAGE_RETRY_DELAY', 0)
+    memory_db.load('Tickets', {REF: _ticket()})
+    fake_llm.replies = ["I think it is fairly serious", "LEVEL:L0,PRIORITY:high"]
+    backend._triage_ticket(REF, 'VPN drops')
+    stored = _stored(memory_db)
+    assert (stored['issueLevel'], stored['priority'], stored['triageStatus']) == ('L0', 'high', 'done')
+    assert len(fake_llm.requests) == 2
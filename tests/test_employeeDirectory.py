@@ -0,0 +1,129 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.employeeDirectory import EmployeeDirectory, normalize_phone
+from firebaseTests.techSession import TechSession, use_session
+
+EMPLOYEES = {
+    'JS817_669_677': {'name': 'Jane Smith', 'email': 'jane.smith@example.com', 'phone': '+61 412 345 678',
+                      'role': 'user', 'password': 'hunter2', 'taxFileNumber': '123 456 789'},
+    'JO204_118_930': {'name': 'John Jones', 'email': 'jj@example.com', 'phone': '0498 765 432', 'role': 'user'},
+    'MR909_162_526': {'name': 'Maria Rodriguez', 'email': 'maria.r@example.com', 'phone': '(02) 9123 4567', 'role': 'admin'},
+}
+
+
+@pytest.fixture
+def directory():
+    directory = EmployeeDirectory()
+    directory.load(EMPLOYEES.items())
+    return directory
+
+
+def _ids(matches):
+    return [employee['employeeID'] for _, employee in matches]
+
+
+@pytest.mark.parametrize('phone, expected', [
+    ('+61 412 345 678', '0412345678'),
+    ('0412-345-678', '0412345678'),
+    ('(02) 9123 4567', '0291234567'),
+    (None, ''),
+])
+def test_phone_numbers_are_normalized(phone, expected):
+    assert normalize_phone(phone) == expected
+
+
+def test_private_fields_are_never_returned(directory):
+    assert 'password' not in directory.get('JS817_669_677')
+    assert 'taxFileNumber' not in directory.search('Jane')[0][1]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('JS817_669_677', 'JS817_669_677'),
+    ('js817_669_677', 'JS817_669_677'),
+    ('Maria', 'MR909_162_526'),
+    ('rodri', 'MR909_162_526'),
+    ('jj@exa', 'JO204_118_930'),
+    ('Jane Smith', 'JS817_669_677'),
+])
+def test_exact_and_prefix_lookups(directory, query, expected):
+    assert _ids(directory.search(query))[0] == expected
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('Jane Smyth', 'JS817_669_677'),
+    ('Mariah Rodrigues', 'MR909_162_526'),
+])
+def test_misspelled_names_match_fuzzily(directory, query, expected):
+    score, employee = directory.search(query)[0]
+    assert employee['employeeID'] == expected
+    assert score < 2.0  # ranked below any exact or prefix match
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('0412 345 678', 'JS817_669_677'),
+    ('+61 2 9123 4567', 'MR909_162_526'),
+    ('765432', 'JO204_118_930'),
+])
+def test_phone_lookups_ignore_formatting(directory, query, expected):
+    assert _ids(directory.search(query)) == [expected]
+
+
+def test_unrelated_query_finds_nothing(directory):
+    assert directory.search('Zebediah') == []
+    assert directory.search('  ') == []
+
+
+def test_write_through_keeps_the_indexes_current(directory):
+    directory.patch('JO204_118_930', {'name': 'John Brown', 'phone': '0400 111 222'})
+    assert _ids(directory.search('Brown')) == ['JO204_118_930']
+    assert directory.search('Jones') == []
+    assert _ids(directory.search('0400 111 222')) == ['JO204_118_930']
+    assert directory.search('0498 765 432') == []
+    directory.remove('MR909_162_526')
+    assert directory.search('Maria') == []
+    directory.upsert('AD100_200_300', {'name': 'Ada Lovelace'})
+    assert _ids(directory.search('Ada')) == ['AD100_200_300']
+    assert len(directory) == 3
+
+
+# --- the search_employees tool ---
+
+@pytest.fixture
+def employees(memory_db):
+    memory_db.load('Employees', EMPLOYEES)
+    return memory_db
+
+
+def test_tool_loads_the_directory_once(employees, monkeypatch):
+    monkeypatch.setattr(backend, 'EMPLOYEE_DIRECTORY_LISTEN', False)
+    with use_session(TechSession(employee_id='MR909_162_526', role='admin')):
+        first = backend.search_employees('Jane')
+        backend.search_employees('0498 765 432')
+    assert 'JS817_669_677' in first and 'hunter2' not in first
+    assert employees.ops[('query', 'Employees')] == 1
+
+
+def test_tool_sees_updates_made_through_the_app(employees):
+    with use_session(TechSession(employee_id='MR909_162_526', role='admin')):
+        backend.search_employees('Jane')
+        backend.update_employee_name('JS817_669_677', 'Janet Smithers')
+        assert 'JS817_669_677' in backend.search_employees('Smithers')
+
+
+def test_listener_follows_writes_made_elsewhere(employees, monkeypatch):
+    monkeypatch.setattr(backend, 'EMPLOYEE_DIRECTORY_LISTEN', True)
+    with use_session(TechSession(employee_id='MR909_162_526', role='admin')):
+        assert 'JO204_118_930' in backend.search_employees('Jones')
+        # Another process edits the collection directly
+        employees.collection('Employees').document('JO204_118_930').update({'name': 'John Brown'})
+        employees.collection('Employees').document('JS817_669_677').delete()
+        assert 'JO204_118_930' in backend.search_employees('Brown')
+        assert 'No employees found' in backend.search_employees('Jane Smith')
+    assert employees.ops[('query', 'Employees')] == 0
+
+
+def test_tool_is_admin_only(employees):
+    with use_session(TechSession(employee_id='JS817_669_677', role='user')):
+        assert "admin privileges" in backend.search_employees('Jane')
+    assert employees.ops[('query', 'Employees')] == 0
@@ -0,0 +1,72 @@
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
+
+from firebaseTests import firebaseFullV10 as backend
+
+TICKETS = [f'JS817_669_677-2025_10_0{n}-0900' for n in range(1, 6)]
+
+
+@pytest.fixture
+def tickets(memory_db):
+    memory_db.load('Tickets', {ticket_id: {'employeeID': 'JS817_669_677', 'priority': 'low', 'progressReport': 'Unassigned'}
+                               for ticket_id in TICKETS})
+    return memory_db
+
+
+def _priority(db, ticket_id):
+    return db.collection('Tickets').document(ticket_id).get().to_dict()['priority']
+
+
+def test_calls_are_grouped_in_order():
+    calls = [('update_ticket_priority', {}), ('delete_ticket', {}), ('show_tickets', {}), ('show_employee', {}),
+             ('search_tickets', {}), ('create_ticket', {}), ('update_ticket_status', {})]
+    assert backend._plan_tool_calls(calls) == [
+        ('write', [0, 1]), ('read', [2, 3]), ('read', [4]), ('single', [5]), ('write', [6])]
+
+
+def test_consecutive_writes_commit_as_one_batch(tickets):
+    calls = [('update_ticket_priority', {'ticket_id': t, 'new_priority': 'high'}) for t in TICKETS[:3]]
+    calls.append(('delete_ticket', {'ticket_id': TICKETS[3]}))
+    results = backend.execute_tool_calls(calls)
+    assert results[0] == f"**✅ Ticket `{TICKETS[0]}` priority updated to `high`.**"
+    assert results[3] == f"**🗑️ Ticket `{TICKETS[3]}` deleted.**"
+    assert tickets.ops[('commit', 'Tickets')] == 1 and tickets.ops[('update', 'Tickets')] == 0
+    assert [_priority(tickets, t) for t in TICKETS[:3]] == ['high'] * 3
+    assert not tickets.collection('Tickets').document(TICKETS[3]).get().exists
+
+
+def test_batches_are_split_at_the_write_limit(tickets, monkeypatch):
+    monkeypatch.setattr(backend, 'WRITE_BATCH_LIMIT', 2)
+    backend.execute_tool_calls([('update_ticket_priority', {'ticket_id': t, 'new_priority': 'high'}) for t in TICKETS])
+    assert tickets.ops[('commit', 'Tickets')] == 3
+    assert [_priority(tickets, t) for t in TICKETS] == ['high'] * 5
+
+
+def test_rejected_batch_falls_back_to_per_item_results(tickets):
+    calls = [('update_ticket_priority', {'ticket_id': TICKETS[0], 'new_priority': 'high'}),
+             ('update_ticket_priority', {'ticket_id': 'MISSING', 'new_priority': 'high'}),
+             ('delete_ticket', {'ticket_id': TICKETS[1]})]
+    results = backend.execute_tool_calls(calls)
+    assert results[1] == "Ticket with ID MISSING does not exist."
+    assert _priority(tickets, TICKETS[0]) == 'high'
+    assert not tickets.collection('Tickets').document(TICKETS[1]).get().exists
+
+
+def test_ambiguous_commit_failure_is_not_replayed(tickets):
+    def commit_lands_then_times_out(op, collection, seconds):
+        if op == 'commit':
+            raise ServiceUnavailable("deadline exceeded")
+
+    tickets.on_op = commit_lands_then_times_out
+    calls = [('update_ticket_priority', {'ticket_id': t, 'new_priority': 'high'}) for t in TICKETS[:2]]
+    with pytest.raises(ServiceUnavailable):
+        backend.execute_tool_calls(calls)
+    assert tickets.ops[('update', 'Tickets')] == 0
+
+
+def test_unplannable_arguments_run_through_the_tool(tickets):
+    calls = [('update_ticket_priority', {'ticket_id': TICKETS[0], 'new_priority': 'high'}),
+             ('update_ticket_fields', {'ticket_id': TICKETS[1], 'new_colour': 'red'})]
+    results = backend.execute_tool_calls(calls)
+    assert tickets.ops[('commit', 'Tickets')] == 0
+    assert "new_colour" in results[1]
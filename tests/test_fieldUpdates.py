@@ -0,0 +1,77 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+
+REF = 'JS817_669_677-2025_10_01-0900'
+EMPLOYEE = 'JS817_669_677'
+
+
+@pytest.fixture
+def records(memory_db):
+    memory_db.load('Tickets', {REF: {'employeeID': EMPLOYEE, 'priority': 'low', 'issueLevel': 'L3',
+                                     'progressReport': 'Unassigned', 'problemDescription': 'VPN drops'}})
+    memory_db.load('Employees', {EMPLOYEE: {'name': 'Jane Smith', 'email': 'jane@example.com', 'password': 'old'}})
+    return memory_db
+
+
+def _stored(db, collection, doc_id):
+    return db.collection(collection).document(doc_id).get().to_dict()
+
+
+def test_every_tool_maps_to_a_wrapper_with_the_same_name():
+    for tool, (_, _, value_arg, _) in backend.FIELD_UPDATES.items():
+        assert value_arg in getattr(backend, tool).__code__.co_varnames
+
+
+def test_single_field_update_is_one_write_without_a_read(records):
+    reply = backend.update_ticket_priority(REF, 'high')
+    assert reply == f"**✅ Ticket `{REF}` priority updated to `high`.**"
+    assert records.ops[('update', 'Tickets')] == 1
+    assert records.ops[('get', 'Tickets')] == 0
+    stored = _stored(records, 'Tickets', REF)
+    assert stored['priority'] == 'high'
+    assert stored['updatedAt']
+
+
+@pytest.mark.parametrize('update, message', [
+    (lambda: backend.update_ticket_status('JS817_669_677-2020_01_01-0000', 'Closed'),
+     "Ticket with ID JS817_669_677-2020_01_01-0000 does not exist."),
+    (lambda: backend.update_employee_email('XX000_000_000', 'x@example.com'), "Employee with ID XX000_000_000 does not exist."),
+    (lambda: backend.update_ticket_fields('JS817_669_677-2020_01_01-0000', new_priority='high'),
+     "Ticket with ID JS817_669_677-2020_01_01-0000 does not exist."),
+])
+def test_missing_document_gets_the_not_found_message(records, update, message):
+    assert update() == message
+
+
+def test_missing_document_is_not_created(records):
+    backend.update_employee_name('XX000_000_000', 'Nobody')
+    assert not records.collection('Employees').document('XX000_000_000').get().exists
+
+
+def test_several_fields_change_in_one_write(records):
+    reply = backend.update_ticket_fields(REF, new_priority='high', new_issue_level='L1', new_description=None)
+    assert reply == f"**✅ Ticket `{REF}` updated: priority → `high`, issue level → `L1`.**"
+    assert records.ops[('update', 'Tickets')] == 1
+    stored = _stored(records, 'Tickets', REF)
+    assert (stored['priority'], stored['issueLevel'], stored['problemDescription']) == ('high', 'L1', 'VPN drops')
+
+
+def test_password_value_is_left_out_of_the_confirmation(records):
+    reply = backend.update_employee_fields(EMPLOYEE, new_password='hunter2', new_email='jane.s@example.com')
+    assert 'hunter2' not in reply
+    assert "password" in reply and "`jane.s@example.com`" in reply
+    assert _stored(records, 'Employees', EMPLOYEE)['password'] == 'hunter2'
+
+
+def test_unknown_field_is_rejected_before_writing(records):
+    with pytest.raises(ValueError, match="new_colour"):
+        backend.update_ticket_fields(REF, new_colour='red')
+    with pytest.raises(ValueError, match="new_priority"):
+        backend.update_employee_fields(EMPLOYEE, new_priority='high')
+    assert records.ops[('update', 'Tickets')] == records.ops[('update', 'Employees')] == 0
+
+
+def test_nothing_to_update(records):
+    assert backend.update_ticket_fields(REF) == f"No fields to update for ticket `{REF}`."
+    assert records.ops[('update', 'Tickets')] == 0
@@ -0,0 +1,43 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.intentClassifier import load_corpus
+from firebaseTests.techSession import TechSession
+
+pytest.importorskip("numpy")
+
+SESSION = TechSession(employee_id='JS817_669_677', role='user')
+
+
+def test_corpus_labels_are_tools_handle_command_can_run():
+    _, labels = load_corpus(backend.INTENT_CORPUS_PATH)
+    for label in set(labels):
+        assert label == 'none' or callable(getattr(backend, label, None)), label
+
+
+@pytest.mark.parametrize('text', [
+    "delete my tickets", "remove all my tickets", "cancel my open tickets",
+    "Delete one of my tickets", "get rid of my tickets",
+])
+def test_destructive_requests_are_never_answered_locally(text):
+    assert backend.classify_intent_locally(text, session=SESSION) is None
+
+
+def test_admin_only_requests_are_still_denied_locally():
+    result = backend.classify_intent_locally("Delete employee MR909_162_526", session=SESSION)
+    assert result is None or result[0]['tool'] == 'notAdmin'
+
+
+def test_off_topic_request_is_not_a_tool_call():
+    result = backend.classify_intent_locally("tell me a joke", session=SESSION)
+    assert result is None or result[0]['tool'] == 'none'
+
+
+def test_no_wrong_local_answers_on_heldout_phrasings():
+    texts, labels = load_corpus(backend.INTENT_HELDOUT_PATH)
+    wrong = []
+    for text, label in zip(texts, labels):
+        result = backend.classify_intent_locally(text, session=SESSION)
+        if result is not None and result[0]['tool'] != label:
+            wrong.append((text, label, result[0]['tool']))
+    assert wrong == []
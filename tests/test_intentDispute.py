@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.llmResilience import LLMError
+from firebaseTests.techSession import TechSession
+
+NONE = [{'tool': 'none', 'args': {}, 'missing_args': []}]
+ADVICE = [{'tool': 'provide_tech_support_advice', 'args': {}, 'missing_args': []}]
+
+
+@pytest.fixture
+def intents(monkeypatch):
+    """
+    Both intent LLMs replaced by stubs answering `answers[llm]` after `delays[llm]` seconds,
+    with the local routers off so every command reaches them.
+    """
+    monkeypatch.setattr(backend, 'FAST_PATH_ROUTING', False)
+    monkeypatch.setattr(backend, 'LOCAL_INTENT_CLASSIFIER', False)
+    state = {'answers': {1: NONE, 2: NONE}, 'delays': {1: 0.0, 2: 0.0}, 'release': {}}
+
+    def stub(llm):
+        def analyze(command, *args, **kwargs):
+            time.sleep(state['delays'][llm])
+            if llm in state['release']:
+                state['release'][llm].wait(5)
+            answer = state['answers'][llm]
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+        return analyze
+
+    monkeypatch.setattr(backend, 'analyze_ticket_intent', stub(1))
+    monkeypatch.setattr(backend, 'analyze_ticket_intent_llm2', stub(2))
+    return state
+
+
+def test_both_extractions_run_concurrently(intents):
+    intents['delays'] = {1: 0.3, 2: 0.3}
+    started = time.perf_counter()
+    reply = backend.handle_command("hello there", session=TechSession())
+    assert time.perf_counter() - started < 0.5
+    assert "No ticket or employee management action detected." in reply
+
+
+def test_disagreement_is_shown_under_the_wait_policy(intents, monkeypatch):
+    monkeypatch.setattr(backend, 'INTENT_DISPUTE_POLICY', "wait")
+    intents['answers'][2] = ADVICE
+    reply = backend.handle_command("hello there", session=TechSession())
+    assert "Dispute detected" in reply
+    assert "No ticket or employee management action detected." in reply
+
+
+def test_failed_second_opinion_is_not_a_dispute(intents):
+    intents['answers'][2] = LLMError("second model down")
+    reply = backend.handle_command("hello there", session=TechSession())
+    assert "Dispute" not in reply
+
+
+def test_failed_primary_reports_the_error(intents):
+    intents['answers'][1] = LLMError("primary model down")
+    reply = backend.handle_command("hello there", session=TechSession())
+    assert "trouble processing your request" in reply
+
+
+def test_async_policy_acts_on_the_primary_and_attaches_the_verdict_later(intents, monkeypatch):
+    monkeypatch.setattr(backend, 'INTENT_DISPUTE_POLICY', "async")
+    intents['answers'][2] = ADVICE
+    intents['release'][2] = released = threading.Event()
+    session = TechSession()
+    reply = backend.handle_command("hello there", session=session)
+    assert "Dispute" not in reply
+    assert 'last_intent_dispute' not in session
+
+    released.set()
+    deadline = time.monotonic() + 5
+    while 'last_intent_dispute' not in session and time.monotonic() < deadline:
+        time.sleep(0.01)
+    verdict = session['last_intent_dispute']
+    assert verdict['disputed']
+    assert (verdict['llm1'], verdict['llm2']) == (NONE, ADVICE)
+    assert backend.intent_dispute_log[-1] is verdict
@@ -0,0 +1,73 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.promptTokens import PromptSizeTracker, count_tokens
+from firebaseTests.techSession import TechSession
+
+JANE = TechSession(employee_id='JS817_669_677', role='user', last_ticket_map={'1': 'JS817_669_677-2025_10_01-0900'})
+ADA = TechSession(employee_id='AD100_200_300', role='admin', last_issue_description="Printer jams")
+
+
+def _prompts(request, session, compact, chat_history=None):
+    sent = {}
+
+    def capture(user_message, system_prompt):
+        sent.update(user=user_message, system=system_prompt)
+        return "[]"
+
+    backend.process_prompt_for_tool_call(request, tech_session=session, llm_func=capture, chat_history=chat_history, compact=compact)
+    return sent['system'], sent['user']
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_system_prefix_is_identical_across_users_and_requests(compact):
+    system_1, user_1 = _prompts("show my tickets", JANE, compact)
+    system_2, user_2 = _prompts("my internet is really slow", ADA, compact,
+                                chat_history=[{'role': 'user', 'content': "hello"}])
+    assert system_1 == system_2
+    for dynamic in ('JS817_669_677', 'AD100_200_300', 'Printer jams', 'show my tickets', 'hello'):
+        assert dynamic not in system_1
+    assert 'JS817_669_677-2025_10_01-0900' in user_1
+    assert '"admin"' in user_2 and 'Printer jams' in user_2 and 'USER: hello' in user_2
+
+
+def test_compact_mode_moves_a_few_relevant_examples_into_the_request():
+    full_system, full_user = _prompts("my internet is really slow", JANE, compact=False)
+    compact_system, compact_user = _prompts("my internet is really slow", JANE, compact=True)
+    assert "Examples:" in full_system and "Examples:" not in full_user
+    assert "Examples:" not in compact_system and "Examples:" in compact_user
+    assert compact_user.count('User: "') == backend.INTENT_COMPACT_EXAMPLES
+    assert count_tokens(compact_system + compact_user) < count_tokens(full_system + full_user)
+
+
+@pytest.mark.parametrize('classifier', ['tfidf', 'word overlap'])
+@pytest.mark.parametrize('request_text, expected', [
+    ("my internet is so slow today", "My internet is really slow"),
+    ("can I delete one of my tickets", "Can I delete a ticket?"),
+])
+def test_examples_are_chosen_by_relevance(monkeypatch, classifier, request_text, expected):
+    if classifier == 'word overlap':
+        monkeypatch.setattr(backend, 'get_intent_classifier', lambda: None)
+    assert [text for text, _ in backend.select_intent_examples(request_text, k=1)] == [expected]
+    chosen = backend.select_intent_examples(request_text)
+    assert [example for example in backend.INTENT_FEW_SHOT_EXAMPLES if example in chosen] == chosen  # original order
+
+
+def test_prompt_sizes_are_reported_per_call_site():
+    sizes = PromptSizeTracker()
+    sizes.record('intent', "x" * 40, system_prompt="y" * 360)
+    sizes.record('intent', "x" * 120, system_prompt="y" * 360)
+    sizes.record('advice', "z" * 20)
+    report = sizes.report()
+    assert list(report) == ['intent', 'advice']  # largest first
+    intent = report['intent']
+    assert intent['calls'] == 2
+    assert intent['max_prompt_tokens'] == count_tokens("x" * 120) + count_tokens("y" * 360)
+    assert 0.5 < intent['prefix_share'] < 1.0
+    assert report['advice']['prefix_share'] == 0.0
+
+
+def test_llm_calls_are_counted_under_their_call_site(fake_llm, monkeypatch):
+    monkeypatch.setattr(backend, 'prompt_sizes', PromptSizeTracker())
+    backend.invoke_llm("Wi-Fi keeps dropping", system_prompt="Be brief", call_site="advice")
+    assert backend.prompt_size_report()['advice']['calls'] == 1
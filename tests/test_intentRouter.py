@@ -0,0 +1,79 @@
+import pytest
+
+from firebaseTests import intentRouter
+from firebaseTests.intentRouter import route_intent, route_stats
+from firebaseTests.techSession import TechSession
+
+OWN = 'JS817_669_677-2025_10_01-0900'
+OTHER = 'AD100_200_300-2025_10_02-0900'
+DENIED = [{'tool': 'notAdmin', 'args': {'message': "You do not have admin privileges for this action."}, 'missing_args': []}]
+
+
+def _user():
+    return TechSession(employee_id='JS817_669_677', role='user', last_ticket_map={'1': OWN, '2': OTHER})
+
+
+def _admin():
+    return TechSession(employee_id='AD100_200_300', role='admin', last_ticket_map={'1': OWN, '2': OTHER})
+
+
+def _routed(request, session):
+    result = route_intent(request, session)
+    return result if result is None else [(r['tool'], r['args']) for r in result]
+
+
+@pytest.mark.parametrize('request_text, expected', [
+    ("Show me my tickets please", [('show_tickets', {'employee_id': 'JS817_669_677'})]),
+    ("what's my info?", [('show_employee_info', {'employee_id': 'JS817_669_677'})]),
+    ("edit a ticket", [('show_tickets_for_update', {})]),
+    ("find tickets mentioning VPN drops", [('search_tickets', {'query': 'VPN drops'})]),
+    ("delete ticket 1", [('delete_ticket', {'ticket_id': OWN})]),
+    (f"remove {OWN}", [('delete_ticket', {'ticket_id': OWN})]),
+    ("change ticket 1's description to printer jams", [('update_ticket_description', {'ticket_id': OWN, 'new_description': 'printer jams'})]),
+    ("delete ticket 9", None),                      # number not in last_ticket_map
+    ("next page", None),                            # no listing to page through
+    ("my laptop makes a weird noise", None),
+])
+def test_user_routes(request_text, expected):
+    assert _routed(request_text, _user()) == expected
+
+
+@pytest.mark.parametrize('request_text, expected', [
+    ("set ticket 2 priority to HIGH", [('update_ticket_priority', {'ticket_id': OTHER, 'new_priority': 'high'})]),
+    ("change ticket 1 level to l0", [('update_ticket_issue_level', {'ticket_id': OWN, 'new_issue_level': 'L0'})]),
+    ("mark ticket 1 status as in progress", [('update_ticket_status', {'ticket_id': OWN, 'new_status': 'In Progress'})]),
+    ("delete ticket 2", [('delete_ticket', {'ticket_id': OTHER})]),
+    ("look up employee named Jane", [('search_employees', {'query': 'Jane'})]),
+])
+def test_admin_routes(request_text, expected):
+    assert _routed(request_text, _admin()) == expected
+
+
+@pytest.mark.parametrize('request_text', [
+    "delete ticket 2",                              # someone else's ticket
+    f"change {OTHER}'s description to mine now",
+    "set ticket 1 priority to high",                # admin-only fields, even on an own ticket
+    "change ticket 1 level to l0",
+    "set ticket 1 status to resolved",
+    "find employee Jane",
+])
+def test_user_is_denied(request_text):
+    assert route_intent(request_text, _user()) == DENIED
+
+
+def test_admin_only_tools_are_the_severity_and_status_fields():
+    assert intentRouter.ADMIN_ONLY_TICKET_TOOLS == {'update_ticket_priority', 'update_ticket_issue_level', 'update_ticket_status', 'update_ticket_progress'}
+
+
+def test_role_argument_overrides_the_session():
+    assert route_intent("set ticket 1 priority to high", _user(), user_role='admin')[0]['tool'] == 'update_ticket_priority'
+
+
+def test_stats_count_hits_unresolved_matches_and_fallbacks(monkeypatch):
+    monkeypatch.setattr(intentRouter, 'route_hits', intentRouter.Counter())
+    route_intent("show my tickets", _user())
+    route_intent("delete ticket 9", _user())
+    route_intent("my laptop makes a weird noise", _user())
+    stats = route_stats()
+    assert (stats['show_tickets'], stats['delete_ticket:unresolved'], stats['llm_fallback']) == (1, 1, 2)
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from importTime import HEAVY_PACKAGES, REPO_ROOT, measure
+
+from firebaseTests import firebaseFullV10 as backend
+
+
+def _loaded_after_import(module: str) -> list:
+    code = f"import sys, {module}; print(' '.join(sorted({{name.split('.')[0] for name in sys.modules}})))"
+    proc = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True,
+                          env={**os.environ, 'PYTHONPATH': REPO_ROOT})
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.split()
+
+
+def test_importing_the_backend_leaves_the_client_libraries_unloaded():
+    assert set(_loaded_after_import('firebaseTests.firebaseFullV10')) & set(HEAVY_PACKAGES) == set()
+
+
+def test_db_attribute_is_the_lazily_created_client(memory_db):
+    assert backend.db is memory_db
+    assert backend.get_db() is memory_db
+
+
+def test_unknown_module_attribute_still_raises():
+    with pytest.raises(AttributeError, match="no_such_thing"):
+        backend.no_such_thing
+
+
+def test_import_time_report_charges_modules_to_their_package():
+    report = measure('firebaseTests.llmCache')
+    assert report['firebaseTests'] > 0
+    assert report['__total__'] >= report['firebaseTests']
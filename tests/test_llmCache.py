@@ -0,0 +1,41 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.llmCache import LLMResponseCache, make_cache_key
+from firebaseTests.techSession import TechSession
+
+
+def test_prompts_differing_in_case_get_different_keys():
+    assert make_cache_key('m', 0.0, 64, "change my password to Hunter2") != make_cache_key('m', 0.0, 64, "change my password to hunter2")
+    assert make_cache_key('m', 0.0, 64, "x", system_prompt="Be brief") != make_cache_key('m', 0.0, 64, "x", system_prompt="be brief")
+
+
+def test_prompts_differing_in_whitespace_share_a_key():
+    assert make_cache_key('m', 0.0, 64, "show  my\n tickets ") == make_cache_key('m', 0.0, 64, "show my tickets")
+
+
+def test_cached_arguments_keep_their_case():
+    cache = LLMResponseCache(path=None)
+    cache.set(make_cache_key('m', 0.0, 64, "change my password to hunter2"), '{"new_password": "hunter2"}')
+    assert cache.get(make_cache_key('m', 0.0, 64, "change my password to Hunter2")) is None
+
+
+def test_only_usable_responses_are_cached(fake_llm):
+    fake_llm.replies = ["no idea", "LEVEL:L1,PRIORITY:high"]
+    with pytest.raises(ValueError):
+        backend.analyze_issue_severity("VPN down", strict=True)
+    assert backend.analyze_issue_severity("VPN down", strict=True) == ('L1', 'high')
+    assert backend.analyze_issue_severity("VPN down", strict=True) == ('L1', 'high')
+    assert len(fake_llm.requests) == 2
+
+
+def test_intent_retry_bypasses_the_cache(fake_llm):
+    session = TechSession(employee_id='JS817_669_677', role='user')
+    none = '[{"tool": "none", "args": {}, "missing_args": []}]'
+    fake_llm.replies = ["Sorry, what?", none, '[{"tool": "show_tickets", "args": {}, "missing_args": []}]']
+    request = "could you have a look at the thing from before"
+    assert backend.analyze_ticket_intent(request, fast_path=False, session=session)[0]['tool'] == 'unknown'
+    assert backend.analyze_ticket_intent(request, fast_path=False, session=session)[0]['tool'] == 'none'
+    assert backend.analyze_ticket_intent(request, fast_path=False, session=session)[0]['tool'] == 'none'
+    assert backend.analyze_ticket_intent(request, fast_path=False, session=session, cache=False)[0]['tool'] == 'show_tickets'
+    assert len(fake_llm.requests) == 3
@@ -0,0 +1,81 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.llmCache import LLMResponseCache, make_cache_key
+from firebaseTests.llmCassette import CassetteMissError, LLMCassette
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    cassette = LLMCassette(str(tmp_path / 'cassette.sqlite3'), mode='record', max_takes=2)
+    yield cassette
+    cassette.close()
+
+
+def test_takes_replay_in_recorded_order_and_wrap_around(cassette):
+    assert cassette.record('k', 'first', 0.5)
+    assert cassette.record('k', 'second', 0.7)
+    assert not cassette.record('k', 'third', 0.9)  # max_takes
+    assert [cassette.play('k')['response'] for _ in range(3)] == ['first', 'second', 'first']
+    assert cassette.play('unknown') is None
+    assert cassette.stats()['takes'] == 2
+
+
+def test_cassette_survives_reopening(tmp_path):
+    path = str(tmp_path / 'cassette.sqlite3')
+    recorder = LLMCassette(path, mode='record')
+    recorder.record('k', 'answer', 0.2, prompt_tokens=10, completion_tokens=3)
+    recorder.close()
+    player = LLMCassette(path, mode='replay')
+    take = player.play('k')
+    player.close()
+    assert (take['response'], take['latency'], take['completion_tokens']) == ('answer', 0.2, 3)
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        LLMCassette(':memory:', mode='rewind')
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    cassette = LLMCassette(str(tmp_path / 'cassette.sqlite3'), mode='replay')
+    monkeypatch.setattr(backend, 'LLM_CASSETTE_LATENCY', 'zero')
+    backend.set_llm_cassette(cassette)
+    yield cassette
+    backend.set_llm_cassette(None)
+    cassette.close()
+
+
+def test_invoke_llm_replays_without_the_network(replay):
+    route = backend.resolve_model_route('chat')
+    replay.record(make_cache_key(route['model'], route['temperature'], route['max_tokens'], "Hello"), "Hi there", 1.5)
+    assert backend.invoke_llm("Hello", call_site="chat") == "Hi there"
+
+
+def test_unrecorded_request_fails_instead_of_calling_out(replay):
+    with pytest.raises(CassetteMissError):
+        backend.invoke_llm("Never recorded", call_site="chat")
+
+
+def test_recording_with_a_warm_cache_replays_with_a_cold_one(fake_llm, tmp_path, monkeypatch):
+    path = str(tmp_path / 'cassette.sqlite3')
+    fake_llm.replies = ["LEVEL:L1,PRIORITY:high", "LEVEL:L1,PRIORITY:high"]
+    assert backend.analyze_issue_severity("VPN down", strict=True) == ('L1', 'high')  # now cached
+
+    recorder = LLMCassette(path, mode='record')
+    backend.set_llm_cassette(recorder)
+    assert backend.analyze_issue_severity("VPN down", strict=True) == ('L1', 'high')
+    recorder.close()
+    assert len(fake_llm.requests) == 2
+
+    player = LLMCassette(path, mode='replay')
+    backend.set_llm_cassette(player)
+    monkeypatch.setattr(backend, 'llm_cache', LLMResponseCache(path=None))
+    monkeypatch.setattr(backend, 'LLM_CASSETTE_LATENCY', 'zero')
+    try:
+        assert backend.analyze_issue_severity("VPN down", strict=True) == ('L1', 'high')
+    finally:
+        backend.set_llm_cassette(None)
+        player.close()
+    assert len(fake_llm.requests) == 2
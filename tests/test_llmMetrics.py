@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.llmMetrics import Histogram, LLMMetrics
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = LLMMetrics()
+    monkeypatch.setattr(backend, 'llm_metrics', metrics)
+    return metrics
+
+
+def _record(metrics, outcome, latency, n):
+    for _ in range(n):
+        metrics.record({'call_site': 'intent', 'model': 'm', 'outcome': outcome, 'latency': latency})
+
+
+def test_quantile_by_outcome(metrics):
+    _record(metrics, 'cache_hit', 0.001, 97)
+    _record(metrics, 'ok', 3.0, 3)
+    assert metrics.quantile('intent', 0.95, model='m') < 0.1
+    assert 2.0 <= metrics.quantile('intent', 0.95, model='m', outcome='ok') <= 4.0
+    assert metrics.quantile('intent', 0.95, model='other', outcome='ok') is None
+
+
+def test_hedge_delay_ignores_cache_hits_and_replays(metrics):
+    _record(metrics, 'cache_hit', 0.001, 80)
+    for _ in range(80):
+        metrics.record({'call_site': 'intent', 'model': 'm', 'outcome': 'ok', 'replayed': True, 'latency': 0.002})
+    _record(metrics, 'ok', 3.0, 5)
+    assert backend._hedge_delay('intent', 'm') >= 2.0
+
+
+def test_hedge_delay_without_network_history_uses_the_default(metrics):
+    _record(metrics, 'cache_hit', 0.001, 50)
+    assert backend._hedge_delay('intent', 'm') == backend.LLM_HEDGE_DEFAULT_DELAY
+
+
+def test_reset_clears_outcome_latency(metrics):
+    _record(metrics, 'ok', 3.0, 5)
+    metrics.reset()
+    assert metrics.quantile('intent', 0.95, outcome='ok') is None
+
+
+def test_every_call_is_recorded_once_with_its_timings_tokens_and_retries(fake_llm, metrics):
+    fake_llm.replies = [ConnectionError("reset by peer"), "Restart the router"]
+    backend.invoke_llm("Wi-Fi keeps dropping", call_site="advice")
+    (call,) = metrics.records
+    assert (call['call_site'], call['model']) == ('advice', backend.resolve_model_route('advice')['model'])
+    assert (call['outcome'], call['attempts'], call['retries']) == ('ok', 2, 1)
+    assert (call['prompt_tokens'], call['completion_tokens']) == (10, 3)
+    assert call['queue_wait'] >= 0 and call['latency'] > 0
+    assert call['stream'] is False and call['ttft'] is None
+    assert '_started' not in call
+
+
+def test_failed_call_records_its_outcome_and_error(fake_llm, metrics):
+    fake_llm.replies = [(1.0, "late")] * backend.LLM_RETRIES
+    with pytest.raises(backend.LLMTimeoutError):
+        backend.invoke_llm("Wi-Fi keeps dropping", call_site="advice", timeout=0.02)
+    (call,) = metrics.records
+    assert (call['outcome'], call['retries']) == ('timeout', backend.LLM_RETRIES - 1)
+    assert "timed out" in call['error']
+
+
+def test_summary_per_call_site(metrics):
+    metrics.record({'call_site': 'intent', 'model': 'm', 'outcome': 'ok', 'latency': 0.3, 'retries': 1,
+                    'prompt_tokens': 100, 'completion_tokens': 20})
+    metrics.record({'call_site': 'intent', 'model': 'm', 'outcome': 'timeout', 'latency': 30.0, 'retries': 2})
+    metrics.record({'call_site': 'intent', 'model': 'm', 'outcome': 'cancelled', 'latency': 0.1})
+    summary = metrics.summary()['intent']
+    assert (summary['calls'], summary['errors'], summary['retries']) == (3, 1, 3)
+    assert summary['avg_prompt_tokens'] == pytest.approx(100 / 3)
+    assert summary['p50'] <= summary['p95'] <= summary['p99']
+
+
+def test_histogram_quantile_interpolates_within_a_bucket():
+    histogram = Histogram((1, 2, 4))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    histogram.observe(100)
+    assert histogram.quantile(1.0) == 4  # +Inf bucket reports the largest finite bound
+    assert Histogram().quantile(0.5) is None
+
+
+def test_prometheus_export(metrics):
+    metrics.record({'call_site': 'intent', 'model': 'meta/llama "3"', 'outcome': 'ok', 'latency': 0.3,
+                    'retries': 1, 'prompt_tokens': 100, 'completion_tokens': 20})
+    text = metrics.export_prometheus()
+    labels = 'call_site="intent",model="meta/llama \\"3\\""'
+    assert f'llm_calls_total{{{labels},outcome="ok"}} 1' in text
+    assert f'llm_retries_total{{{labels}}} 1' in text
+    assert f'llm_tokens_total{{{labels},kind="prompt_tokens"}} 100' in text
+    assert f'llm_request_duration_seconds_bucket{{{labels},le="0.25"}} 0' in text
+    assert f'llm_request_duration_seconds_bucket{{{labels},le="0.5"}} 1' in text
+    assert f'llm_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f'llm_request_duration_seconds_count{{{labels}}} 1' in text
+    assert "# TYPE llm_time_to_first_token_seconds histogram" in text
+
+
+def test_json_lines_export(tmp_path):
+    live_path, export_path = tmp_path / 'live.jsonl', tmp_path / 'export.jsonl'
+    metrics = LLMMetrics(jsonl_path=str(live_path))
+    metrics.record({'call_site': 'intent', 'model': 'm', 'outcome': 'ok', 'latency': 0.3})
+    metrics.record({'call_site': 'advice', 'model': 'm', 'outcome': 'error', 'latency': 1.2})
+    assert metrics.export_jsonl(str(export_path)) == 2
+    for path in (live_path, export_path):
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r['call_site'] for r in records] == ['intent', 'advice']
+        assert all('ts' in r for r in records)
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.llmMetrics import LLMMetrics
+from firebaseTests.llmResilience import CircuitBreaker, LLMUnavailableError, backoff_delay
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(attempt, base=1.0, cap=8.0) for attempt in range(6) for _ in range(50)]
+    assert all(0 <= delay <= 8.0 for delay in delays)
+    assert all(backoff_delay(0, base=1.0, cap=8.0) <= 1.0 for _ in range(50))
+    assert len(set(delays)) > 1
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()  # a success in between resets the count
+    _open(breaker)
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert 29 < breaker.retry_after() <= 30
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.02)
+    _open(breaker)
+    time.sleep(0.03)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()  # only one probe at a time
+    breaker.release()  # the probe was abandoned, so another may go
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_and_successful_probe_closes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.02)
+    _open(breaker)
+    time.sleep(0.03)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+    time.sleep(0.03)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_circuit_fails_fast_without_a_request(fake_llm, monkeypatch):
+    monkeypatch.setattr(backend, 'LLM_BREAKER_FAILURES', 2)
+    fake_llm.replies = [ConnectionError("reset by peer")] * backend.LLM_RETRIES
+    with pytest.raises(LLMUnavailableError) as raised:
+        backend.invoke_llm("Reset my VPN token")
+    assert raised.value.attempts == 2
+    assert len(fake_llm.requests) == 2
+    with pytest.raises(LLMUnavailableError):
+        backend.invoke_llm("Reset my VPN token")
+    assert len(fake_llm.requests) == 2
+    assert "currently unavailable" in backend.llm_error_message(raised.value)
+
+
+# --- hedged requests ---
+
+@pytest.fixture
+def hedging(fake_llm, monkeypatch):
+    monkeypatch.setattr(backend, 'LLM_HEDGING', True)
+    monkeypatch.setattr(backend, 'LLM_HEDGE_MIN_DELAY', 0.05)
+    monkeypatch.setattr(backend, 'LLM_HEDGE_DEFAULT_DELAY', 0.05)
+    metrics = LLMMetrics()
+    monkeypatch.setattr(backend, 'llm_metrics', metrics)
+    assert backend.resolve_model_route('intent')['model'] != backend.LLM_HEDGE_MODELS[0]
+    return metrics
+
+
+def test_slow_primary_is_hedged_to_the_alternate_model(fake_llm, hedging):
+    fake_llm.replies = [(1.0, "slow answer"), "fast answer"]
+    assert backend.invoke_llm("Reset my VPN token", call_site="intent") == "fast answer"
+    assert [r['model'] for r in fake_llm.requests] == [backend.resolve_model_route('intent')['model'], backend.LLM_HEDGE_MODELS[0]]
+    # The losing primary request is cancelled as the call returns
+    deadline = time.monotonic() + 2
+    while not fake_llm.cancelled and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fake_llm.cancelled == 1
+    call = hedging.records[-1]
+    assert call['hedged'] and call['model'] == backend.LLM_HEDGE_MODELS[0]
+
+
+def test_fast_primary_is_not_hedged(fake_llm, hedging):
+    fake_llm.replies = ["quick answer"]
+    assert backend.invoke_llm("Reset my VPN token", call_site="intent") == "quick answer"
+    assert len(fake_llm.requests) == 1
+    assert not hedging.records[-1].get('hedged')
+
+
+def test_failed_hedge_still_waits_for_the_primary(fake_llm, hedging):
+    fake_llm.replies = [(0.15, "primary answer"), ConnectionError("alternate down")]
+    assert backend.invoke_llm("Reset my VPN token", call_site="intent") == "primary answer"
+    assert len(fake_llm.requests) == 2
@@ -0,0 +1,87 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.llmCassette import LLMCassette
+from firebaseTests.llmMetrics import LLMMetrics
+from firebaseTests.llmResilience import LLMError
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = LLMMetrics()
+    monkeypatch.setattr(backend, 'llm_metrics', metrics)
+    return metrics
+
+
+def test_stream_yields_the_answer_in_chunks(fake_llm, metrics):
+    fake_llm.replies = ["Restart the router first"]
+    chunks = list(backend.invoke_llm("Wi-Fi keeps dropping", stream=True, call_site="advice"))
+    assert chunks == ["Restart ", "the ", "router ", "first"]
+    assert fake_llm.requests[0]['stream'] is True
+    call = metrics.records[-1]
+    assert call['outcome'] == 'ok'
+    assert call['ttft'] is not None and call['ttft'] <= call['latency']
+    assert call['completion_tokens'] == 4
+
+
+def test_failure_before_the_first_chunk_is_retried(fake_llm):
+    fake_llm.replies = [ConnectionError("reset by peer"), "Restart the router"]
+    assert ''.join(backend.invoke_llm("Wi-Fi keeps dropping", stream=True)) == "Restart the router"
+    assert len(fake_llm.requests) == 2
+
+
+def test_failure_after_the_first_chunk_is_not_restarted(fake_llm, metrics):
+    fake_llm.replies = [["Restart ", "the ", ConnectionError("reset by peer")]]
+    chunks = []
+    with pytest.raises(LLMError, match="reset by peer"):
+        for chunk in backend.invoke_llm("Wi-Fi keeps dropping", stream=True):
+            chunks.append(chunk)
+    assert chunks == ["Restart ", "the "]
+    assert len(fake_llm.requests) == 1
+    assert metrics.records[-1]['outcome'] == 'interrupted'
+
+
+def test_closing_the_stream_early_cancels_the_call(fake_llm, metrics):
+    fake_llm.replies = ["Restart the router first"]
+    chunks = backend.invoke_llm("Wi-Fi keeps dropping", stream=True)
+    assert next(chunks) == "Restart "
+    chunks.close()
+    assert metrics.records[-1]['outcome'] == 'cancelled'
+
+
+def test_advice_stream_notes_an_interruption(fake_llm):
+    fake_llm.replies = [["Restart ", ConnectionError("reset by peer")]]
+    chunks = list(backend.provide_tech_support_advice("Wi-Fi keeps dropping", stream=True))
+    assert chunks[0] == "Restart "
+    assert "Response interrupted" in chunks[1]
+
+
+def test_advice_stream_apologises_when_nothing_arrived(fake_llm):
+    fake_llm.replies = [ConnectionError("reset by peer")] * backend.LLM_RETRIES
+    chunks = list(backend.provide_tech_support_advice("Wi-Fi keeps dropping", stream=True))
+    assert len(chunks) == 1
+    assert "couldn't generate detailed troubleshooting advice" in chunks[0]
+
+
+def test_recorded_stream_replays_without_the_network(fake_llm, tmp_path, monkeypatch):
+    path = str(tmp_path / 'cassette.sqlite3')
+    fake_llm.replies = ["Restart the router and forget the network"]
+    recorder = LLMCassette(path, mode='record')
+    backend.set_llm_cassette(recorder)
+    try:
+        recorded = ''.join(backend.invoke_llm("Wi-Fi keeps dropping", stream=True, call_site="advice"))
+    finally:
+        backend.set_llm_cassette(None)
+        recorder.close()
+
+    player = LLMCassette(path, mode='replay')
+    backend.set_llm_cassette(player)
+    monkeypatch.setattr(backend, 'LLM_CASSETTE_LATENCY', 'zero')
+    try:
+        replayed = list(backend.invoke_llm("Wi-Fi keeps dropping", stream=True, call_site="advice"))
+    finally:
+        backend.set_llm_cassette(None)
+        player.close()
+    assert ''.join(replayed) == recorded == "Restart the router and forget the network"
+    assert len(replayed) > 1
+    assert len(fake_llm.requests) == 1
@@ -0,0 +1,68 @@
+import pytest
+from google.api_core.exceptions import NotFound
+from memoryFirestore import MemoryFirestore
+
+TICKETS = {
+    'A-1': {'employeeID': 'A', 'createdAt': 3, 'priority': 'low'},
+    'A-2': {'employeeID': 'A', 'createdAt': 1, 'priority': 'high'},
+    'A-3': {'employeeID': 'A', 'createdAt': 2, 'priority': 'medium'},
+    'B-1': {'employeeID': 'B', 'createdAt': 0, 'priority': 'high'},
+}
+
+
+@pytest.fixture
+def db():
+    db = MemoryFirestore()
+    db.load('Tickets', TICKETS)
+    return db
+
+
+def _ids(docs):
+    return [doc.id for doc in docs]
+
+
+def test_where_order_by_and_cursor_pagination(db):
+    query = db.collection('Tickets').where('employeeID', '==', 'A').order_by('createdAt')
+    first = list(query.limit(2).stream())
+    assert _ids(first) == ['A-2', 'A-3']
+    assert _ids(query.start_after(first[-1]).stream()) == ['A-1']
+    assert _ids(query.offset(1).limit(1).stream()) == ['A-3']
+
+
+def test_select_projects_fields(db):
+    doc = next(db.collection('Tickets').where('employeeID', '==', 'B').select(['priority']).stream())
+    assert doc.to_dict() == {'priority': 'high'}
+
+
+def test_update_of_missing_document_raises_not_found(db):
+    with pytest.raises(NotFound):
+        db.collection('Tickets').document('nope').update({'priority': 'low'})
+    with pytest.raises(NotFound):
+        db.collection('Tickets').document('nope').delete(option=db.write_option(exists=True))
+
+
+def test_batch_is_atomic(db):
+    batch = db.batch()
+    batch.update(db.collection('Tickets').document('A-1'), {'priority': 'high'})
+    batch.delete(db.collection('Tickets').document('nope'), option=db.write_option(exists=True))
+    with pytest.raises(NotFound):
+        batch.commit()
+    assert db.collection('Tickets').document('A-1').get().to_dict()['priority'] == 'low'
+
+
+def test_on_snapshot_reports_changes(db):
+    seen = []
+    watch = db.collection('Tickets').where('employeeID', '==', 'B').on_snapshot(
+        lambda docs, changes, read_time: seen.append([(c.type.name, c.document.id) for c in changes]))
+    db.collection('Tickets').document('B-2').set({'employeeID': 'B', 'createdAt': 5})
+    db.collection('Tickets').document('B-1').delete()
+    watch.unsubscribe()
+    db.collection('Tickets').document('B-3').set({'employeeID': 'B', 'createdAt': 6})
+    assert seen == [[('ADDED', 'B-1')], [('ADDED', 'B-2')], [('REMOVED', 'B-1')]]
+
+
+def test_rpcs_are_counted(db):
+    db.collection('Tickets').document('A-1').get()
+    list(db.collection('Tickets').stream())
+    assert db.ops[('get', 'Tickets')] == 1
+    assert db.ops[('query', 'Tickets')] == 1
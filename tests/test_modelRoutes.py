@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+import modelComparison
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_chat_max_tokens_comes_from_its_route(monkeypatch):
+    calls = []
+    monkeypatch.setattr(backend, 'invoke_llm', lambda prompt, **kwargs: calls.append(kwargs) or "hi")
+    backend.generate_response("", "What can you do?")
+    assert 'max_tokens' not in calls[0]
+    assert backend.resolve_model_route(calls[0]['call_site'])['max_tokens'] == 4096
+
+
+def test_route_overrides_apply(monkeypatch):
+    monkeypatch.setitem(backend.MODEL_ROUTES, 'chat', {'max_tokens': 512, 'model': 'small-model'})
+    route = backend.resolve_model_route('chat')
+    assert (route['model'], route['max_tokens']) == ('small-model', 512)
+    assert backend.resolve_model_route('chat', max_tokens=64)['max_tokens'] == 64
+
+
+def test_unknown_call_site_uses_the_default_route():
+    assert backend.resolve_model_route('no_such_site') == {'model': backend.LLM_MODEL, 'max_tokens': 2048, 'temperature': 0.7}
+
+
+def test_explicit_arguments_win_over_the_route(monkeypatch):
+    monkeypatch.setitem(backend.MODEL_ROUTES, 'severity', {'model': 'small-model', 'temperature': 0.0})
+    route = backend.resolve_model_route('severity', model='other-model', temperature=0.5)
+    assert (route['model'], route['temperature'], route['max_tokens']) == ('other-model', 0.5, 2048)
+
+
+def test_environment_overrides_merge_into_the_routes():
+    overrides = {'advice': {'model': 'big-model'}, 'severity': {'model': 'small-model', 'temperature': 0}, 'new_site': {'max_tokens': 99}}
+    code = ("import json; from firebaseTests import firebaseFullV10 as b; "
+            "print(json.dumps({s: b.resolve_model_route(s) for s in ('advice', 'severity', 'new_site', 'intent')}))")
+    proc = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True,
+                          env={**os.environ, 'PYTHONPATH': REPO_ROOT, 'LLM_MODEL_ROUTES': json.dumps(overrides)})
+    assert proc.returncode == 0, proc.stderr
+    routes = json.loads(proc.stdout)
+    assert routes['advice'] == {'model': 'big-model', 'max_tokens': 8192, 'temperature': 0.7}  # keeps its max_tokens
+    assert routes['severity'] == {'model': 'small-model', 'max_tokens': 2048, 'temperature': 0}
+    assert routes['new_site']['max_tokens'] == 99
+    assert routes['intent']['model'] == backend.LLM_MODEL
+
+
+def test_call_site_requests_use_their_route(fake_llm, monkeypatch):
+    monkeypatch.setitem(backend.MODEL_ROUTES, 'severity', {'model': 'small-model', 'max_tokens': 16, 'temperature': 0.0})
+    fake_llm.replies = ["LEVEL:L1,PRIORITY:high"]
+    backend.analyze_issue_severity("VPN down")
+    request = fake_llm.requests[0]
+    assert (request['model'], request['max_tokens'], request['temperature']) == ('small-model', 16, 0.0)
+
+
+# --- benchmarks/modelComparison.py ---
+
+def test_comparison_runs_a_candidate_through_the_route_and_restores_it(fake_llm):
+    routes_before = {site: dict(route) for site, route in backend.MODEL_ROUTES.items()}
+    fake_llm.replies = ["LEVEL:L1,PRIORITY:high", "no idea"]
+    inputs = [("VPN down", None), ("Printer jams", None)]
+    results = modelComparison.run_model('severity', 'small-model', inputs)
+    assert [r['model'] for r in fake_llm.requests] == ['small-model', 'small-model']
+    assert backend.MODEL_ROUTES == routes_before
+    assert results[0][0] == ('L1', 'high') and results[0][2] is None
+    assert results[1][0] is None and results[1][2].startswith("ValueError")
+    assert modelComparison.summarize(results)['errors'] == 1
+
+
+@pytest.mark.parametrize('candidate, expected', [
+    ([('L1', 'high'), ('L3', 'low')], {'agreement': 1.0, 'level_within_one': 1.0}),
+    ([('L2', 'high'), ('L0', 'low')], {'agreement': 0.0, 'level_within_one': 0.5}),
+])
+def test_severity_quality_is_scored_against_the_reference(candidate, expected):
+    reference = [(('L1', 'high'), 0.5, None), (('L3', 'low'), 0.5, None)]
+    results = [(out, 0.1, None) for out in candidate]
+    assert modelComparison.score('severity', [("a", None), ("b", None)], results, reference) == expected
@@ -0,0 +1,162 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.slotFilling import extract, fill_slots, is_cancel, missing_args_question, permission_error
+from firebaseTests.techSession import TechSession
+
+OWN = 'JS817_669_677-2025_10_01-0900'
+OTHER = 'AD100_200_300-2025_10_02-0900'
+
+
+@pytest.mark.parametrize('kind, message, expected', [
+    ('priority', "make it urgent please", 'high'),
+    ('priority', "normal is fine", 'medium'),
+    ('level', "level 3", 'L3'),
+    ('level', "l0", 'L0'),
+    ('status', "it's in   progress now", 'In Progress'),
+    ('date', "3rd March 1991", '1991-03-03'),
+    ('date', "04/05/1990", '1990-05-04'),
+    ('date', "1990-04-12", '1990-04-12'),
+    ('email', "use jane.doe@company.com", 'jane.doe@company.com'),
+    ('employee_id', "it's js817_669_677", 'JS817_669_677'),
+    ('ticket', f"the {OWN} one", OWN),
+    ('ticket', "ticket 2", 'REF-2'),
+    ('ticket', "number 9", None),
+    ('priority', "whatever you think", None),
+])
+def test_extract(kind, message, expected):
+    assert extract(kind, message, {'last_ticket_map': {'2': 'REF-2'}}) == expected
+
+
+def test_free_text_only_fills_a_lone_missing_argument():
+    pending = {'tool': 'update_ticket_description', 'args': {'ticket_id': OWN}, 'missing': ['new_description']}
+    assert fill_slots(pending, "printer jams on page 2", {}) == ({'ticket_id': OWN, 'new_description': "printer jams on page 2"}, [])
+    assert fill_slots(pending, "printer jams on page 2", {}, text=False)[1] == ['new_description']
+    pending = {'tool': 'update_ticket_fields', 'args': {}, 'missing': ['ticket_id', 'new_description']}
+    assert fill_slots(pending, "printer jams", {})[1] == ['ticket_id', 'new_description']
+
+
+def test_cancel_and_questions():
+    assert is_cancel("never mind") and is_cancel("Cancel.")
+    assert not is_cancel("cancel my ticket 3")
+    assert missing_args_question(['new_priority', 'new_email']).splitlines() == [
+        "Which priority: low, medium or high?", "What email address?"]
+
+
+def test_permission_error():
+    user = {'role': 'user', 'employee_id': 'JS817_669_677'}
+    assert permission_error('delete_ticket', {'ticket_id': OWN}, user) is None
+    assert permission_error('delete_ticket', {'ticket_id': OTHER}, user)
+    assert permission_error('show_tickets', {'employee_id': 'AD100_200_300'}, user)
+    assert permission_error('delete_ticket', {'ticket_id': OTHER}, {'role': 'admin', 'employee_id': 'AD100_200_300'}) is None
+
+
+@pytest.mark.parametrize('tool, args', [
+    ('update_ticket_priority', {'ticket_id': OWN, 'new_priority': 'high'}),
+    ('update_ticket_issue_level', {'ticket_id': OWN, 'new_issue_level': 'L0'}),
+    ('update_ticket_status', {'ticket_id': OWN, 'new_status': 'Resolved'}),
+    ('update_ticket_fields', {'ticket_id': OWN, 'new_description': 'x', 'new_priority': 'high'}),
+    ('update_employee_role', {'employee_id': 'JS817_669_677', 'new_role': 'admin'}),
+])
+def test_admin_only_tools_are_denied_on_own_records(tool, args):
+    user = {'role': 'user', 'employee_id': 'JS817_669_677'}
+    assert permission_error(tool, args, user)
+    assert permission_error(tool, args, {'role': 'admin', 'employee_id': 'AD100_200_300'}) is None
+    assert permission_error('update_ticket_fields', {'ticket_id': OWN, 'new_description': 'x'}, user) is None
+
+
+# --- the pending-call state machine in handle_command ---
+
+@pytest.fixture
+def tickets(memory_db, monkeypatch):
+    memory_db.load('Tickets', {
+        OWN: {'employeeID': 'JS817_669_677', 'referenceCode': OWN, 'problemDescription': 'VPN drops',
+              'priority': 'low', 'issueLevel': 'L2', 'progressReport': 'Unassigned', 'createdAt': 1},
+        OTHER: {'employeeID': 'AD100_200_300', 'referenceCode': OTHER, 'problemDescription': 'Outlook crashes',
+                'priority': 'low', 'issueLevel': 'L2', 'progressReport': 'Unassigned', 'createdAt': 2},
+    })
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("unexpected LLM call")
+
+    monkeypatch.setattr(backend, 'invoke_llm', no_llm)
+    monkeypatch.setattr(backend, 'llm_missing_arg_handler', no_llm)
+    return memory_db
+
+
+def _route(monkeypatch, command, intent):
+    original = backend.route_intent
+    monkeypatch.setattr(backend, 'route_intent', lambda text, *args: [intent] if text == command else original(text, *args))
+
+
+def _priority(db, ref):
+    return db.collection('Tickets').document(ref).get().to_dict()['priority']
+
+
+def test_missing_arguments_are_asked_for_and_filled_without_the_llm(tickets, monkeypatch):
+    _route(monkeypatch, "change a ticket's priority",
+           {'tool': 'update_ticket_priority', 'args': {}, 'missing_args': ['ticket_id', 'new_priority']})
+    session = TechSession(employee_id='AD100_200_300', role='admin', last_ticket_map={'1': OWN})
+    assert "Which ticket?" in backend.handle_command("change a ticket's priority", session=session)
+    assert session['pending_call']['missing'] == ['ticket_id', 'new_priority']
+    assert "Which priority" in backend.handle_command("ticket 1", session=session)
+    assert session['pending_call'] == {'tool': 'update_ticket_priority', 'args': {'ticket_id': OWN}, 'missing': ['new_priority']}
+    backend.handle_command("make it urgent", session=session)
+    assert session['pending_call'] is None
+    assert _priority(tickets, OWN) == 'high'
+
+
+def test_arguments_in_the_request_itself_are_used(tickets, monkeypatch):
+    _route(monkeypatch, f"set {OWN} to high priority",
+           {'tool': 'update_ticket_priority', 'args': {'ticket_id': OWN}, 'missing_args': ['new_priority']})
+    session = TechSession(employee_id='AD100_200_300', role='admin')
+    backend.handle_command(f"set {OWN} to high priority", session=session)
+    assert session['pending_call'] is None
+    assert _priority(tickets, OWN) == 'high'
+
+
+def test_cancel_drops_the_pending_call(tickets):
+    session = TechSession(employee_id='AD100_200_300', role='admin')
+    session['pending_call'] = {'tool': 'update_ticket_priority', 'args': {'ticket_id': OWN}, 'missing': ['new_priority']}
+    assert "cancelled" in backend.handle_command("cancel", session=session)
+    assert session['pending_call'] is None
+    assert _priority(tickets, OWN) == 'low'
+
+
+def test_user_cannot_complete_a_call_on_someone_elses_ticket(tickets):
+    session = TechSession(employee_id='JS817_669_677', role='user')
+    session['pending_call'] = {'tool': 'update_ticket_description', 'args': {'new_description': 'x'}, 'missing': ['ticket_id']}
+    assert "admin privileges" in backend.handle_command(OTHER, session=session)
+    assert session['pending_call'] is None
+    assert tickets.collection('Tickets').document(OTHER).get().to_dict()['problemDescription'] == 'Outlook crashes'
+
+
+def test_user_cannot_complete_an_admin_only_call_on_their_own_ticket(tickets):
+    session = TechSession(employee_id='JS817_669_677', role='user')
+    session['pending_call'] = {'tool': 'update_ticket_priority', 'args': {'ticket_id': OWN}, 'missing': ['new_priority']}
+    assert "admin privileges" in backend.handle_command("high", session=session)
+    assert session['pending_call'] is None
+    assert _priority(tickets, OWN) == 'low'
+
+
+def test_a_recognised_command_replaces_the_pending_call(tickets):
+    session = TechSession(employee_id='JS817_669_677', role='user')
+    session['pending_call'] = {'tool': 'update_ticket_description', 'args': {}, 'missing': ['ticket_id', 'new_description']}
+    reply = backend.handle_command("show my tickets", session=session)
+    assert session['pending_call'] is None
+    assert OWN in reply
+
+
+def test_llm_fallback_gets_compact_context_when_nothing_is_extracted(tickets, monkeypatch):
+    calls = []
+
+    def fallback(tool, missing, command, context=None):
+        calls.append(context)
+        return {'status': 'ask', 'message': "Which ticket do you mean?"}
+
+    monkeypatch.setattr(backend, 'llm_missing_arg_handler', fallback)
+    session = TechSession(employee_id='JS817_669_677', role='user', last_ticket_map={'1': OWN})
+    session['pending_call'] = {'tool': 'delete_ticket', 'args': {}, 'missing': ['ticket_id']}
+    assert "Which ticket do you mean?" in backend.handle_command("the one about the vpn", session=session)
+    assert session['pending_call'] is not None
+    assert set(calls[0]) == {'employee_id', 'role', 'arguments_so_far', 'ticket_numbers'}
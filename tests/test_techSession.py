@@ -0,0 +1,29 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.techSession import TechSession, use_session
+
+
+def _intent_prompt(session, **kwargs):
+    prompts = []
+    backend.process_prompt_for_tool_call("show all tickets", llm_func=lambda prompt, **_: prompts.append(prompt) or "[]", **kwargs)
+    return prompts[0]
+
+
+@pytest.mark.parametrize('role', ['admin', 'user'])
+def test_intent_prompt_uses_the_session_role(role):
+    session = TechSession(employee_id='AD100_200_300', role=role)
+    assert f'User Role: "{role}"' in _intent_prompt(session, tech_session=session)
+    with use_session(session):
+        assert f'User Role: "{role}"' in _intent_prompt(session)
+
+
+def test_explicit_user_role_wins():
+    session = TechSession(employee_id='AD100_200_300', role='admin')
+    assert 'User Role: "user"' in _intent_prompt(session, tech_session=session, user_role='user')
+
+
+def test_sessions_do_not_share_state():
+    first, second = TechSession(employee_id='A'), TechSession(employee_id='B')
+    first['last_ticket_map']['1'] = 'A-2025_01_01-0000'
+    assert second['last_ticket_map'] == {}
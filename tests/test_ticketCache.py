@@ -0,0 +1,69 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.ticketCache import TicketCache
+
+EMPLOYEE = 'JS817_669_677'
+FIRST, SECOND = f'{EMPLOYEE}-2025_10_01-0900', f'{EMPLOYEE}-2025_10_02-0900'
+
+
+@pytest.fixture
+def cached(memory_db):
+    memory_db.load('Employees', {EMPLOYEE: {'employeeID': EMPLOYEE, 'name': 'John Smith', 'role': 'user'}})
+    memory_db.load('Tickets', {ref: {'employeeID': EMPLOYEE, 'referenceCode': ref, 'problemDescription': 'VPN drops',
+                                     'priority': 'low', 'issueLevel': 'L3', 'progressReport': 'Unassigned'}
+                               for ref in (FIRST, SECOND)})
+    backend.list_tickets_page(EMPLOYEE)  # complete first page: now cached
+    assert backend.ticket_cache.stats()['tickets'] == 2
+    return memory_db
+
+
+def _listing(db):
+    """
+    The employee's listing, asserting it was served without querying Firestore.
+    """
+    queries = db.ops[('query', 'Tickets')]
+    tickets, _ = backend.list_tickets_page(EMPLOYEE)
+    assert db.ops[('query', 'Tickets')] == queries
+    return {t['referenceCode']: t for t in tickets}
+
+
+def test_created_ticket_joins_the_cached_listing(cached):
+    backend.create_ticket(EMPLOYEE, "Printer jams", issue_level='L2', priority='high')
+    listing = _listing(cached)
+    assert len(listing) == 3
+    assert any(t['problemDescription'] == "Printer jams" for t in listing.values())
+
+
+def test_updates_patch_the_cached_listing(cached):
+    backend.update_ticket_description(FIRST, "VPN drops every hour")
+    backend.execute_tool_calls([('update_ticket_priority', {'ticket_id': FIRST, 'new_priority': 'high'}),
+                                ('update_ticket_fields', {'ticket_id': SECOND, 'new_status': 'Resolved'})])
+    listing = _listing(cached)
+    assert (listing[FIRST]['problemDescription'], listing[FIRST]['priority']) == ("VPN drops every hour", 'high')
+    assert listing[SECOND]['progressReport'] == 'Resolved'
+
+
+def test_deleted_ticket_leaves_the_cached_listing(cached):
+    backend.delete_ticket(FIRST)
+    assert list(_listing(cached)) == [SECOND]
+
+
+def test_failed_write_leaves_the_cache_alone(cached):
+    backend.update_ticket_description(f'{EMPLOYEE}-2025_10_09-0900', "No such ticket")
+    assert list(_listing(cached)) == [FIRST, SECOND]
+
+
+def test_writes_for_uncached_employees_are_ignored():
+    cache = TicketCache()
+    cache.apply_write('X-1', 'set', {'employeeID': 'X', 'referenceCode': 'X-1'})
+    cache.apply_write('X-1', 'update', {'priority': 'high'})
+    assert cache.get('X') is None and cache.stats()['tickets'] == 0
+
+
+def test_expired_or_invalidated_entries_reload(cached, monkeypatch):
+    backend.ticket_cache.invalidate(EMPLOYEE)
+    assert backend.ticket_cache.get(EMPLOYEE) is None
+    backend.list_tickets_page(EMPLOYEE)
+    monkeypatch.setattr(backend.ticket_cache, 'ttl', -1)
+    assert backend.ticket_cache.get(EMPLOYEE) is None
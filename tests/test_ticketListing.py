@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests.techSession import TechSession, use_session
+
+EMPLOYEE = 'JS817_669_677'
+CREATED = datetime(2025, 10, 1, 9, 0, tzinfo=timezone.utc)
+IDS = [f"{EMPLOYEE}-{(CREATED + timedelta(days=n)).strftime('%Y_%m_%d-%H%M')}" for n in range(25)]
+
+
+@pytest.fixture
+def tickets(memory_db):
+    # The first five predate the createdAt field
+    memory_db.load('Tickets', {
+        ticket_id: {'employeeID': EMPLOYEE, 'referenceCode': ticket_id, 'problemDescription': f"issue {n}",
+                    'priority': 'low', 'issueLevel': 'L3', 'progressReport': 'Unassigned',
+                    **({'createdAt': CREATED + timedelta(days=n)} if n >= 5 else {})}
+        for n, ticket_id in enumerate(IDS)
+    })
+    memory_db.load('Tickets', {'AD100_200_300-2025_10_01-0900': {'employeeID': 'AD100_200_300', 'createdAt': CREATED}})
+    return memory_db
+
+
+def test_cursor_pages_cover_every_ticket_in_creation_order(tickets, monkeypatch):
+    monkeypatch.setattr(backend, 'TICKET_CACHE_ENABLED', False)
+    pages, cursor = [], None
+    while True:
+        page, cursor = backend.list_tickets_page(EMPLOYEE, page_size=10, cursor=cursor)
+        pages.append([t['referenceCode'] for t in page])
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == IDS
+    assert set(page[0]) == set(backend.TICKET_LIST_FIELDS) - {'updatedAt'}  # projected
+
+
+def test_offset_cursor_from_an_expired_cached_page(tickets, monkeypatch):
+    monkeypatch.setattr(backend, 'TICKET_CACHE_ENABLED', False)
+    page, cursor = backend.list_tickets_page(EMPLOYEE, page_size=10, cursor=20)
+    assert [t['referenceCode'] for t in page] == IDS[20:] and cursor is None
+
+
+def test_show_more_tickets_continues_the_numbering(tickets):
+    session = TechSession(employee_id=EMPLOYEE, role='user')
+    with use_session(session):
+        first = backend.show_tickets(EMPLOYEE)
+        assert "Ticket #10" in first and 'Say "next page"' in first
+        backend.show_more_tickets()
+        last = backend.show_more_tickets()
+        assert "Ticket #25" in last and "next page" not in last
+        assert not backend.has_more_tickets()
+        assert backend.show_more_tickets() == "**No more tickets to show.**"
+    assert session['last_ticket_map'] == {str(n): ticket_id for n, ticket_id in enumerate(IDS, 1)}
+
+
+def test_a_complete_first_page_is_cached(memory_db):
+    memory_db.load('Tickets', {ticket_id: {'employeeID': EMPLOYEE, 'referenceCode': ticket_id} for ticket_id in IDS[:3]})
+    assert len(backend.list_tickets_page(EMPLOYEE)[0]) == 3
+    queries = memory_db.ops[('query', 'Tickets')]
+    page, cursor = backend.list_tickets_page(EMPLOYEE)
+    assert [t['referenceCode'] for t in page] == IDS[:3] and cursor is None
+    assert memory_db.ops[('query', 'Tickets')] == queries
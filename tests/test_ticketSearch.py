@@ -0,0 +1,96 @@
+import pytest
+
+from firebaseTests import firebaseFullV10 as backend
+from firebaseTests import ticketSearch
+from firebaseTests.techSession import TechSession, use_session
+from firebaseTests.ticketSearch import TicketSearchIndex, tokenize
+
+OWN = 'JS817_669_677-2025_10_01-0900'
+OTHER = 'AD100_200_300-2025_10_02-0900'
+TICKETS = {
+    OWN: {'employeeID': 'JS817_669_677', 'name': 'Jane Smith', 'problemDescription': "Outlook crashes when opening attachments",
+          'progressReport': 'Unassigned', 'priority': 'high', 'issueLevel': 'L1'},
+    OTHER: {'employeeID': 'AD100_200_300', 'name': 'Alex Doe', 'problemDescription': "Laptop crashed after update, outlook slow",
+            'progressReport': 'In Progress', 'priority': 'low', 'issueLevel': 'L2'},
+    'JS817_669_677-2025_10_03-0900': {'employeeID': 'JS817_669_677', 'name': 'Jane Smith', 'problemDescription': "Printer jams",
+                                      'progressReport': 'Resolved', 'priority': 'low', 'issueLevel': 'L1'},
+}
+
+
+@pytest.fixture
+def index():
+    index = TicketSearchIndex()
+    index.load(TICKETS.items())
+    return index
+
+
+def _ids(matches):
+    return [doc['referenceCode'] for _, doc in matches]
+
+
+def test_tokenize_stems_drops_stopwords_and_keeps_reference_codes():
+    assert tokenize("Crashes, crashed and crashing") == ['crash', 'crash', 'crash']
+    assert tokenize("any tickets mentioning the VPN") == ['vpn']
+    assert OWN.lower() in tokenize(f"what about {OWN}?")
+
+
+def test_bm25_ranks_the_closer_match_first(index):
+    assert _ids(index.search("outlook crashing on attachments")) == [OWN, OTHER]
+    assert _ids(index.search("outlook", limit=1)) == [OWN]
+    assert _ids(index.search(OWN))[0] == OWN
+    assert index.search("the") == [] and index.search("keyboard") == []
+
+
+def test_employee_and_status_filters(index):
+    assert _ids(index.search("outlook", employee_id='AD100_200_300')) == [OTHER]
+    assert _ids(index.search("outlook", status='in progress')) == [OTHER]
+    assert _ids(index.search("jane smith", status='Resolved')) == ['JS817_669_677-2025_10_03-0900']
+
+
+def test_writes_are_applied_once_the_index_is_ready(index):
+    index.apply_write(OWN, 'update', {'problemDescription': "Keyboard missing keys"})
+    assert _ids(index.search("keyboard")) == [OWN]
+    assert index.search("attachments") == []
+    index.apply_write('NEW-1', 'set', {'employeeID': 'X', 'problemDescription': "keyboard stuck"})
+    index.apply_write(OWN, 'delete')
+    assert _ids(index.search("keyboard")) == ['NEW-1']
+    assert index.stats()['tickets'] == 3
+
+    fresh = TicketSearchIndex()
+    fresh.apply_write(OWN, 'set', TICKETS[OWN])
+    assert len(fresh) == 0
+
+
+def test_saved_index_round_trips_and_other_versions_are_ignored(index, tmp_path, monkeypatch):
+    path = str(tmp_path / 'index.json.gz')
+    index.save(path)
+    restored = TicketSearchIndex()
+    assert restored.load_file(path)
+    assert restored.synced_at == index.synced_at
+    assert restored.search("outlook crashing") == index.search("outlook crashing")
+
+    monkeypatch.setattr(ticketSearch, 'INDEX_VERSION', ticketSearch.INDEX_VERSION + 1)
+    assert not TicketSearchIndex().load_file(path)
+    assert not TicketSearchIndex().load_file(str(tmp_path / 'missing.json.gz'))
+
+
+@pytest.mark.parametrize('role, employee_id, expected', [
+    ('user', 'JS817_669_677', [OWN]),
+    ('admin', 'AD100_200_300', [OWN, OTHER]),
+])
+def test_search_tickets_shows_users_only_their_own_tickets(memory_db, role, employee_id, expected):
+    memory_db.load('Tickets', {ticket_id: {**data, 'referenceCode': ticket_id} for ticket_id, data in TICKETS.items()})
+    session = TechSession(employee_id=employee_id, role=role)
+    with use_session(session):
+        reply = backend.search_tickets("outlook")
+    assert [ticket_id for ticket_id in (OWN, OTHER) if ticket_id in reply] == expected
+    assert session['last_ticket_map'] == {str(n): ticket_id for n, ticket_id in enumerate(expected, 1)}
+
+
+def test_catch_up_drops_tickets_deleted_meanwhile(memory_db, monkeypatch):
+    index = TicketSearchIndex()
+    index.load(TICKETS.items())
+    monkeypatch.setattr(backend, 'ticket_search_index', index)
+    memory_db.load('Tickets', {OWN: TICKETS[OWN]})
+    backend._drop_deleted_from_ticket_search(memory_db.collection('Tickets'))
+    assert index.ticket_ids() == {OWN}